@@ -0,0 +1,149 @@
+# app/api/v1/encounter.py
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.encounters import DEFAULT_DISTANCE_M, DEFAULT_STEP_S, compute_encounters
+from app.core.responses import NumpyJSONResponse
+from app.core.trajectory_store import TrajectoryDataset, to_epoch_seconds, trajectory_store
+
+router = APIRouter(prefix="/encounters", tags=["encounters"])
+
+
+# ==========
+# Response Models
+# ==========
+
+class Encounter(BaseModel):
+    """
+    Two vessels within the distance threshold during [start_ts, end_ts].
+    min_distance_m is the closest distance seen on the time grid (at closest_ts);
+    cpa_distance_m / tcpa_s are predicted from SOG/COG at that moment.
+    """
+    vessel_a: Optional[str] = None
+    vessel_b: Optional[str] = None
+    segment_a: str
+    segment_b: str
+    start_ts: datetime
+    end_ts: datetime
+    closest_ts: datetime
+    min_distance_m: float
+    cpa_distance_m: Optional[float] = None
+    tcpa_s: Optional[float] = None
+
+
+# ==========
+# Helpers
+# ==========
+
+# (data version, distance, step) -> encounter columns of the whole dataset
+_encounter_cache: LRUCache[Dict[str, np.ndarray]] = LRUCache(maxsize=settings.ENCOUNTER_CACHE_SIZE)
+
+
+def _fleet_encounters(dataset: TrajectoryDataset, distance: float, step: float) -> Dict[str, np.ndarray]:
+    return _encounter_cache.get_or_compute(
+        (dataset.version, distance, step),
+        lambda: compute_encounters(dataset, distance, step, workers=settings.ENCOUNTER_WORKERS),
+    )
+
+
+def precompute_encounters() -> None:
+    """
+    Batch step: compute the default (distance, step) encounter set of the current dataset
+    into the cache, so the first request does not pay for the fleet-wide run.
+    """
+    _fleet_encounters(trajectory_store.current(), DEFAULT_DISTANCE_M, DEFAULT_STEP_S)
+
+
+def _to_encounters(dataset: TrajectoryDataset, columns: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    def ts(value: float) -> datetime:
+        return datetime.fromtimestamp(value, tz=timezone.utc)
+
+    def optional(value: float) -> Optional[float]:
+        return None if np.isnan(value) else value
+
+    result: List[Dict[str, Any]] = []
+    rows = zip(*(columns[name].tolist() for name in (
+        "segment_a", "segment_b", "start", "end", "closest", "min_distance", "cpa_distance", "tcpa",
+    )))
+    for a, b, start, end, closest, min_distance, cpa_distance, tcpa in rows:
+        seg_a, seg_b = dataset.segments[a], dataset.segments[b]
+        result.append({
+            "vessel_a": seg_a.vessel_id,
+            "vessel_b": seg_b.vessel_id,
+            "segment_a": seg_a.id,
+            "segment_b": seg_b.id,
+            "start_ts": ts(start),
+            "end_ts": ts(end),
+            "closest_ts": ts(closest),
+            "min_distance_m": min_distance,
+            "cpa_distance_m": optional(cpa_distance),
+            "tcpa_s": optional(tcpa),
+        })
+    return result
+
+
+# ==========
+# API
+# ==========
+
+@router.get(
+    "",
+    response_model=List[Encounter],
+    summary="List vessel encounters",
+    description="Vessel pairs closer than `distance` metres, with closest approach and CPA/TCPA.",
+)
+async def list_encounters(
+    distance: float = Query(DEFAULT_DISTANCE_M, ge=10, le=20000, description="Distance threshold in metres"),
+    step: float = Query(DEFAULT_STEP_S, ge=10, le=3600, description="Time grid in seconds"),
+    segment_id: Optional[str] = Query(None, description="Only encounters involving this segment"),
+    vessel_id: Optional[str] = Query(None, description="Only encounters involving this vessel (MMSI)"),
+    start: Optional[datetime] = Query(None, description="Only encounters ending at or after this time"),
+    end: Optional[datetime] = Query(None, description="Only encounters starting at or before this time"),
+):
+    """
+    The fleet-wide set is computed once per data version and parameters (in a process
+    pool over time shards), so filtering by segment or vessel afterwards is instant.
+    """
+    dataset = trajectory_store.current()
+    columns = await run_in_threadpool(_fleet_encounters, dataset, distance, step)
+
+    mask = np.ones(columns["start"].size, dtype=bool)
+    if segment_id is not None:
+        seg = dataset.segments_by_id.get(segment_id)
+        if seg is None:
+            raise HTTPException(status_code=404, detail="Segment not found")
+        # Encounters name the segments at their closest moment: match by time span and
+        # vessel so an encounter that continues into this segment is found as well
+        index = dataset.segment_index[segment_id]
+        hits = (columns["segment_a"] == index) | (columns["segment_b"] == index)
+        if seg.vessel_id:
+            involved = (
+                (dataset.segment_vessel[columns["segment_a"]] == seg.vessel_id)
+                | (dataset.segment_vessel[columns["segment_b"]] == seg.vessel_id)
+            )
+            overlaps = (
+                (columns["end"] >= to_epoch_seconds(seg.start_time))
+                & (columns["start"] <= to_epoch_seconds(seg.end_time))
+            )
+            hits |= involved & overlaps
+        mask &= hits
+    if vessel_id is not None:
+        mask &= (
+            (dataset.segment_vessel[columns["segment_a"]] == vessel_id)
+            | (dataset.segment_vessel[columns["segment_b"]] == vessel_id)
+        )
+    if start is not None:
+        mask &= columns["end"] >= to_epoch_seconds(start)
+    if end is not None:
+        mask &= columns["start"] <= to_epoch_seconds(end)
+
+    return NumpyJSONResponse(_to_encounters(dataset, {name: values[mask] for name, values in columns.items()}))
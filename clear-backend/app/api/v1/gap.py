@@ -0,0 +1,108 @@
+# app/api/v1/gap.py
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
+
+from app.core.responses import NumpyJSONResponse
+from app.core.spatial_index import parse_bbox
+from app.core.trajectory_store import TrajectoryDataset, to_epoch_seconds, trajectory_store
+
+router = APIRouter(prefix="/gaps", tags=["gaps"])
+
+
+# ==========
+# Response Models
+# ==========
+
+class Gap(BaseModel):
+    """Two consecutive fixes of a segment with no report in between."""
+    vessel_id: Optional[str] = None
+    trajectory_id: str
+    segment_id: str
+    start_ts: datetime
+    end_ts: datetime
+    duration_s: float
+    distance_m: float
+    start_lon: float
+    start_lat: float
+    end_lon: float
+    end_lat: float
+
+
+# ==========
+# Helpers
+# ==========
+
+def _to_gaps(dataset: TrajectoryDataset, ids: np.ndarray) -> List[Dict[str, Any]]:
+    index = dataset.gap_index
+    columns = (
+        index.segment[ids], index.start[ids], index.end[ids], index.duration[ids], index.distance[ids],
+        index.start_lon[ids], index.start_lat[ids], index.end_lon[ids], index.end_lat[ids],
+    )
+    result: List[Dict[str, Any]] = []
+    for seg_idx, start, end, duration, distance, lon0, lat0, lon1, lat1 in zip(*(c.tolist() for c in columns)):
+        seg = dataset.segments[seg_idx]
+        result.append({
+            "vessel_id": seg.vessel_id,
+            "trajectory_id": seg.trajectory_id,
+            "segment_id": seg.id,
+            "start_ts": datetime.fromtimestamp(start, tz=timezone.utc),
+            "end_ts": datetime.fromtimestamp(end, tz=timezone.utc),
+            "duration_s": duration,
+            "distance_m": distance,
+            "start_lon": lon0,
+            "start_lat": lat0,
+            "end_lon": lon1,
+            "end_lat": lat1,
+        })
+    return result
+
+
+# ==========
+# API
+# ==========
+
+@router.get(
+    "",
+    response_model=List[Gap],
+    summary="List AIS gaps",
+    description="Reporting gaps across the fleet, longest first.",
+)
+def list_gaps(
+    min_duration: Optional[float] = Query(None, ge=0, description="Shortest gap to return, in seconds"),
+    max_duration: Optional[float] = Query(None, ge=0, description="Longest gap to return, in seconds"),
+    bbox: Optional[str] = Query(None, description="min_lon,min_lat,max_lon,max_lat"),
+    start: Optional[datetime] = Query(None, description="Only gaps ending at or after this time"),
+    end: Optional[datetime] = Query(None, description="Only gaps starting at or before this time"),
+    vessel_id: Optional[List[str]] = Query(None, description="Only gaps of these vessels (MMSI)"),
+    limit: int = Query(1000, ge=1, le=100000, description="Maximum number of gaps returned"),
+):
+    """
+    Answered from the dataset's gap index; only intervals longer than GAP_MIN_SECONDS
+    are indexed, so shorter min_duration values change nothing.
+    """
+    if min_duration is not None and max_duration is not None and min_duration > max_duration:
+        raise HTTPException(status_code=400, detail="min_duration must not exceed max_duration")
+    try:
+        parsed_bbox = parse_bbox(bbox) if bbox else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    dataset = trajectory_store.current()
+    ids = dataset.gap_index.query(
+        min_duration=min_duration,
+        max_duration=max_duration,
+        start=to_epoch_seconds(start) if start is not None else None,
+        end=to_epoch_seconds(end) if end is not None else None,
+        bbox=parsed_bbox,
+    )
+    if vessel_id:
+        ids = ids[np.isin(dataset.gap_index.segment[ids], dataset.vessel_segment_indices(vessel_id))]
+
+    # Longest first, so the gaps most worth imputing lead the list
+    return NumpyJSONResponse(_to_gaps(dataset, ids[::-1][:limit]))
@@ -1,11 +1,15 @@
 # app/api/v1/router.py
 from fastapi import APIRouter
 
-from . import trajectory, sdkg, vista, update
+from . import trajectory, vessel, segment, encounter, gap, sdkg, vista, update
 
 api_router = APIRouter()
 
 api_router.include_router(trajectory.router)
+api_router.include_router(vessel.router)
+api_router.include_router(segment.router)
+api_router.include_router(encounter.router)
+api_router.include_router(gap.router)
 api_router.include_router(sdkg.router)
 api_router.include_router(vista.router)
 api_router.include_router(update.router)
\ No newline at end of file
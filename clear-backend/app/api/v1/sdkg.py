@@ -1,13 +1,19 @@
 # app/api/v1/sdkg.py
 from __future__ import annotations
 
-from pathlib import Path
-from typing import Any, Dict, List, Optional, Literal, Union
+import zlib
+from typing import Any, Dict, List, Optional, Literal, Tuple, Union
 
-from fastapi import APIRouter, HTTPException
+import numpy as np
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
 
+from app.core.cache import LRUCache
 from app.core.config import settings
+from app.core.node_store import node_store
+from app.core.responses import NumpyJSONResponse
+from app.core.sdkg_graph import NODE_TYPES, SDKGGraph, sdkg_store
 
 
 router = APIRouter(prefix="/sdkg", tags=["sdkg"])
@@ -30,6 +36,10 @@ class SDKGLink(BaseModel):
 class SDKGIndexGraph(BaseModel):
     nodes: List[SDKGNode]
     links: List[SDKGLink]
+    # Paging: nodes are page * size ... (page + 1) * size - 1 of totalNodes matching nodes
+    page: int = 0
+    size: Optional[int] = None
+    totalNodes: Optional[int] = None
 
 
 # ======================= 2. Node Detail Model ===================
@@ -98,6 +108,25 @@ NodeDetail = Union[
     TrajectoryNodeDetail,
 ]
 
+# Most node ids accepted by one /nodes:batch request
+MAX_NODE_BATCH = 500
+
+
+class NodeBatchRequest(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=MAX_NODE_BATCH)
+
+
+class NodeBatchItem(BaseModel):
+    """One requested id: its details, or null plus the reason it could not be served."""
+    id: str
+    node: Optional[NodeDetail] = None
+    error: Optional[str] = None
+
+
+class NodeBatchResult(BaseModel):
+    # In request order, one item per requested id
+    items: List[NodeBatchItem]
+
 
 # This is the "original JSON on disk" model, as loose as possible, compatible with what you want to write in the future:
 class RawNodeFile(BaseModel):
@@ -142,14 +171,38 @@ class SubgraphNode(BaseModel):
     # Additional fields from node details
     title: Optional[str] = None
     summary: Optional[str] = None
+    # True number of links (over the followed relations); when an expanded node had more
+    # links than the fan-out cap, the rest are paged from /nodes/{id}/neighbours?cursor=...
+    degree: Optional[int] = None
+    neighboursCursor: Optional[int] = None
 
 
 class SubgraphLink(BaseModel):
     source: str
     target: str
+    relation: Optional[str] = None
     level: int
 
 
+class Neighbour(BaseModel):
+    id: str
+    label: str
+    type: Literal["behavior", "attribute", "function", "segment", "trajectory"]
+    relation: Optional[str] = None
+    # "out": node -> neighbour, "in": neighbour -> node
+    direction: Literal["out", "in"]
+    degree: int
+    support: Optional[float] = None
+
+
+class NeighbourPage(BaseModel):
+    nodeId: str
+    degree: int
+    cursor: int
+    nextCursor: Optional[int] = None
+    neighbours: List[Neighbour]
+
+
 class SubgraphData(BaseModel):
     nodes: List[SubgraphNode]
     links: List[SubgraphLink]
@@ -158,57 +211,109 @@ class SubgraphData(BaseModel):
     maxLevel: int
     totalNodes: int
     totalLinks: int
+    # True when max_nodes stopped the traversal before depth was reached
+    truncated: bool = False
+
 
+# ======================= 4. Index graph ===================
 
-# ======================= 4. load index JSON ===================
+NodeType = Literal["behavior", "attribute", "function", "segment", "trajectory"]
 
-def _load_sdkg_index_raw() -> Dict[str, Any]:
-    path = Path(settings.SDKG_INDEX_JSON_PATH)
-    if not path.exists():
-        raise FileNotFoundError(f"SD-KG index JSON not found: {path}")
+# (graph version, node types, keywords) -> matching node ids
+_search_cache: LRUCache[np.ndarray] = LRUCache(maxsize=settings.SDKG_SEARCH_CACHE_SIZE)
 
-    import json
-    with path.open("r", encoding="utf-8") as f:
-        data = json.load(f)
 
-    if not isinstance(data, dict) or "nodes" not in data or "links" not in data:
-        raise ValueError("SD-KG index JSON must contain 'nodes' and 'links'")
+def _slice_ranges(arrays: List[np.ndarray], start: int, stop: int) -> np.ndarray:
+    """
+    Elements start:stop of the concatenation of arrays, without concatenating them.
+    """
+    parts = []
+    offset = 0
+    for array in arrays:
+        lo, hi = max(start - offset, 0), min(stop - offset, array.size)
+        if lo < hi:
+            parts.append(array[lo:hi])
+        offset += array.size
+        if offset >= stop:
+            break
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+
+
+def _select_nodes(
+    graph: SDKGGraph, types: Optional[List[str]], q: Optional[str], start: int, stop: int
+) -> Tuple[np.ndarray, int]:
+    """
+    Node ids start:stop of the nodes matching the type and keyword filters, plus the
+    number of matching nodes. Without keywords this costs O(page). With keywords it is
+    O(k * L) for k keywords over the total label length L of the candidate nodes, done
+    as one vectorised substring search per keyword (no per-node Python work); the
+    matches are cached per graph version, so the following pages cost O(page).
+    """
+    by_type = (
+        [graph.nodes_by_type[NODE_TYPES.index(t)] for t in NODE_TYPES if t in types]
+        if types else None
+    )
+    keywords = q.split() if q else []
+    if not keywords:
+        if by_type is None:
+            return np.arange(start, min(stop, len(graph)), dtype=np.int64), len(graph)
+        return _slice_ranges(by_type, start, stop), sum(a.size for a in by_type)
 
-    return data
+    def search() -> np.ndarray:
+        candidates = np.concatenate(by_type) if by_type is not None else None
+        return graph.search_labels(keywords, candidates)
 
+    key = (graph.version, tuple(sorted(types or [])), tuple(k.lower() for k in keywords))
+    matches = _search_cache.get_or_compute(key, search)
+    return matches[start:stop], matches.size
 
-def _get_index_graph() -> SDKGIndexGraph:
-    raw = _load_sdkg_index_raw()
 
-    nodes = [
-        SDKGNode(
-            id=n["id"],
-            type=n["type"],
-            label=n["label"],
-        )
-        for n in raw.get("nodes", [])
-    ]
+def _index_graph_payload(
+    graph: SDKGGraph, nodes: np.ndarray, relations: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Nodes of the resident graph plus the links among them -> SDKGIndexGraph fields.
+    """
+    node_ids, labels, node_type = graph.node_ids, graph.labels, graph.node_type
+    links = graph.links_among(nodes, relations)
+    relation_names = graph.relations
+    return {
+        "nodes": [
+            {"id": node_ids[i], "type": NODE_TYPES[node_type[i]], "label": labels[i]}
+            for i in nodes.tolist()
+        ],
+        "links": [
+            {
+                "source": node_ids[s],
+                "target": node_ids[t],
+                "relation": relation_names[r] if r >= 0 else None,
+            }
+            for s, t, r in zip(
+                graph.link_source[links].tolist(),
+                graph.link_target[links].tolist(),
+                graph.link_relation[links].tolist(),
+            )
+        ],
+    }
 
-    links = [SDKGLink(**l) for l in raw.get("links", [])]
 
-    return SDKGIndexGraph(nodes=nodes, links=links)
+def _current_graph() -> SDKGGraph:
+    try:
+        return sdkg_store.current()
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
 
 
 # ======================= 5. Read node details file ===================
 
 def _load_node_file(node_id: str) -> RawNodeFile:
     """
-    Read the node definition from data/sdkg _ nodes/{node _ id}. json.
+    Read the node definition from the node store (data/nodes.pack, or data/nodes/{node_id}.json
+    for data written before the pipeline packed its nodes).
     """
-    base_dir = Path(settings.SDKG_NODES_DIR)
-    path = base_dir / f"{node_id}.json"
-
-    if not path.exists():
-        raise FileNotFoundError(f"Node detail file not found: {path}")
-
-    import json
-    with path.open("r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = node_store.get(node_id)
+    if data is None:
+        raise FileNotFoundError(f"Node detail not found: {node_id}")
 
     return RawNodeFile(**data)
 
@@ -282,76 +387,165 @@ def _build_node_detail(raw: RawNodeFile) -> NodeDetail:
     raise HTTPException(status_code=500, detail=f"Unsupported node type: {raw.type}")
 
 
-# ======================= 6. Subgraph Functions ===================
-def _load_subgraph_file(node_id: str) -> Dict[str, Any]:
+# (graph version, node id) -> NodeDetail, shared by /nodes/{id} and /nodes:batch
+_node_detail_cache: LRUCache[NodeDetail] = LRUCache(maxsize=settings.SDKG_NODE_CACHE_SIZE)
+
+
+def _cached_node_detail(graph: SDKGGraph, node_id: str) -> Optional[NodeDetail]:
     """
-    Read subgraph data from subgraph folder
+    NodeDetail of a node of the current graph, or None if the graph or the node store
+    do not know it. A record that exists but cannot be decoded or validated raises
+    one of _NODE_RECORD_ERRORS.
     """
-    subgraph_dir = Path(settings.SUBGRAPH_DIR)
-    path = subgraph_dir / f"{node_id}.json"
+    if node_id not in graph.node_index:
+        return None
+    try:
+        return _node_detail_cache.get_or_compute(
+            (graph.version, node_id), lambda: _build_node_detail(_load_node_file(node_id))
+        )
+    except FileNotFoundError:
+        return None
+
 
-    if not path.exists():
-        raise FileNotFoundError(f"Subgraph file not found: {path}")
+# Raised by a broken node record: I/O, JSON / UTF-8 decoding and pydantic validation
+# errors (all ValueError subclasses) and corrupt compressed data
+_NODE_RECORD_ERRORS = (OSError, ValueError, zlib.error)
 
-    import json
-    with path.open("r", encoding="utf-8") as f:
-        data = json.load(f)
 
-    return data
+def _node_batch_item(graph: SDKGGraph, node_id: str) -> Dict[str, Any]:
+    try:
+        detail = _cached_node_detail(graph, node_id)
+    except _NODE_RECORD_ERRORS as e:
+        return {"id": node_id, "node": None, "error": f"Unreadable node record ({type(e).__name__})"}
+    if detail is None:
+        return {"id": node_id, "node": None, "error": "Node not found"}
+    return {"id": node_id, "node": detail, "error": None}
+
+
+def _node_batch(graph: SDKGGraph, ids: List[str]) -> List[Dict[str, Any]]:
+    """One item per id, in request order; a bad record only fails its own item."""
+    items = {node_id: _node_batch_item(graph, node_id) for node_id in dict.fromkeys(ids)}
+    return [items[node_id] for node_id in ids]
+
+
+# ======================= 6. Subgraph Functions ===================
+
+# Links followed per expanded node in subgraphs, and neighbours per page
+DEFAULT_FANOUT = 100
+
+# (graph version, center, depth, max_nodes, relations, fanout) -> enriched subgraph
+_subgraph_cache: LRUCache[Dict[str, Any]] = LRUCache(maxsize=settings.SDKG_SUBGRAPH_CACHE_SIZE)
 
 
-def _enrich_subgraph_nodes(subgraph_data: Dict[str, Any]) -> SubgraphData:
+def _build_subgraph(
+    graph: SDKGGraph,
+    node_id: str,
+    depth: int,
+    max_nodes: Optional[int] = None,
+    relations: Optional[List[str]] = None,
+    fanout: Optional[int] = None,
+) -> Dict[str, Any]:
     """
-    Enrich subgraph nodes with additional details from node files
+    Breadth-first subgraph around node_id over the resident graph -> SubgraphData fields.
+    Expanded nodes follow at most `fanout` links, best-ranked neighbours first. Titles
+    and summaries come from the graph's node summary table, so no node file is read.
     """
-    enriched_nodes = []
-    
-    for node in subgraph_data.get("nodes", []):
-        # Create base node with subgraph data
-        enriched_node = {
-            "id": node["id"],
-            "label": node.get("label", ""),
-            "type": node["type"],
-            "level": node["level"],
-            "isCenter": node.get("isCenter", False)
-        }
-        
-        # Try to load additional details from node file
-        try:
-            node_detail = _load_node_file(node["id"])
-            enriched_node["title"] = node_detail.title or node_detail.label or node["id"]
-            enriched_node["summary"] = node_detail.summary or ""
-        except FileNotFoundError:
-            # If node detail file doesn't exist, use basic info
-            enriched_node["title"] = node.get("label", node["id"])
-            enriched_node["summary"] = ""
-        except Exception:
-            # If any other error, continue with basic info
-            enriched_node["title"] = node.get("label", node["id"])
-            enriched_node["summary"] = ""
-        
-        enriched_nodes.append(SubgraphNode(**enriched_node))
-    
-    # Build links
-    links = [SubgraphLink(**link) for link in subgraph_data.get("links", [])]
-    
-    return SubgraphData(
-        nodes=enriched_nodes,
-        links=links,
-        allNodeIds=subgraph_data.get("allNodeIds", []),
-        centerNodeId=subgraph_data.get("centerNodeId", ""),
-        maxLevel=subgraph_data.get("maxLevel", 3),
-        totalNodes=subgraph_data.get("totalNodes", 0),
-        totalLinks=subgraph_data.get("totalLinks", 0)
+    center = graph.node_index[node_id]
+    nodes, node_levels, links, link_levels, truncated = graph.subgraph(
+        center, depth, max_nodes, relations, fanout
     )
+    node_ids, labels, titles, summaries = graph.node_ids, graph.labels, graph.titles, graph.summaries
+    degrees = graph.degree_of(nodes, relations)
+    node_list = [
+        {
+            "id": node_ids[i],
+            "type": graph.type_of(i),
+            "label": labels[i],
+            "level": level,
+            "isCenter": i == center,
+            "title": titles[i],
+            "summary": summaries[i],
+            "degree": degree,
+            # Expanded nodes whose links were capped continue after the first `fanout`
+            "neighboursCursor": fanout if fanout is not None and level < depth and degree > fanout else None,
+        }
+        for i, level, degree in zip(nodes.tolist(), node_levels.tolist(), degrees.tolist())
+    ]
+    link_list = [
+        {"source": node_ids[s], "target": node_ids[t], "relation": graph.relation_of(k), "level": level}
+        for k, s, t, level in zip(
+            links.tolist(), graph.link_source[links].tolist(), graph.link_target[links].tolist(), link_levels.tolist()
+        )
+    ]
+    return {
+        "nodes": node_list,
+        "links": link_list,
+        "allNodeIds": [node["id"] for node in node_list],
+        "centerNodeId": node_id,
+        "maxLevel": depth,
+        "totalNodes": len(node_list),
+        "totalLinks": len(link_list),
+        "truncated": truncated,
+    }
+
+
+def _neighbour_page(
+    graph: SDKGGraph, node_id: str, cursor: int, limit: int, relations: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Neighbours start:start+limit of a node in rank order (support, degree, recency),
+    with the node's true degree and the cursor of the next page.
+    """
+    node = graph.node_index[node_id]
+    neighbour, link = graph.ranked_neighbours(node, relations)
+    page_neighbour, page_link = neighbour[cursor:cursor + limit], link[cursor:cursor + limit]
+    support = graph.node_support[page_neighbour]
+    return {
+        "nodeId": node_id,
+        "degree": int(neighbour.size),
+        "cursor": cursor,
+        "nextCursor": cursor + limit if cursor + limit < neighbour.size else None,
+        "neighbours": [
+            {
+                "id": graph.node_ids[i],
+                "label": graph.labels[i],
+                "type": graph.type_of(i),
+                "relation": graph.relation_of(k),
+                "direction": "out" if graph.link_source[k] == node else "in",
+                "degree": degree,
+                "support": None if np.isnan(value) else value,
+            }
+            for i, k, degree, value in zip(
+                page_neighbour.tolist(), page_link.tolist(),
+                graph.degree[page_neighbour].tolist(), support.tolist(),
+            )
+        ],
+    }
 
 
 # =========================== 7. API ===========================
 
 @router.get("/index", response_model=SDKGIndexGraph)
-async def get_sdkg_index():
-    """Returns the SD-KG index graph (nodes + links) for the front-end ForceGraph."""
-    return _get_index_graph()
+def get_sdkg_index(
+    page: int = Query(0, ge=0, description="0-based page number"),
+    size: Optional[int] = Query(None, ge=1, le=100000, description="Nodes per page; all nodes if omitted"),
+    type: Optional[List[NodeType]] = Query(None, description="Only nodes of these types"),
+    relation: Optional[List[str]] = Query(None, description="Only links of these relations"),
+    q: Optional[str] = Query(None, description="Keywords that must all occur in the node label"),
+):
+    """
+    Returns the SD-KG index graph (nodes + links) for the front-end ForceGraph.
+    Nodes are paged in index order (grouped by type when filtering by type); links are
+    those between nodes of the same page.
+    """
+    graph = _current_graph()
+    start = page * size if size is not None else 0
+    stop = start + size if size is not None else len(graph)
+    nodes, total = _select_nodes(graph, type, q, start, stop)
+
+    payload = _index_graph_payload(graph, nodes, relation)
+    payload.update({"page": page, "size": size, "totalNodes": total})
+    return NumpyJSONResponse(payload)
 
 
 @router.get("/nodes/{node_id}", response_model=NodeDetail)
@@ -360,30 +554,61 @@ async def get_sdkg_node_detail(node_id: str):
     Return to SD-KG node complete details.
     Now implement: read from data/sdkg _ nodes/{node _ id}. json and then map to NodeDetail by type.
     """
-    try:
-        raw = _load_node_file(node_id)
-    except FileNotFoundError:
+    detail = _cached_node_detail(_current_graph(), node_id)
+    if detail is None:
         raise HTTPException(status_code=404, detail="Node not found")
+    return detail
 
-    return _build_node_detail(raw)
+
+@router.post("/nodes:batch", response_model=NodeBatchResult)
+async def get_sdkg_node_details_batch(request: NodeBatchRequest):
+    """
+    Details of up to MAX_NODE_BATCH nodes in one round trip, in request order.
+    Unknown ids do not fail the request; their items carry an error instead.
+    """
+    graph = _current_graph()
+    items = await run_in_threadpool(_node_batch, graph, request.ids)
+    return NodeBatchResult(items=items)
 
 
 @router.get("/subgraph/{node_id}", response_model=SubgraphData)
-async def get_node_subgraph(node_id: str):
+def get_node_subgraph(
+    node_id: str,
+    depth: int = Query(1, ge=1, le=10, description="Number of hops from the node"),
+    max_nodes: Optional[int] = Query(None, ge=1, le=100000, description="Stop expanding at this many nodes"),
+    relation: Optional[List[str]] = Query(None, description="Only follow links of these relations"),
+    fanout: Optional[int] = Query(
+        DEFAULT_FANOUT, ge=1, le=100000, description="Links followed per expanded node (best-ranked first)"
+    ),
+):
     """
-    Return the subgraph data for a specific node (1-3 levels)
-    This provides the pre-computed relationship graph for the frontend visualization
+    Return the subgraph around a specific node (`depth` hops) for the frontend visualization.
+    It is computed by a breadth-first search over the resident SD-KG graph and cached.
+    Hub nodes are capped at `fanout` links; their true degree and a cursor for the rest are
+    reported per node.
     """
-    try:
-        # Load the pre-computed subgraph
-        subgraph_data = _load_subgraph_file(node_id)
-        
-        # Enrich nodes with additional details
-        enriched_subgraph = _enrich_subgraph_nodes(subgraph_data)
-        
-        return enriched_subgraph
-        
-    except FileNotFoundError:
+    graph = _current_graph()
+    if node_id not in graph.node_index:
         raise HTTPException(status_code=404, detail=f"Subgraph not found for node: {node_id}")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error loading subgraph: {str(e)}")
+
+    key = (graph.version, node_id, depth, max_nodes, tuple(sorted(relation)) if relation else None, fanout)
+    return NumpyJSONResponse(_subgraph_cache.get_or_compute(
+        key, lambda: _build_subgraph(graph, node_id, depth, max_nodes, relation, fanout)
+    ))
+
+
+@router.get("/nodes/{node_id}/neighbours", response_model=NeighbourPage)
+def get_node_neighbours(
+    node_id: str,
+    cursor: int = Query(0, ge=0, description="Position to continue from (nextCursor of the previous page)"),
+    limit: int = Query(DEFAULT_FANOUT, ge=1, le=10000, description="Neighbours per page"),
+    relation: Optional[List[str]] = Query(None, description="Only links of these relations"),
+):
+    """
+    Neighbours of a node ranked by support, degree and recency, one page at a time,
+    with the node's true degree.
+    """
+    graph = _current_graph()
+    if node_id not in graph.node_index:
+        raise HTTPException(status_code=404, detail="Node not found")
+    return NumpyJSONResponse(_neighbour_page(graph, node_id, cursor, limit, relation))
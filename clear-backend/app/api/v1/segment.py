@@ -0,0 +1,141 @@
+# app/api/v1/segment.py
+from __future__ import annotations
+
+import operator
+import re
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
+
+from app.core.responses import NumpyJSONResponse
+from app.core.segment_stats import STAT_COLUMNS
+from app.core.spatial_index import parse_bbox
+from app.core.trajectory_store import TrajectoryDataset, trajectory_store
+
+router = APIRouter(prefix="/segments", tags=["segments"])
+
+
+# ==========
+# Response Models
+# ==========
+
+class SegmentStats(BaseModel):
+    """
+    Kinematic summary of one segment; SOG in knots, COG and turns in degrees.
+    Statistics a segment has no data for are null.
+    """
+    segment_id: str
+    trajectory_id: str
+    vessel_id: Optional[str] = None
+    num_points: int
+    duration_s: Optional[float] = None
+    sog_mean: Optional[float] = None
+    sog_p95: Optional[float] = None
+    sog_max: Optional[float] = None
+    sog_var: Optional[float] = None
+    cog_mean: Optional[float] = None
+    total_turn_deg: Optional[float] = None
+    turn_rate_deg_s: Optional[float] = None
+    path_length_m: Optional[float] = None
+    straight_line_ratio: Optional[float] = None
+
+
+# ==========
+# Helpers
+# ==========
+
+_COMPARISONS: Dict[str, Callable[[Any, Any], Any]] = {
+    ">=": operator.ge,
+    "<=": operator.le,
+    ">": operator.gt,
+    "<": operator.lt,
+}
+_WHERE_PATTERN = re.compile(r"^\s*(\w+)\s*(>=|<=|>|<)\s*(\S+)\s*$")
+
+
+def _parse_where(condition: str) -> Tuple[str, Callable[[Any, Any], Any], float]:
+    """
+    'sog_p95>15' -> (column, comparison, value)
+    """
+    match = _WHERE_PATTERN.match(condition)
+    if match is None:
+        raise HTTPException(status_code=400, detail=f"where must look like 'sog_mean>15', got '{condition}'")
+    column, op, value = match.groups()
+    if column not in STAT_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"Unknown statistic '{column}'")
+    try:
+        return column, _COMPARISONS[op], float(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid number in where: '{condition}'")
+
+
+def _to_segment_stats(dataset: TrajectoryDataset, segment_idx: np.ndarray) -> List[Dict[str, Any]]:
+    columns = {name: dataset.segment_stats[name][segment_idx].tolist() for name in STAT_COLUMNS}
+    result: List[Dict[str, Any]] = []
+    for k, i in enumerate(segment_idx.tolist()):
+        seg = dataset.segments[i]
+        result.append({
+            "segment_id": seg.id,
+            "trajectory_id": seg.trajectory_id,
+            "vessel_id": seg.vessel_id,
+            "num_points": seg.num_points,
+            **{name: columns[name][k] for name in STAT_COLUMNS},
+        })
+    return result
+
+
+# ==========
+# API
+# ==========
+
+@router.get(
+    "/stats",
+    response_model=List[SegmentStats],
+    summary="Filter segments by kinematic statistics",
+    description="Segment statistics, optionally filtered like `where=sog_p95>15&where=straight_line_ratio>=0.9`.",
+)
+async def list_segment_stats(
+    where: Optional[List[str]] = Query(None, description="Conditions '<statistic><op><number>', op one of > >= < <="),
+    vessel_id: Optional[List[str]] = Query(None, description="Filter by vessel ID (MMSI)"),
+    bbox: Optional[str] = Query(None, description="min_lon,min_lat,max_lon,max_lat"),
+    start: Optional[datetime] = Query(None, description="Start time (inclusive)"),
+    end: Optional[datetime] = Query(None, description="End time (inclusive)"),
+    limit: int = Query(1000, ge=1, le=100000, description="Maximum number of segments returned"),
+):
+    """
+    Every condition is one comparison over a stats column; segments with a null
+    statistic never match a condition on it.
+    """
+    conditions = [_parse_where(c) for c in where or []]
+    try:
+        parsed_bbox = parse_bbox(bbox) if bbox else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    dataset = trajectory_store.current()
+    segment_idx = dataset.query_segments(
+        bbox=parsed_bbox,
+        start=start,
+        end=end,
+        vessel_ids=vessel_id,
+    )
+    for column, compare, value in conditions:
+        # NaN compares False, so segments without the statistic drop out
+        segment_idx = segment_idx[compare(dataset.segment_stats[column][segment_idx], value)]
+    return NumpyJSONResponse(_to_segment_stats(dataset, segment_idx[:limit]))
+
+
+@router.get(
+    "/{segment_id}/stats",
+    response_model=SegmentStats,
+    summary="Get segment statistics",
+    description="Kinematic statistics of one segment.",
+)
+async def get_segment_stats(segment_id: str):
+    dataset = trajectory_store.current()
+    index = dataset.segment_index.get(segment_id)
+    if index is None:
+        raise HTTPException(status_code=404, detail="Segment not found")
+    return NumpyJSONResponse(_to_segment_stats(dataset, np.array([index]))[0])
@@ -1,52 +1,27 @@
 # app/api/v1/trajectory.py
 from __future__ import annotations
 
-from datetime import datetime
-from pathlib import Path
-from typing import Any, Dict, List, Optional
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Literal, Optional
 
-from fastapi import APIRouter, HTTPException, Query
+import numpy as np
+from fastapi import APIRouter, HTTPException, Path, Query, Request, Response
 from pydantic import BaseModel, Field
 
+from app.core.cache import LRUCache
 from app.core.config import settings
+from app.core.density import grid_density
+from app.core.geometry import mercator_to_lonlat
+from app.core.map_view import iter_map_trajectories, map_segment_fields, to_map_trajectory
+from app.core.mvt import DEFAULT_BUFFER, DEFAULT_EXTENT, LayerBuilder, clip_line, encode_tile
+from app.core.packed_coords import PACKED_COORDS_MEDIA_TYPE, pack_coordinates
+from app.core.responses import NDJSON_MEDIA_TYPE, NDJSONStreamingResponse, NumpyJSONResponse
+from app.core.spatial_index import BBox, parse_bbox
+from app.core.trajectory_store import TrajectoryDataset, to_epoch_seconds, trajectory_store
 
 router = APIRouter(prefix="/trajectories", tags=["trajectories"])
 
 
-# ==========
-# Internal Data Models
-# ==========
-
-class TrackPoint(BaseModel):
-    """A single point on a trajectory (from AIS)"""
-    timestamp: datetime
-    lat: float
-    lon: float
-    sog: Optional[float] = Field(None, description="Speed over ground (knots)")
-    cog: Optional[float] = Field(None, description="Course over ground (deg)")
-
-
-class Segment(BaseModel):
-    """Basic unit in CLEAR: a trajectory segment"""
-    id: str
-    trajectory_id: str
-    vessel_id: Optional[str] = None
-    start_time: datetime
-    end_time: datetime
-    short_description: Optional[str] = None
-    points: List[TrackPoint] = Field(default_factory=list)
-
-
-class Trajectory(BaseModel):
-    """A trajectory consisting of multiple segments"""
-    id: str
-    vessel_id: Optional[str] = None
-    segments: List[Segment]
-    start_time: datetime
-    end_time: datetime
-    num_points: int
-
-
 # ==========
 # Response Models for Map
 # ==========
@@ -56,7 +31,7 @@ class MapSegment(BaseModel):
     Segment view for the frontend map:
     - coordinates: [[lon, lat], ...]
     - summary comes from Segment.short_description
-    - vessel_type is currently mapped using a simple demo mapping
+    - vessel_type comes from the dataset's vessel attribute table
     """
     id: str
     coordinates: List[List[float]]
@@ -72,125 +47,335 @@ class MapTrajectory(BaseModel):
     segments: List[MapSegment]
 
 
-# ==========
-# Utility Functions: Read segments from JSON and construct Trajectory list
-# ==========
+class VesselPosition(BaseModel):
+    """Interpolated position of one vessel at the snapshot time."""
+    vessel_id: Optional[str] = None
+    vessel_type: Optional[str] = None
+    trajectory_id: str
+    segment_id: str
+    lon: float
+    lat: float
+    sog: Optional[float] = None
+    cog: Optional[float] = None
+
 
-def _load_raw_segments() -> List[Dict[str, Any]]:
+class FleetSnapshot(BaseModel):
+    t: datetime
+    positions: List[VesselPosition]
+
+
+class ResampledSegment(BaseModel):
     """
-    Read the raw segment list (dict) from a JSON file without conversion.
+    One segment on a uniform time grid: frame k is at start_ts + k * step seconds.
+    heading is the great-circle bearing towards the next frame.
     """
-    path = Path(settings.SEGMENTS_JSON_PATH)
-    if not path.exists():
-        raise FileNotFoundError(f"Segments JSON not found: {path}")
+    id: str
+    start_ts: datetime
+    coordinates: List[List[float]]
+    sog: List[Optional[float]]
+    cog: List[Optional[float]]
+    heading: List[Optional[float]]
 
-    import json
-    with path.open("r", encoding="utf-8") as f:
-        data = json.load(f)
 
-    if not isinstance(data, list):
-        raise ValueError("Segments JSON must be a list of objects")
-    return data
+class ResampledTrajectory(BaseModel):
+    id: str
+    step: float
+    segments: List[ResampledSegment]
 
 
+class AreaQuery(BaseModel):
+    """Body of POST /trajectories/query."""
+    geometry: Dict[str, Any] = Field(..., description="GeoJSON Polygon, MultiPolygon or a Feature holding one")
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    vessel_id: Optional[List[str]] = None
+    vessel_type: Optional[List[str]] = None
 
-def _get_all_segments() -> List[Segment]:
-    """
-    JSON -> Segment (internal model)
-    """
-    raw_segments = _load_raw_segments()
-    segments: List[Segment] = []
-    for item in raw_segments:
-        # Only take the fields we care about to avoid errors from extra keys in JSON
-        payload = {
-            "id": item["id"],
-            "trajectory_id": item["trajectory_id"],
-            "vessel_id": item.get("vessel_id"),
-            "start_time": item["start_time"],
-            "end_time": item["end_time"],
-            "short_description": item.get("short_description"),
-            "points": item.get("points", []),
-        }
-        segments.append(Segment(**payload))
-    return segments
+
+class AreaVisit(BaseModel):
+    """One stay of a segment inside the area: first and last fix inside."""
+    segment_id: str
+    trajectory_id: str
+    vessel_id: Optional[str] = None
+    vessel_type: Optional[str] = None
+    entry_ts: datetime
+    exit_ts: datetime
+    num_points: int
 
 
+class AreaQueryResult(BaseModel):
+    visits: List[AreaVisit]
 
 
-def _build_trajectories() -> List[Trajectory]:
+class DensityGrid(BaseModel):
     """
-    Aggregate Segment -> Trajectory (internal structure) based on trajectory_id
+    Occupied cells of a regular lat/lon grid, as parallel columns.
+    Cell k spans lon[k]..lon[k] + resolution and lat[k]..lat[k] + resolution.
     """
-    segments = _get_all_segments()
-    by_traj: Dict[str, List[Segment]] = {}
+    resolution: float
+    lon: List[float]
+    lat: List[float]
+    count: List[int]
+    mean_sog: List[Optional[float]]
+
 
-    for seg in segments:
-        by_traj.setdefault(seg.trajectory_id, []).append(seg)
+def _wants_ndjson(request: Request, stream: bool) -> bool:
+    return stream or NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
 
-    trajectories: List[Trajectory] = []
 
-    for traj_id, segs in by_traj.items():
-        segs_sorted = sorted(segs, key=lambda s: s.start_time)
-        vessel_id = next((s.vessel_id for s in segs_sorted if s.vessel_id), None)
-        start_time = min(s.start_time for s in segs_sorted)
-        end_time = max(s.end_time for s in segs_sorted)
-        num_points = sum(len(s.points) for s in segs_sorted)
+def _wants_packed(request: Request, format: Optional[str]) -> bool:
+    if format is not None:
+        return format == "binary"
+    return PACKED_COORDS_MEDIA_TYPE in request.headers.get("accept", "")
 
-        trajectories.append(
-            Trajectory(
-                id=traj_id,
-                vessel_id=vessel_id,
-                segments=segs_sorted,
-                start_time=start_time,
-                end_time=end_time,
-                num_points=num_points,
-            )
+
+def _to_packed_trajectories(
+    dataset: TrajectoryDataset,
+    segment_idx: np.ndarray,
+    zoom: Optional[float] = None,
+) -> bytes:
+    """
+    Same selection as iter_map_trajectories, in the packed binary layout:
+    the header lists trajectories (id + number of segments, in order) and the
+    MapSegment fields of every segment, the body carries all coordinates.
+    """
+    trajectories: List[Dict[str, Any]] = []
+    segments: List[Dict[str, Any]] = []
+    rows: List[np.ndarray] = []
+
+    last_traj = -1
+    for i in segment_idx:
+        traj = dataset.segment_trajectory[i]
+        if traj != last_traj:
+            trajectories.append({"id": dataset.trajectories[traj].id, "segments": 0})
+            last_traj = traj
+
+        points = dataset.segment_points(i, zoom)
+        if isinstance(points, slice):
+            points = np.arange(points.start, points.stop)
+        if points.size == 0:
+            # Same rule as the JSON view: no empty polylines
+            continue
+        trajectories[-1]["segments"] += 1
+        seg = dataset.segments[i]
+        segments.append({"id": seg.id, **map_segment_fields(dataset, seg)})
+        rows.append(points)
+
+    offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([r.size for r in rows], dtype=np.int64)
+    rows_all = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+    return pack_coordinates(
+        {"trajectories": trajectories, "segments": segments},
+        dataset.point_lon[rows_all],
+        dataset.point_lat[rows_all],
+        offsets,
+    )
+
+
+def _fleet_snapshot(
+    dataset: TrajectoryDataset,
+    t: datetime,
+    segment_idx: np.ndarray,
+    bbox: Optional[BBox] = None,
+) -> Dict[str, Any]:
+    """
+    Positions at t of the vessels owning the given (active) segments, one per vessel.
+    """
+    segment_idx = segment_idx[np.diff(dataset.segment_offsets)[segment_idx] > 0]
+    if segment_idx.size:
+        # A vessel can have two active segments when t falls on a segment boundary
+        owner = np.where(
+            dataset.segment_vessel[segment_idx] != "",
+            dataset.segment_vessel[segment_idx],
+            [dataset.segments[i].trajectory_id for i in segment_idx],
+        )
+        _, first = np.unique(owner, return_index=True)
+        segment_idx = segment_idx[np.sort(first)]
+
+    columns = dataset.positions_at(to_epoch_seconds(t), segment_idx)
+    if bbox is not None:
+        min_lon, min_lat, max_lon, max_lat = bbox
+        inside = (
+            (columns["lon"] >= min_lon) & (columns["lon"] <= max_lon)
+            & (columns["lat"] >= min_lat) & (columns["lat"] <= max_lat)
         )
+        segment_idx = segment_idx[inside]
+        columns = {name: values[inside] for name, values in columns.items()}
+
+    positions: List[Dict[str, Any]] = []
+    rows = zip(
+        segment_idx.tolist(),
+        *(np.where(np.isnan(columns[name]), None, columns[name]).tolist() for name in ("lon", "lat", "sog", "cog")),
+    )
+    for i, lon, lat, sog, cog in rows:
+        seg = dataset.segments[i]
+        positions.append({
+            "vessel_id": seg.vessel_id,
+            "vessel_type": dataset.vessels.vessel_type(seg.vessel_id),
+            "trajectory_id": seg.trajectory_id,
+            "segment_id": seg.id,
+            "lon": lon,
+            "lat": lat,
+            "sog": sog,
+            "cog": cog,
+        })
+    return {"t": t, "positions": positions}
+
+
+def _parse_polygons(geometry: Dict[str, Any]) -> List[List[np.ndarray]]:
+    """
+    GeoJSON (Multi)Polygon or Feature -> list of polygons, each a list of (n, 2) rings.
+    """
+    if geometry.get("type") == "Feature":
+        geometry = geometry.get("geometry") or {}
+    kind = geometry.get("type")
+    if kind == "Polygon":
+        polygons = [geometry.get("coordinates")]
+    elif kind == "MultiPolygon":
+        polygons = geometry.get("coordinates")
+    else:
+        raise HTTPException(status_code=400, detail="geometry must be a GeoJSON Polygon or MultiPolygon")
+
+    try:
+        parsed = [[np.asarray(ring, dtype=np.float64)[:, :2] for ring in rings] for rings in polygons]
+    except (TypeError, ValueError, IndexError):
+        raise HTTPException(status_code=400, detail="Invalid polygon coordinates")
+    if not parsed or any(not rings or any(len(r) < 3 for r in rings) for rings in parsed):
+        raise HTTPException(status_code=400, detail="Every polygon ring needs at least 3 positions")
+    return parsed
+
 
-    trajectories.sort(key=lambda t: t.start_time)
-    return trajectories
+# ==========
+# Resampling
+# ==========
 
+# Upper bound on frames of one resampled trajectory (keeps step=1s on long tracks in check)
+MAX_RESAMPLE_FRAMES = 200_000
+_DURATION_UNITS = {"s": 1.0, "m": 60.0, "h": 3600.0}
 
-# A simple demo mapping: MMSI -> vessel_type
-VESSEL_TYPE_BY_MMSI: Dict[str, str] = {
-    "219000000": "Cargo",
-    "219000111": "Tanker",
-    "218999888": "Cargo",
-    "220123456": "Cargo",
-}
+# (data version, trajectory id, step) -> ResampledTrajectory payload
+_resample_cache: LRUCache[Dict[str, Any]] = LRUCache(maxsize=settings.RESAMPLE_CACHE_SIZE)
 
 
-def _to_map_trajectory(traj: Trajectory) -> MapTrajectory:
+def _parse_step(step: str) -> float:
     """
-    Internal Trajectory -> MapTrajectory for the frontend map
+    '30s' / '5m' / '1h' / '45' (seconds) -> seconds
     """
-    map_segments: List[MapSegment] = []
+    value, unit = (step[:-1], step[-1]) if step[-1:].lower() in _DURATION_UNITS else (step, "s")
+    try:
+        seconds = float(value) * _DURATION_UNITS[unit.lower()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="step must look like '30s', '5m', '1h' or a number of seconds")
+    if not seconds >= 1:
+        raise HTTPException(status_code=400, detail="step must be at least 1 second")
+    return seconds
 
-    for seg in traj.segments:
-        coordinates = [[p.lon, p.lat] for p in seg.points]
-        if not coordinates:
-            # Skip this segment if there are no points to avoid drawing empty polylines
+
+def _resample_trajectory(dataset: TrajectoryDataset, index: int, step: float) -> Dict[str, Any]:
+    """
+    Trajectory -> ResampledTrajectory payload (segments without points are skipped).
+    """
+    traj = dataset.trajectories[index]
+    segments: List[Dict[str, Any]] = []
+    for i in range(dataset.trajectory_offsets[index], dataset.trajectory_offsets[index + 1]):
+        frames = dataset.resample_segment(i, step)
+        if frames["t"].size == 0:
             continue
+        segments.append({
+            "id": dataset.segments[i].id,
+            "start_ts": datetime.fromtimestamp(frames["t"][0], tz=timezone.utc),
+            "coordinates": np.column_stack((frames["lon"], frames["lat"])),
+            "sog": frames["sog"],
+            "cog": frames["cog"],
+            "heading": frames["heading"],
+        })
+    return {"id": traj.id, "step": step, "segments": segments}
 
-        vessel_type = (
-            VESSEL_TYPE_BY_MMSI.get(seg.vessel_id)
-            if seg.vessel_id is not None
-            else None
-        )
 
-        map_segments.append(
-            MapSegment(
-                id=seg.id,
-                coordinates=coordinates,
-                summary=seg.short_description,
-                vessel_id=seg.vessel_id,
-                vessel_type=vessel_type,
-                start_ts=seg.start_time,
-                end_ts=seg.end_time,
-            )
-        )
+# ==========
+# Density
+# ==========
+
+# (data version, resolution, filters) -> DensityGrid payload
+_density_cache: LRUCache[Dict[str, Any]] = LRUCache(maxsize=settings.DENSITY_CACHE_SIZE)
+
+
+def _density_grid(
+    dataset: TrajectoryDataset,
+    resolution: float,
+    bbox: Optional[BBox] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    vessel_types: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Bin the points of the matching segments; bbox and time window also apply per point.
+    """
+    if bbox is None and start is None and end is None and not vessel_types:
+        rows = slice(None)
+    else:
+        segment_idx = dataset.query_segments(bbox=bbox, start=start, end=end, vessel_types=vessel_types)
+        rows = dataset.segment_rows(segment_idx)
+        mask = np.ones(rows.size, dtype=bool)
+        if bbox is not None:
+            min_lon, min_lat, max_lon, max_lat = bbox
+            lon, lat = dataset.point_lon[rows], dataset.point_lat[rows]
+            mask &= (lon >= min_lon) & (lon <= max_lon) & (lat >= min_lat) & (lat <= max_lat)
+        if start is not None:
+            mask &= dataset.point_time[rows] >= to_epoch_seconds(start)
+        if end is not None:
+            mask &= dataset.point_time[rows] <= to_epoch_seconds(end)
+        rows = rows[mask]
+
+    cells = grid_density(dataset.point_lon[rows], dataset.point_lat[rows], dataset.point_sog[rows], resolution)
+    return {"resolution": resolution, **cells}
+
+
+# ==========
+# Vector Tiles
+# ==========
+
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+TILE_LAYER_NAME = "trajectories"
+
+# (data version, z, x, y) -> encoded tile
+_tile_cache: LRUCache[bytes] = LRUCache(maxsize=settings.TILE_CACHE_SIZE)
+
 
-    return MapTrajectory(id=traj.id, segments=map_segments)
+def _build_segment_tile(dataset: TrajectoryDataset, z: int, x: int, y: int) -> bytes:
+    """
+    Cut, clip, quantise and encode all segments touching tile z/x/y.
+    Geometry uses the LOD level of the tile zoom before clipping.
+    """
+    n = 2 ** z
+    buffer = DEFAULT_BUFFER / DEFAULT_EXTENT
+    lons, lats = mercator_to_lonlat(
+        np.array([x - buffer, x + 1 + buffer]) / n,
+        np.array([y + 1 + buffer, y - buffer]) / n,
+    )
+
+    layer = LayerBuilder(TILE_LAYER_NAME, extent=DEFAULT_EXTENT)
+    for i in dataset.spatial_index.query((lons[0], lats[0], lons[1], lats[1])):
+        points = dataset.segment_points(i, z)
+        tile_x = (dataset.point_x[points] * n - x) * DEFAULT_EXTENT
+        tile_y = (dataset.point_y[points] * n - y) * DEFAULT_EXTENT
+        parts = clip_line(tile_x, tile_y, -DEFAULT_BUFFER, DEFAULT_EXTENT + DEFAULT_BUFFER)
+        if not parts:
+            continue
+
+        seg = dataset.segments[i]
+        layer.add_line(
+            parts,
+            {
+                "segment_id": seg.id,
+                "trajectory_id": seg.trajectory_id,
+                "vessel_id": seg.vessel_id,
+                "vessel_type": dataset.vessels.vessel_type(seg.vessel_id),
+                "imputed": seg.imputed,
+            },
+            feature_id=int(i) + 1,
+        )
+    return encode_tile([layer])
 
 
 # ==========
@@ -200,21 +385,238 @@ def _to_map_trajectory(traj: Trajectory) -> MapTrajectory:
 @router.get(
     "",
     response_model=List[MapTrajectory],
+    responses={200: {"content": {NDJSON_MEDIA_TYPE: {}, PACKED_COORDS_MEDIA_TYPE: {}}}},
     summary="List trajectories for map",
     description="Return trajectory data for the map: Trajectory → segments → coordinates.",
 )
-async def list_trajectories(
-    vessel_id: Optional[str] = Query(None, description="Filter by vessel_id (MMSI)"),
+def list_trajectories(
+    request: Request,
+    vessel_id: Optional[List[str]] = Query(None, description="Filter by vessel_id (MMSI), may be repeated"),
+    vessel_type: Optional[List[str]] = Query(None, description="Filter by vessel type (e.g. Cargo), may be repeated"),
+    bbox: Optional[str] = Query(None, description="Viewport as min_lon,min_lat,max_lon,max_lat"),
+    start: Optional[datetime] = Query(None, description="Only segments ending at or after this time"),
+    end: Optional[datetime] = Query(None, description="Only segments starting at or before this time"),
+    max_time_gap: Optional[float] = Query(
+        None, ge=0, description="Drop segments spanning more than this many seconds"
+    ),
+    zoom: Optional[float] = Query(None, ge=0, description="Map zoom; geometry is simplified to match it"),
+    stream: bool = Query(False, description="Stream one trajectory per line (NDJSON)"),
+    format: Optional[Literal["json", "binary"]] = Query(
+        None, description="'binary' returns packed int32 coordinates (application/octet-stream)"
+    ),
 ):
     """
-    Simple version: filter by vessel_id on the server side, other filtering logic is done on the frontend.
+    Only segments matching every given filter are returned; trajectories left without
+    segments are dropped. The bbox is answered from the spatial index and the time window
+    from the time index, so the payload scales with what is visible rather than with the
+    whole fleet.
+
+    With stream=true or `Accept: application/x-ndjson` the same trajectories are sent
+    as NDJSON while they are being built, instead of as one JSON array.
+    With format=binary or `Accept: application/octet-stream` coordinates are sent as
+    quantised, delta-encoded int32 arrays (see app.core.packed_coords).
     """
-    all_traj = _build_trajectories()
+    try:
+        parsed_bbox = parse_bbox(bbox) if bbox else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    dataset = trajectory_store.current()
+    segment_idx = dataset.query_segments(
+        bbox=parsed_bbox,
+        start=start,
+        end=end,
+        vessel_ids=vessel_id,
+        vessel_types=vessel_type,
+        max_time_gap=max_time_gap,
+    )
+    if _wants_packed(request, format):
+        return Response(
+            content=_to_packed_trajectories(dataset, segment_idx, zoom),
+            media_type=PACKED_COORDS_MEDIA_TYPE,
+        )
 
-    if vessel_id:
-        all_traj = [t for t in all_traj if t.vessel_id == vessel_id]
+    trajectories = iter_map_trajectories(dataset, segment_idx, zoom)
+    if _wants_ndjson(request, stream):
+        return NDJSONStreamingResponse(trajectories)
+    return NumpyJSONResponse(list(trajectories))
 
-    return [_to_map_trajectory(t) for t in all_traj]
+
+@router.get(
+    "/snapshot",
+    response_model=FleetSnapshot,
+    summary="Fleet snapshot",
+    description="Interpolated position of every vessel at time t, optionally limited to a viewport.",
+)
+def get_fleet_snapshot(
+    t: datetime = Query(..., description="Snapshot time"),
+    bbox: Optional[str] = Query(None, description="Viewport as min_lon,min_lat,max_lon,max_lat"),
+    vessel_id: Optional[List[str]] = Query(None, description="Filter by vessel_id (MMSI), may be repeated"),
+    vessel_type: Optional[List[str]] = Query(None, description="Filter by vessel type (e.g. Cargo), may be repeated"),
+):
+    """
+    Active segments come from the time index; each one is bisected for the fixes around t
+    and interpolated, all segments at once.
+    """
+    dataset = trajectory_store.current()
+    try:
+        parsed_bbox = parse_bbox(bbox) if bbox else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    segment_idx = dataset.query_segments(
+        bbox=parsed_bbox,
+        start=t,
+        end=t,
+        vessel_ids=vessel_id,
+        vessel_types=vessel_type,
+    )
+    return NumpyJSONResponse(_fleet_snapshot(dataset, t, segment_idx, parsed_bbox))
+
+
+@router.post(
+    "/query",
+    response_model=AreaQueryResult,
+    summary="Vessels inside an area",
+    description="Segments with fixes inside a GeoJSON polygon during a time window, with entry/exit times.",
+)
+def query_area(query: AreaQuery):
+    """
+    Candidates come from the spatial index (polygon envelope) and the time index; only
+    their fixes are tested against the polygon. Every run of consecutive fixes inside
+    is reported as one visit.
+    """
+    polygons = _parse_polygons(query.geometry)
+    exteriors = np.vstack([rings[0] for rings in polygons])
+    envelope = (*exteriors.min(axis=0).tolist(), *exteriors.max(axis=0).tolist())
+
+    dataset = trajectory_store.current()
+    segment_idx = dataset.query_segments(
+        bbox=envelope,
+        start=query.start,
+        end=query.end,
+        vessel_ids=query.vessel_id,
+        vessel_types=query.vessel_type,
+    )
+    visits = dataset.polygon_visits(
+        segment_idx,
+        polygons,
+        start=to_epoch_seconds(query.start) if query.start is not None else None,
+        end=to_epoch_seconds(query.end) if query.end is not None else None,
+    )
+
+    result: List[Dict[str, Any]] = []
+    rows = zip(
+        visits["segment"].tolist(),
+        dataset.point_time[visits["entry"]].tolist(),
+        dataset.point_time[visits["exit"]].tolist(),
+        visits["num_points"].tolist(),
+    )
+    for i, entry, exit_, num_points in rows:
+        seg = dataset.segments[i]
+        result.append({
+            "segment_id": seg.id,
+            "trajectory_id": seg.trajectory_id,
+            "vessel_id": seg.vessel_id,
+            "vessel_type": dataset.vessels.vessel_type(seg.vessel_id),
+            "entry_ts": datetime.fromtimestamp(entry, tz=timezone.utc),
+            "exit_ts": datetime.fromtimestamp(exit_, tz=timezone.utc),
+            "num_points": num_points,
+        })
+    return NumpyJSONResponse({"visits": result})
+
+
+@router.get(
+    "/density",
+    response_model=DensityGrid,
+    summary="Traffic density grid",
+    description="AIS point counts and mean SOG per lat/lon grid cell.",
+)
+def get_density(
+    resolution: float = Query(0.1, ge=0.001, le=10, description="Cell size in degrees"),
+    bbox: Optional[str] = Query(None, description="Viewport as min_lon,min_lat,max_lon,max_lat"),
+    start: Optional[datetime] = Query(None, description="Only points at or after this time"),
+    end: Optional[datetime] = Query(None, description="Only points at or before this time"),
+    vessel_type: Optional[List[str]] = Query(None, description="Filter by vessel type (e.g. Cargo), may be repeated"),
+):
+    """
+    Replaces drawing every polyline at low zoom. Grids are cached per data version and
+    query, so panning back and forth or several clients asking the same are served from memory.
+    """
+    dataset = trajectory_store.current()
+    try:
+        parsed_bbox = parse_bbox(bbox) if bbox else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    key = (
+        dataset.version, resolution, parsed_bbox, start, end,
+        tuple(sorted(vessel_type)) if vessel_type else None,
+    )
+    payload = _density_cache.get_or_compute(
+        key, lambda: _density_grid(dataset, resolution, parsed_bbox, start, end, vessel_type)
+    )
+    return NumpyJSONResponse(payload)
+
+
+@router.get(
+    "/tiles/{z}/{x}/{y}.mvt",
+    response_class=Response,
+    responses={200: {"content": {MVT_MEDIA_TYPE: {}}}},
+    summary="Trajectory vector tile",
+    description="Segments clipped to one XYZ tile, encoded as a Mapbox Vector Tile (layer 'trajectories').",
+)
+def get_trajectory_tile(
+    request: Request,
+    z: int = Path(..., ge=0, le=24),
+    x: int = Path(..., ge=0),
+    y: int = Path(..., ge=0),
+):
+    """
+    Tiles are cached per data version; the ETag lets the browser revalidate cheaply.
+    """
+    if x >= 2 ** z or y >= 2 ** z:
+        raise HTTPException(status_code=404, detail="Tile out of range")
+
+    dataset = trajectory_store.current()
+    headers = {
+        "ETag": f'"{dataset.version}-{z}-{x}-{y}"',
+        "Cache-Control": "public, max-age=300",
+    }
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+
+    tile = _tile_cache.get_or_compute(
+        (dataset.version, z, x, y), lambda: _build_segment_tile(dataset, z, x, y)
+    )
+    return Response(content=tile, media_type=MVT_MEDIA_TYPE, headers=headers)
+
+
+@router.get(
+    "/{trajectory_id}/resample",
+    response_model=ResampledTrajectory,
+    summary="Resample trajectory for playback",
+    description="Every segment of the trajectory interpolated on a uniform time grid.",
+)
+def resample_trajectory(
+    trajectory_id: str,
+    step: str = Query("30s", description="Frame interval, e.g. 30s, 5m, 1h"),
+):
+    """
+    Results are cached per (data version, trajectory, step).
+    """
+    seconds = _parse_step(step)
+    dataset = trajectory_store.current()
+    index = dataset.trajectory_index.get(trajectory_id)
+    if index is None:
+        raise HTTPException(status_code=404, detail="Trajectory not found")
+
+    lo, hi = dataset.trajectory_offsets[index], dataset.trajectory_offsets[index + 1]
+    frames = np.nansum((dataset.segment_end[lo:hi] - dataset.segment_start[lo:hi]) // seconds + 1)
+    if frames > MAX_RESAMPLE_FRAMES:
+        raise HTTPException(status_code=400, detail=f"step too small: more than {MAX_RESAMPLE_FRAMES} frames")
+
+    payload = _resample_cache.get_or_compute(
+        (dataset.version, trajectory_id, seconds), lambda: _resample_trajectory(dataset, index, seconds)
+    )
+    return NumpyJSONResponse(payload)
 
 
 @router.get(
@@ -223,8 +625,13 @@ async def list_trajectories(
     summary="Get single trajectory for map",
     description="Return a single trajectory (map view).",
 )
-async def get_trajectory(trajectory_id: str):
-    for traj in _build_trajectories():
-        if traj.id == trajectory_id:
-            return _to_map_trajectory(traj)
-    raise HTTPException(status_code=404, detail="Trajectory not found")
+async def get_trajectory(
+    trajectory_id: str,
+    zoom: Optional[float] = Query(None, ge=0, description="Map zoom; geometry is simplified to match it"),
+):
+    dataset = trajectory_store.current()
+    index = dataset.trajectory_index.get(trajectory_id)
+    if index is None:
+        raise HTTPException(status_code=404, detail="Trajectory not found")
+    segment_idx = range(dataset.trajectory_offsets[index], dataset.trajectory_offsets[index + 1])
+    return NumpyJSONResponse(to_map_trajectory(dataset, dataset.trajectories[index], segment_idx, zoom))
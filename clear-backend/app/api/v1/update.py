@@ -6,16 +6,21 @@ import uuid
 import logging
 import argparse
 import pandas as pd
-from typing import Dict, Optional, List, Any, Set, Tuple
+from typing import Dict, Optional, List, Set, Tuple
 from datetime import datetime
 from pathlib import Path
-from collections import deque, defaultdict
+from collections import defaultdict
 from concurrent.futures import ThreadPoolExecutor
 
 from fastapi import APIRouter, HTTPException, BackgroundTasks
 from pydantic import BaseModel, Field
 from pathlib import Path
 
+from app.core.node_store import NodePackWriter
+from app.core.sdkg_graph import SDKGGraph, node_index_fields
+from app.core.segments_bin import write_segments_bin
+from app.core.trajectory_store import parse_segments
+
 
 current_dir = Path(__file__).parent
 project_root = current_dir.parent.parent.parent
@@ -208,6 +213,7 @@ def _convert_csv_to_segments(task_id: str, request_data: Dict):
             raise ValueError(f"Unknown dataset: {dataset}")
         
         output_path = f"{project_root}/data/segments.json"
+        binary_output_path = f"{project_root}/data/segments.bin"
         
         # Read CSV file
         _update_task_progress(task_id, 10, "running", "Read CSV file")
@@ -266,6 +272,8 @@ def _convert_csv_to_segments(task_id: str, request_data: Dict):
                 "id": f"TRJ_{seq_id}_SEG_{seg_id}",
                 "trajectory_id": f"TRJ_{seq_id}",
                 "vessel_id": str(mmsi),
+                # vessel attribute table of the trajectory store is built from this
+                "vessel_type": str(first_row['ship_type']) if pd.notna(first_row.get('ship_type')) else None,
                 "start_time": group.iloc[0]['timestamp'].replace(' ', 'T') + 'Z',
                 "end_time": group.iloc[-1]['timestamp'].replace(' ', 'T') + 'Z',
                 "short_description": f"{ship_type} vessel {mmsi} trajectory segment",
@@ -277,182 +285,26 @@ def _convert_csv_to_segments(task_id: str, request_data: Dict):
         output_dir = Path(output_path).parent
         output_dir.mkdir(parents=True, exist_ok=True)
         
-        with open(output_path, 'w', encoding='utf-8') as f:
+        # write to a temp file and swap it in, so the running trajectory store
+        # (which reloads on mtime change) never sees a half-written file
+        tmp_output_path = f"{output_path}.tmp"
+        with open(tmp_output_path, 'w', encoding='utf-8') as f:
             json.dump(segments_data, f, indent=2, ensure_ascii=False)
-        
+        os.replace(tmp_output_path, output_path)
+
+        # columnar copy for the trajectory store (memory-mapped instead of parsed);
+        # written after the JSON so the store sees it as the newer file
+        _update_task_progress(task_id, 28, "running", "Write binary trajectory file")
+        segments, points = parse_segments(segments_data)
+        write_segments_bin(binary_output_path, segments, points)
+
         _update_task_progress(task_id, 30, "running", "CSV conversion completed")
         return True, f"Conversion Complete: {len(segments_data)} segmengts"
         
     except Exception as e:
         return False, f"CSV conversion failed: {str(e)}"
 
-# ============ Second Step: Build Subgraphs ============
-def _build_multi_level_graph(center_node_id: str, index_data: Dict, max_level: int = 3) -> Dict[str, Any]:
-    """Build a multi-level relational subgraph"""
-    visited_nodes = set([center_node_id])
-    visited_links = set()
-    nodes = []
-    links = []
-    
-    center_node_info = next((n for n in index_data["nodes"] if n["id"] == center_node_id), None)
-    if center_node_info:
-        nodes.append({**center_node_info, "level": 0, "isCenter": True})
-    
-    queue = deque([(center_node_id, 0)])
-    while queue:
-        current_id, level = queue.popleft()
-        if level >= max_level:
-            continue
-        
-        connected_links = [link for link in index_data["links"] 
-                          if link["source"] == current_id or link["target"] == current_id]
-        
-        for link in connected_links:
-            link_key = tuple(sorted([link["source"], link["target"]]))
-            if link_key in visited_links:
-                continue
-                
-            visited_links.add(link_key)
-            links.append({**link, "level": level + 1})
-            
-            other_node_id = link["target"] if link["source"] == current_id else link["source"]
-            if other_node_id not in visited_nodes:
-                visited_nodes.add(other_node_id)
-                next_level = level + 1
-                
-                node_info = next((n for n in index_data["nodes"] if n["id"] == other_node_id), None)
-                if node_info:
-                    nodes.append({**node_info, "level": next_level, "isCenter": False})
-                    if next_level < max_level:
-                        queue.append((other_node_id, next_level))
-    
-    return {
-        "nodes": nodes,
-        "links": links,
-        "allNodeIds": list(visited_nodes),
-        "centerNodeId": center_node_id,
-        "maxLevel": max_level,
-        "totalNodes": len(nodes),
-        "totalLinks": len(links)
-    }
-
-def _generate_subgraphs(task_id: str, request_data: Dict):
-    """Generate subgraphs for all nodes"""
-    try:
-        _update_task_progress(task_id, 75, "running", "Start generating subgraph")
-        
-        dataset = request_data.get("dataset", "demo-dk")
-        
-        if dataset == "demo-dk" or dataset == "custom-dk":
-            input_file = f"{project_root}/data/sdkg_index.json"
-        elif dataset == "demo-us" or dataset == "custom-us":
-            input_file = f"{project_root}/data/sdkg_index.json"
-        else:
-            input_file = f"{project_root}/data/sdkg_index.json"
-
-        output_base_dir = f"{project_root}/data"
-        max_level = 1
-        
-        # read index file
-        if not os.path.exists(input_file):
-            return False, f"SDKG index file does not exist: {input_file}"
-        
-        with open(input_file, 'r', encoding='utf-8') as f:
-            index_data = json.load(f)
-        
-        # Create subgraph directory
-        subgraph_dir = os.path.join(output_base_dir, "subgraph")
-        os.makedirs(subgraph_dir, exist_ok=True)
-        
-        # Checkpoint file
-        checkpoint_file = os.path.join(output_base_dir, "subgraph_checkpoint.json")
-        
-        # # Load checkpoint
-        processed_nodes = set()
-        if os.path.exists(checkpoint_file):
-            try:
-                with open(checkpoint_file, 'r', encoding='utf-8') as f:
-                    checkpoint_data = json.load(f)
-                processed_nodes = set(checkpoint_data.get("processed_nodes", []))
-            except:
-                pass
-        
-        # Load checkpoint & Get all nodes
-        all_nodes = index_data["nodes"]
-        remaining_nodes = [node for node in all_nodes if node["id"] not in processed_nodes]
-        
-        _update_task_progress(task_id, 80, "running", f"Handle {len(remaining_nodes)} nodes")
-        
-        # handle nodes
-        successful_nodes = []
-        failed_nodes = []
-        total_remaining = len(remaining_nodes)
-        
-        for i, node in enumerate(remaining_nodes, 1):
-            node_id = node["id"]
-            
-            try:
-                subgraph_data = _build_multi_level_graph(node_id, index_data, max_level)
-                output_file = os.path.join(subgraph_dir, f"{node_id}.json")
-                
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    json.dump(subgraph_data, f, ensure_ascii=False, indent=2)
-                
-                successful_nodes.append(node_id)
-            except Exception as e:
-                failed_nodes.append((node_id, str(e)))
-            
-            # update progress
-            if total_remaining > 0:
-                progress = 40 + (i / total_remaining * 20)  
-                _update_task_progress(task_id, min(60, progress), "running", 
-                                     f"generate subgraph: {i}/{total_remaining}")
-        
-        # save checkpoints
-        all_processed = list(processed_nodes) + successful_nodes
-        checkpoint_data = {
-            "timestamp": datetime.now().isoformat(),
-            "processed_nodes": all_processed,
-            "failed_nodes": [{"node_id": node_id, "error": error} for node_id, error in failed_nodes],
-            "total_processed": len(all_processed) + len(failed_nodes)
-        }
-        
-        with open(checkpoint_file, 'w', encoding='utf-8') as f:
-            json.dump(checkpoint_data, f, ensure_ascii=False, indent=2)
-        
-        # generate subgraph index
-        _update_task_progress(task_id,85, "running", "generate subgraph index")
-        subgraph_index_data = {
-            "generatedAt": datetime.now().isoformat(),
-            "totalNodes": len(all_nodes),
-            "subgraphs": []
-        }
-        
-        for node in all_nodes:
-            node_id = node["id"]
-            subgraph_file = f"{node_id}.json"
-            file_path = os.path.join(subgraph_dir, subgraph_file)
-            
-            if os.path.exists(file_path):
-                subgraph_index_data["subgraphs"].append({
-                    "nodeId": node_id,
-                    "nodeLabel": node.get("label", ""),
-                    "nodeType": node.get("type", ""),
-                    "filePath": f"subgraph/{subgraph_file}"
-                })
-        
-        index_file = os.path.join(output_base_dir, "subgraphs_index.json")
-        with open(index_file, 'w', encoding='utf-8') as f:
-            json.dump(subgraph_index_data, f, ensure_ascii=False, indent=2)
-        
-        _update_task_progress(task_id, 100, "done", "Subgraph generation completed")
-        return True, f"Subgraph generation completed: {len(successful_nodes)} successful, {len(failed_nodes)} failed"
-        
-    except Exception as e:
-        return False, f"Subgraph generation failed: {str(e)}"
-    
-    
-# ============ Step 3: Convert SDKG into a knowledge graph ============
+# ============ Step 2: Convert SDKG into a knowledge graph ============
 def _extract_main_description(text):
     """Extract the main content before the parentheses from the text"""
     if not isinstance(text, str):
@@ -632,8 +484,7 @@ def _convert_sdkg_to_kg(task_id: str, request_data: Dict):
         
         # create output directories
         output_path = Path(output_dir)
-        nodes_dir = output_path / "nodes"
-        nodes_dir.mkdir(parents=True, exist_ok=True)
+        output_path.mkdir(parents=True, exist_ok=True)
         
         # start building knowledge graph
         _update_task_progress(task_id, 47, "running", "start building knowledge graph")
@@ -976,13 +827,12 @@ def _convert_sdkg_to_kg(task_id: str, request_data: Dict):
                             "relation": "has_attribute"
                         })
         
-        # 8. Save node files
+        # 8. Save node files: one packed store instead of a JSON file per node
         _update_task_progress(task_id, 55, "running", "saving node files")
         print("Saving node files...")
-        for node_id, node_info in all_nodes.items():
-            node_file = nodes_dir / f"{node_id}.json"
-            with open(node_file, 'w', encoding='utf-8') as f:
-                json.dump(node_info, f, indent=2, ensure_ascii=False)
+        with NodePackWriter(str(output_path / "nodes.pack")) as node_pack:
+            for node_id, node_info in all_nodes.items():
+                node_pack.add(node_id, node_info)
         
         # 9. Create index file
         _update_task_progress(task_id, 57, "running", "create index file")
@@ -992,7 +842,9 @@ def _convert_sdkg_to_kg(task_id: str, request_data: Dict):
                 {
                     "id": node_info["id"],
                     "type": node_info["type"],
-                    "label": node_info["label"]
+                    "label": node_info["label"],
+                    # Summary and ranking fields for the API's resident graph
+                    **node_index_fields(node_info),
                 }
                 for node_info in all_nodes.values()
             ],
@@ -1002,6 +854,8 @@ def _convert_sdkg_to_kg(task_id: str, request_data: Dict):
         index_file = output_path / "sdkg_index.json"
         with open(index_file, 'w', encoding='utf-8') as f:
             json.dump(index_data, f, indent=2, ensure_ascii=False)
+        # Binary snapshot for the API's resident graph; written after the JSON so it is newer
+        SDKGGraph.from_index("snapshot", index_data).save_snapshot(str(output_path / "sdkg_index.npz"))
         
         # 10. Output statistics
         node_types = defaultdict(int)
@@ -1049,11 +903,6 @@ def _run_update_task(task_id: str, request_data: Dict):
             _update_task_progress(task_id, 0, "error", message3)
             return
         
-        # steps 3: generate subgraphs
-        success2, message2 = _generate_subgraphs(task_id, request_data)
-        if not success2:
-            _update_task_progress(task_id, 0, "error", message2)
-            return
         _update_task_progress(task_id, 100, "done", "CLEAR content update completed")
         # save tasks result
         task = _get_task(task_id)
@@ -1063,9 +912,10 @@ def _run_update_task(task_id: str, request_data: Dict):
                 "message": "CLEAR content update completed",
                 "output_files": [
                     f"{project_root}/data/segments.json",
-                    f"{project_root}/data/subgraph/",
+                    f"{project_root}/data/segments.bin",
                     f"{project_root}/data/sdkg_index.json",
-                    f"{project_root}/data/nodes/"
+                    f"{project_root}/data/sdkg_index.npz",
+                    f"{project_root}/data/nodes.pack"
                 ]
             }
             _save_task(task_id, task)
@@ -0,0 +1,37 @@
+# app/api/v1/vessel.py
+from __future__ import annotations
+
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from app.api.v1.trajectory import MapTrajectory
+from app.core.map_view import iter_map_trajectories
+from app.core.responses import NumpyJSONResponse
+from app.core.trajectory_store import trajectory_store
+
+router = APIRouter(prefix="/vessels", tags=["vessels"])
+
+
+# ==========
+# API
+# ==========
+
+@router.get(
+    "/{mmsi}/trajectories",
+    response_model=List[MapTrajectory],
+    summary="List trajectories of one vessel",
+    description="Return all trajectories of a vessel (MMSI) in the map format of /trajectories.",
+)
+async def list_vessel_trajectories(
+    mmsi: str,
+    zoom: Optional[float] = Query(None, ge=0, description="Map zoom; geometry is simplified to match it"),
+):
+    """
+    Answered from the dataset's MMSI index, independent of fleet size.
+    """
+    dataset = trajectory_store.current()
+    segment_idx = dataset.vessel_segments.get(mmsi)
+    if segment_idx is None:
+        raise HTTPException(status_code=404, detail="Vessel not found")
+    return NumpyJSONResponse(list(iter_map_trajectories(dataset, segment_idx, zoom)))
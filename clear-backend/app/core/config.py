@@ -12,9 +12,35 @@ class Settings(BaseSettings):
     ]
 
     SEGMENTS_JSON_PATH: str = "./data/segments.json"
+    # Memory-mapped columnar copy of segments.json written by the update pipeline
+    SEGMENTS_BIN_PATH: str = "./data/segments.bin"
     SDKG_INDEX_JSON_PATH: str = "./data/sdkg_index.json"
+    # Binary snapshot of the SD-KG graph written by the update pipeline
+    SDKG_GRAPH_SNAPSHOT_PATH: str = "./data/sdkg_index.npz"
+    # Per-node JSON files of data written before the pipeline packed its nodes
     SDKG_NODES_DIR: str = "./data/nodes"
-    SUBGRAPH_DIR: str = "./data/subgraph"
+    # Packed node store (one file + id index) written by the update pipeline
+    SDKG_NODES_PACK_PATH: str = "./data/nodes.pack"
+
+    # Number of encoded vector tiles kept in memory
+    TILE_CACHE_SIZE: int = 4096
+    # Number of resampled trajectories kept in memory
+    RESAMPLE_CACHE_SIZE: int = 256
+    # Number of density grids kept in memory
+    DENSITY_CACHE_SIZE: int = 64
+    # Number of SD-KG keyword search results kept in memory
+    SDKG_SEARCH_CACHE_SIZE: int = 256
+    # Number of SD-KG node details kept in memory
+    SDKG_NODE_CACHE_SIZE: int = 4096
+    # Number of SD-KG subgraphs kept in memory
+    SDKG_SUBGRAPH_CACHE_SIZE: int = 512
+    # Shortest interval between two fixes of a segment that counts as an AIS gap (seconds)
+    GAP_MIN_SECONDS: float = 600
+    # Encounter detection: worker processes (0 = one per CPU) and cached result sets
+    ENCOUNTER_WORKERS: int = 0
+    ENCOUNTER_CACHE_SIZE: int = 8
+    # Compute the default encounter set in the background at startup
+    ENCOUNTER_PRECOMPUTE: bool = True
 
     class Config:
         env_file = ".env"
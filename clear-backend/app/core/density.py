@@ -0,0 +1,34 @@
+# app/core/density.py
+from __future__ import annotations
+
+import math
+from typing import Dict
+
+import numpy as np
+
+
+def grid_density(lon: np.ndarray, lat: np.ndarray, sog: np.ndarray, resolution: float) -> Dict[str, np.ndarray]:
+    """
+    Bin points into a regular lat/lon grid of `resolution` degrees, aligned to (-180, -90)
+    so cells of different queries line up. Only occupied cells are returned, as columns:
+    lon/lat (south-west corner), count, and mean_sog (NaN if no point had a SOG).
+    """
+    n_cols = int(math.ceil(360.0 / resolution))
+    n_rows = int(math.ceil(180.0 / resolution))
+    col = np.clip(np.floor((lon + 180.0) / resolution).astype(np.int64), 0, n_cols - 1)
+    row = np.clip(np.floor((lat + 90.0) / resolution).astype(np.int64), 0, n_rows - 1)
+
+    cells, inverse, count = np.unique(row * n_cols + col, return_inverse=True, return_counts=True)
+    has_sog = ~np.isnan(sog)
+    sog_sum = np.bincount(inverse[has_sog], weights=sog[has_sog], minlength=cells.size)
+    sog_count = np.bincount(inverse[has_sog], minlength=cells.size)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_sog = np.where(sog_count > 0, sog_sum / sog_count, np.nan)
+
+    return {
+        # Rounded so corners print as e.g. 10.4 rather than 10.400000000000006
+        "lon": np.round((cells % n_cols) * resolution - 180.0, 9),
+        "lat": np.round((cells // n_cols) * resolution - 90.0, 9),
+        "count": count,
+        "mean_sog": mean_sog,
+    }
@@ -0,0 +1,283 @@
+# app/core/encounters.py
+"""
+Vessel encounter detection: pairs of vessels closer than a distance threshold.
+
+1. Time alignment: every segment is sampled on a fleet-wide grid (multiples of `step`
+   seconds) between its first and last fix.
+2. Per time bucket, samples are hashed into lat/lon cells at least `distance` wide; only
+   samples in the same or neighbouring cells are compared (haversine).
+3. Close samples of the same vessel pair in consecutive buckets form one encounter,
+   reported with its closest observed distance and the CPA/TCPA predicted from SOG/COG
+   at that moment.
+Step 2 dominates and runs per time shard, in a process pool when there is enough work.
+"""
+from __future__ import annotations
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.geometry import EARTH_RADIUS_M, haversine_m
+from app.core.trajectory_store import TrajectoryDataset
+
+KNOT_M_S = 1852.0 / 3600.0
+
+DEFAULT_DISTANCE_M = 1000.0
+DEFAULT_STEP_S = 60.0
+# Time span handled by one worker task
+SHARD_SECONDS = 6 * 3600
+# Below this many samples the pool costs more than it saves
+MIN_SAMPLES_FOR_POOL = 200_000
+
+# Cells checked around a sample's own cell; the other half is covered from the neighbour's side
+_HALF_NEIGHBOURHOOD = ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1))
+
+
+# ==========
+# Close Pairs (worker side)
+# ==========
+
+def find_close_pairs(
+    bucket: np.ndarray,
+    vessel: np.ndarray,
+    lon: np.ndarray,
+    lat: np.ndarray,
+    distance: float,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Sample pairs (i, j) in the same time bucket, of different vessels, at most `distance`
+    metres apart. Returns i, j and their distances. Runs in worker processes, so it only
+    takes plain arrays.
+    """
+    empty = np.zeros(0, dtype=np.int64)
+    if bucket.size < 2:
+        return empty, empty, np.zeros(0)
+
+    # Cell sizes in degrees: never narrower than `distance` anywhere in this shard
+    cell_lat = math.degrees(distance / EARTH_RADIUS_M)
+    max_abs_lat = min(float(np.abs(lat).max()), 89.0)
+    cell_lon = cell_lat / max(math.cos(math.radians(max_abs_lat)), 0.01)
+    n_x = int(math.ceil(360.0 / cell_lon)) + 2
+    n_y = int(math.ceil(180.0 / cell_lat)) + 2
+    cx = np.floor((lon + 180.0) / cell_lon).astype(np.int64) + 1
+    cy = np.floor((lat + 90.0) / cell_lat).astype(np.int64) + 1
+    b = bucket - bucket.min()
+
+    def key(dx: int, dy: int) -> np.ndarray:
+        return (b * n_x + cx + dx) * n_y + cy + dy
+
+    order = np.argsort(key(0, 0), kind="stable")
+    sorted_keys = key(0, 0)[order]
+    position = np.empty(order.size, dtype=np.int64)
+    position[order] = np.arange(order.size)
+
+    pairs_i: List[np.ndarray] = []
+    pairs_j: List[np.ndarray] = []
+    for dx, dy in _HALF_NEIGHBOURHOOD:
+        target = key(dx, dy)
+        if dx == 0 and dy == 0:
+            # Own cell: only later samples, so each pair is produced once
+            left = position + 1
+        else:
+            left = np.searchsorted(sorted_keys, target, side="left")
+        right = np.searchsorted(sorted_keys, target, side="right")
+        counts = np.maximum(right - left, 0)
+        total = int(counts.sum())
+        if total == 0:
+            continue
+        first = np.cumsum(counts) - counts
+        pairs_i.append(np.repeat(np.arange(order.size), counts))
+        pairs_j.append(order[np.arange(total) - np.repeat(first - left, counts)])
+
+    if not pairs_i:
+        return empty, empty, np.zeros(0)
+    i, j = np.concatenate(pairs_i), np.concatenate(pairs_j)
+    i, j = i[vessel[i] != vessel[j]], j[vessel[i] != vessel[j]]
+    d = haversine_m(lon[i], lat[i], lon[j], lat[j])
+    close = d <= distance
+    return i[close], j[close], d[close]
+
+
+# ==========
+# Sampling (dataset side)
+# ==========
+
+def _vessel_codes(dataset: TrajectoryDataset) -> np.ndarray:
+    """One integer identity per segment: its MMSI, or its trajectory if there is none."""
+    identity = [
+        vessel or f"trajectory:{seg.trajectory_id}"
+        for vessel, seg in zip(dataset.segment_vessel.tolist(), dataset.segments)
+    ]
+    if not identity:
+        return np.zeros(0, dtype=np.int64)
+    return np.unique(np.array(identity, dtype=object), return_inverse=True)[1].astype(np.int64)
+
+
+def _shard_samples(
+    dataset: TrajectoryDataset, t0: float, t1: float, step: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Grid samples of all segments active in [t0, t1): bucket numbers (time = bucket * step),
+    segment indices and point-column positions.
+    """
+    segment_idx = dataset.time_index.overlapping(t0, t1)
+    segment_idx = segment_idx[np.diff(dataset.segment_offsets)[segment_idx] > 0]
+    first_fix = dataset.point_time[dataset.segment_offsets[segment_idx]]
+    last_fix = dataset.point_time[dataset.segment_offsets[segment_idx + 1] - 1]
+
+    k_lo = np.maximum(np.ceil(first_fix / step), math.ceil(t0 / step)).astype(np.int64)
+    k_hi = np.minimum(np.floor(last_fix / step), math.ceil(t1 / step) - 1).astype(np.int64)
+    counts = np.maximum(k_hi - k_lo + 1, 0)
+    first = np.cumsum(counts) - counts
+    bucket = np.arange(int(counts.sum()), dtype=np.int64) + np.repeat(k_lo - first, counts)
+    owner = np.repeat(segment_idx, counts)
+    return bucket, owner, bucket * step
+
+
+def _iter_shards(dataset: TrajectoryDataset, step: float) -> Iterator[Tuple[float, float]]:
+    if not len(dataset.segments):
+        return
+    shard = max(SHARD_SECONDS // step, 1) * step
+    start = math.floor(np.nanmin(dataset.segment_start) / shard) * shard
+    end = np.nanmax(dataset.segment_end)
+    while start <= end:
+        yield start, start + shard
+        start += shard
+
+
+# ==========
+# Encounters
+# ==========
+
+def _velocity(sog: np.ndarray, cog: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """SOG (kn) / COG (deg) -> east / north velocity in m/s."""
+    speed = sog * KNOT_M_S
+    return speed * np.sin(np.radians(cog)), speed * np.cos(np.radians(cog))
+
+
+def _cpa(
+    lon_a: np.ndarray, lat_a: np.ndarray, sog_a: np.ndarray, cog_a: np.ndarray,
+    lon_b: np.ndarray, lat_b: np.ndarray, sog_b: np.ndarray, cog_b: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Closest point of approach assuming both vessels keep course and speed:
+    (distance in m, time in s from now; 0 when they are not closing or not moving).
+    Both are NaN when SOG or COG of either vessel is unknown.
+    """
+    # Local east/north plane around vessel a
+    px = np.radians(lon_b - lon_a) * EARTH_RADIUS_M * np.cos(np.radians(lat_a))
+    py = np.radians(lat_b - lat_a) * EARTH_RADIUS_M
+    vax, vay = _velocity(sog_a, cog_a)
+    vbx, vby = _velocity(sog_b, cog_b)
+    vx, vy = vbx - vax, vby - vay
+    speed_sq = vx * vx + vy * vy
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # NaN > 0 is False: check unknown kinematics first so they do not read as "not moving"
+        tcpa = np.where(
+            np.isnan(speed_sq), np.nan, np.where(speed_sq > 0, -(px * vx + py * vy) / speed_sq, 0.0)
+        )
+    tcpa = np.maximum(tcpa, 0.0)
+    return np.hypot(px + vx * tcpa, py + vy * tcpa), tcpa
+
+
+def compute_encounters(
+    dataset: TrajectoryDataset,
+    distance: float = DEFAULT_DISTANCE_M,
+    step: float = DEFAULT_STEP_S,
+    workers: Optional[int] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    All encounters of the dataset as columns (sorted by start time):
+    segment_a / segment_b (segments at the closest moment, a < b by vessel),
+    start / end / closest (POSIX s), min_distance (m, on the time grid),
+    cpa_distance (m) and tcpa (s after `closest`).
+    """
+    vessel_of_segment = _vessel_codes(dataset)
+    workers = workers or os.cpu_count() or 1
+
+    shards = []
+    for t0, t1 in _iter_shards(dataset, step):
+        bucket, owner, t = _shard_samples(dataset, t0, t1, step)
+        if bucket.size >= 2:
+            columns = dataset.positions_at_times(owner, t)
+            shards.append((bucket, owner, t, columns))
+
+    total = sum(shard[0].size for shard in shards)
+    args = [
+        (bucket, vessel_of_segment[owner], columns["lon"], columns["lat"], distance)
+        for bucket, owner, _, columns in shards
+    ]
+    if workers > 1 and len(shards) > 1 and total >= MIN_SAMPLES_FOR_POOL:
+        with ProcessPoolExecutor(max_workers=min(workers, len(shards))) as pool:
+            results = list(pool.map(find_close_pairs, *zip(*args)))
+    else:
+        results = [find_close_pairs(*a) for a in args]
+
+    # Close samples of all shards, oriented so that vessel a < vessel b
+    parts: Dict[str, List[np.ndarray]] = {
+        name: [] for name in ("seg_a", "seg_b", "t", "d", "a", "b", "shard")
+    }
+    for n, ((i, j, d), (_, owner, t, _)) in enumerate(zip(results, shards)):
+        swap = vessel_of_segment[owner[i]] > vessel_of_segment[owner[j]]
+        a, b = np.where(swap, j, i), np.where(swap, i, j)
+        parts["seg_a"].append(owner[a])
+        parts["seg_b"].append(owner[b])
+        parts["t"].append(t[a])
+        parts["d"].append(d)
+        parts["a"].append(a)
+        parts["b"].append(b)
+        parts["shard"].append(np.full(a.size, n))
+    names = ("segment_a", "segment_b", "start", "end", "closest", "min_distance", "cpa_distance", "tcpa")
+    if not sum(p.size for p in parts["t"]):
+        return {
+            name: np.zeros(0, dtype=np.int64 if name.startswith("segment") else np.float64) for name in names
+        }
+    close = {name: np.concatenate(values) for name, values in parts.items()}
+
+    # Episodes: same vessel pair in consecutive buckets
+    va, vb = vessel_of_segment[close["seg_a"]], vessel_of_segment[close["seg_b"]]
+    order = np.lexsort((close["t"], vb, va))
+    close = {name: values[order] for name, values in close.items()}
+    va, vb = va[order], vb[order]
+    new_episode = np.ones(order.size, dtype=bool)
+    new_episode[1:] = (va[1:] != va[:-1]) | (vb[1:] != vb[:-1]) | (np.diff(close["t"]) > step * 1.5)
+    starts = np.flatnonzero(new_episode)
+    ends = np.append(starts[1:], order.size) - 1
+
+    # Closest observed sample of every episode (first on ties)
+    episode = np.cumsum(new_episode) - 1
+    min_d = np.minimum.reduceat(close["d"], starts)
+    hit = np.flatnonzero(close["d"] == min_d[episode])
+    _, first_hit = np.unique(episode[hit], return_index=True)
+    closest = hit[first_hit]
+
+    # Predicted CPA from the interpolated state at the closest sample
+    state = {
+        f"{name}_{side}": np.empty(closest.size)
+        for side in ("a", "b") for name in ("lon", "lat", "sog", "cog")
+    }
+    for n, (_, _, _, columns) in enumerate(shards):
+        in_shard = close["shard"][closest] == n
+        if not in_shard.any():
+            continue
+        for side in ("a", "b"):
+            rows = close[side][closest][in_shard]
+            for name in ("lon", "lat", "sog", "cog"):
+                state[f"{name}_{side}"][in_shard] = columns[name][rows]
+    cpa_distance, tcpa = _cpa(**state)
+
+    result = {
+        "segment_a": close["seg_a"][closest],
+        "segment_b": close["seg_b"][closest],
+        "start": close["t"][starts],
+        "end": close["t"][ends],
+        "closest": close["t"][closest],
+        "min_distance": min_d,
+        "cpa_distance": cpa_distance,
+        "tcpa": tcpa,
+    }
+    by_start = np.argsort(result["start"], kind="stable")
+    return {name: values[by_start] for name, values in result.items()}
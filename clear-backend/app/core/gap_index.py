@@ -0,0 +1,87 @@
+# app/core/gap_index.py
+from __future__ import annotations
+
+from typing import Optional
+
+import numpy as np
+
+from app.core.geometry import haversine_m
+from app.core.spatial_index import BBox
+
+
+class GapIndex:
+    """
+    Reporting gaps of the whole fleet: consecutive fixes of one segment that are more
+    than `min_gap` seconds apart. Built with a single np.diff over the point timestamps.
+
+    Entries are sorted by duration (then gap start), so a duration range is one slice
+    found by binary search; the time window and bbox are masks over that slice only.
+    Per entry: segment index, first point row, start/end (POSIX s), duration (s), the
+    great-circle distance jumped (m) and both endpoints.
+    """
+
+    def __init__(
+        self,
+        timestamp: np.ndarray,
+        lon: np.ndarray,
+        lat: np.ndarray,
+        offsets: np.ndarray,
+        min_gap: float,
+    ):
+        self.min_gap = min_gap
+        counts = np.diff(offsets)
+        point_segment = np.repeat(np.arange(counts.size, dtype=np.int64), counts)
+        # Row r starts a gap when row r + 1 belongs to the same segment and comes > min_gap later
+        dt = np.diff(np.asarray(timestamp, dtype=np.float64))
+        rows = np.flatnonzero((point_segment[1:] == point_segment[:-1]) & (dt > min_gap))
+
+        duration = dt[rows]
+        start = np.asarray(timestamp[rows], dtype=np.float64)
+        order = np.lexsort((start, duration))
+        rows = rows[order]
+
+        self.segment = point_segment[rows]
+        self.row = rows
+        self.start = start[order]
+        self.duration = duration[order]
+        self.end = self.start + self.duration
+        self.start_lon = np.asarray(lon[rows], dtype=np.float64)
+        self.start_lat = np.asarray(lat[rows], dtype=np.float64)
+        self.end_lon = np.asarray(lon[rows + 1], dtype=np.float64)
+        self.end_lat = np.asarray(lat[rows + 1], dtype=np.float64)
+        self.distance = haversine_m(self.start_lon, self.start_lat, self.end_lon, self.end_lat)
+
+    def __len__(self) -> int:
+        return self.row.size
+
+    def query(
+        self,
+        min_duration: Optional[float] = None,
+        max_duration: Optional[float] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        bbox: Optional[BBox] = None,
+    ) -> np.ndarray:
+        """
+        Entry ids (ascending duration) of gaps lasting [min_duration, max_duration]
+        seconds, overlapping the [start, end] window (POSIX s) and whose jump, as the
+        envelope of its two endpoints, intersects bbox. Open bounds are unbounded.
+        """
+        lo = 0 if min_duration is None else int(np.searchsorted(self.duration, min_duration, side="left"))
+        hi = len(self) if max_duration is None else int(np.searchsorted(self.duration, max_duration, side="right"))
+        if lo >= hi:
+            return np.zeros(0, dtype=np.int64)
+
+        ids = np.arange(lo, hi, dtype=np.int64)
+        mask = np.ones(ids.size, dtype=bool)
+        if start is not None:
+            mask &= self.end[lo:hi] >= start
+        if end is not None:
+            mask &= self.start[lo:hi] <= end
+        if bbox is not None:
+            min_lon, min_lat, max_lon, max_lat = bbox
+            mask &= np.minimum(self.start_lon[lo:hi], self.end_lon[lo:hi]) <= max_lon
+            mask &= np.maximum(self.start_lon[lo:hi], self.end_lon[lo:hi]) >= min_lon
+            mask &= np.minimum(self.start_lat[lo:hi], self.end_lat[lo:hi]) <= max_lat
+            mask &= np.maximum(self.start_lat[lo:hi], self.end_lat[lo:hi]) >= min_lat
+        return ids[mask]
@@ -0,0 +1,161 @@
+# app/core/geometry.py
+from __future__ import annotations
+
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+
+# ==========
+# Projection
+# ==========
+
+MAX_MERCATOR_LAT = 85.0511287798
+
+
+def lonlat_to_mercator(lon: np.ndarray, lat: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    WGS84 lon/lat -> Web Mercator world coordinates normalised to [0, 1]
+    (x grows eastwards, y grows southwards like tile rows).
+    """
+    lat = np.clip(lat, -MAX_MERCATOR_LAT, MAX_MERCATOR_LAT)
+    x = (np.asarray(lon, dtype=np.float64) + 180.0) / 360.0
+    sin_lat = np.sin(np.radians(lat))
+    y = 0.5 - np.log((1.0 + sin_lat) / (1.0 - sin_lat)) / (4.0 * np.pi)
+    return x, y
+
+
+def mercator_to_lonlat(x: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Inverse of lonlat_to_mercator."""
+    lon = np.asarray(x, dtype=np.float64) * 360.0 - 180.0
+    lat = np.degrees(np.arctan(np.sinh(np.pi * (1.0 - 2.0 * np.asarray(y, dtype=np.float64)))))
+    return lon, lat
+
+
+# ==========
+# Great Circle
+# ==========
+
+EARTH_RADIUS_M = 6_371_008.8
+
+
+def haversine_m(lon1: np.ndarray, lat1: np.ndarray, lon2: np.ndarray, lat2: np.ndarray) -> np.ndarray:
+    """Great-circle distance in metres between point 1 and point 2."""
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = np.radians(np.asarray(lon2) - np.asarray(lon1))
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def initial_bearing(lon1: np.ndarray, lat1: np.ndarray, lon2: np.ndarray, lat2: np.ndarray) -> np.ndarray:
+    """
+    Great-circle initial bearing from point 1 to point 2, degrees clockwise from north
+    in [0, 360); NaN where the points coincide.
+    """
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    dlon = np.radians(np.asarray(lon2) - np.asarray(lon1))
+    y = np.sin(dlon) * np.cos(phi2)
+    x = np.cos(phi1) * np.sin(phi2) - np.sin(phi1) * np.cos(phi2) * np.cos(dlon)
+    bearing = np.degrees(np.arctan2(y, x)) % 360.0
+    return np.where((x == 0) & (y == 0), np.nan, bearing)
+
+
+# ==========
+# Point in Polygon
+# ==========
+
+def points_in_polygon(x: np.ndarray, y: np.ndarray, rings: Sequence[np.ndarray]) -> np.ndarray:
+    """
+    Even-odd ray casting of many points against one polygon given as (n, 2) rings
+    (exterior and holes; closed or not). Loops over edges, vectorised over points.
+    """
+    inside = np.zeros(np.shape(x), dtype=bool)
+    for ring in rings:
+        x1, y1 = ring[:, 0], ring[:, 1]
+        x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+        for ax, ay, bx, by in zip(x1.tolist(), y1.tolist(), x2.tolist(), y2.tolist()):
+            if ay == by:
+                continue
+            crosses = (ay > y) != (by > y)
+            crosses &= x < (bx - ax) * (y - ay) / (by - ay) + ax
+            inside ^= crosses
+    return inside
+
+
+def points_in_polygons(x: np.ndarray, y: np.ndarray, polygons: List[Sequence[np.ndarray]]) -> np.ndarray:
+    """Points inside any of the polygons (a MultiPolygon)."""
+    inside = np.zeros(np.shape(x), dtype=bool)
+    for rings in polygons:
+        inside |= points_in_polygon(x, y, rings)
+    return inside
+
+
+# ==========
+# Line Simplification
+# ==========
+
+def _point_segment_distance(
+    px: np.ndarray, py: np.ndarray,
+    ax: np.ndarray, ay: np.ndarray,
+    bx: np.ndarray, by: np.ndarray,
+) -> np.ndarray:
+    """Distance from points P to segments AB (element-wise)."""
+    dx = bx - ax
+    dy = by - ay
+    length_sq = dx * dx + dy * dy
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = np.where(length_sq > 0, ((px - ax) * dx + (py - ay) * dy) / length_sq, 0.0)
+    t = np.clip(t, 0.0, 1.0)
+    return np.hypot(px - (ax + t * dx), py - (ay + t * dy))
+
+
+def douglas_peucker_importance(x: np.ndarray, y: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """
+    Douglas-Peucker over many polylines at once.
+
+    Polyline k is x/y[offsets[k]:offsets[k + 1]]. Returns one importance value per vertex
+    such that `importance > tolerance` is exactly the vertex set Douglas-Peucker keeps at
+    that tolerance: a split vertex gets its distance, clamped by the distances of the splits
+    above it. End points get +inf. All open ranges of one recursion depth are processed in a
+    single vectorised step, so the Python loop runs once per depth rather than once per range.
+    """
+    importance = np.zeros(x.size, dtype=np.float64)
+    starts = np.asarray(offsets[:-1], dtype=np.int64)
+    ends = np.asarray(offsets[1:], dtype=np.int64) - 1
+    non_empty = ends >= starts
+    importance[starts[non_empty]] = np.inf
+    importance[ends[non_empty]] = np.inf
+
+    lo, hi = starts[non_empty], ends[non_empty]
+    cap = np.full(lo.size, np.inf)
+    open_ = hi - lo >= 2
+    lo, hi, cap = lo[open_], hi[open_], cap[open_]
+
+    while lo.size:
+        interior = hi - lo - 1
+        first = np.cumsum(interior) - interior
+        owner = np.repeat(np.arange(lo.size), interior)
+        idx = np.arange(int(interior.sum()), dtype=np.int64) - np.repeat(first, interior) + lo[owner] + 1
+
+        a, b = lo[owner], hi[owner]
+        dist = _point_segment_distance(x[idx], y[idx], x[a], y[a], x[b], y[b])
+
+        # Farthest interior vertex of every range (first one on ties)
+        dmax = np.maximum.reduceat(dist, first)
+        is_max = dist == dmax[owner]
+        _, first_hit = np.unique(owner[is_max], return_index=True)
+        split = idx[is_max][first_hit]
+
+        value = np.minimum(dmax, cap)
+        importance[split] = value
+
+        lo, hi, cap = (
+            np.concatenate([lo, split]),
+            np.concatenate([split, hi]),
+            np.concatenate([value, value]),
+        )
+        open_ = hi - lo >= 2
+        lo, hi, cap = lo[open_], hi[open_], cap[open_]
+
+    return importance
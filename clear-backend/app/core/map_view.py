@@ -0,0 +1,68 @@
+# app/core/map_view.py
+"""
+TrajectoryDataset -> MapTrajectory payloads for the frontend map, shared by the
+trajectory and vessel routers.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from app.core.trajectory_store import Segment, Trajectory, TrajectoryDataset
+
+
+def map_segment_fields(dataset: TrajectoryDataset, seg: Segment) -> Dict[str, Any]:
+    """MapSegment fields other than id and coordinates."""
+    return {
+        "summary": seg.short_description,
+        "vessel_id": seg.vessel_id,
+        "vessel_type": dataset.vessels.vessel_type(seg.vessel_id),
+        "start_ts": seg.start_time,
+        "end_ts": seg.end_time,
+    }
+
+
+def to_map_trajectory(
+    dataset: TrajectoryDataset,
+    traj: Trajectory,
+    segment_idx: Iterable[int],
+    zoom: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Internal Trajectory -> MapTrajectory payload for the frontend map
+    (restricted to the given segment indices, geometry simplified for zoom).
+    Coordinates stay NumPy arrays sliced from the point columns; NumpyJSONResponse
+    writes them out without creating a Python object per vertex.
+    """
+    map_segments: List[Dict[str, Any]] = []
+
+    for i in segment_idx:
+        seg = dataset.segments[i]
+        coordinates = dataset.segment_coordinates(i, zoom)
+        if len(coordinates) == 0:
+            # Skip this segment if there are no points to avoid drawing empty polylines
+            continue
+
+        map_segments.append({"id": seg.id, "coordinates": coordinates, **map_segment_fields(dataset, seg)})
+
+    return {"id": traj.id, "segments": map_segments}
+
+
+def iter_map_trajectories(
+    dataset: TrajectoryDataset,
+    segment_idx: np.ndarray,
+    zoom: Optional[float] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Selected segment indices (ascending) -> MapTrajectory payloads, one per trajectory
+    that still has at least one selected segment. Built lazily, one trajectory at a time.
+    """
+    if segment_idx.size == 0:
+        return
+
+    traj_idx = dataset.segment_trajectory[segment_idx]
+    group_starts = np.flatnonzero(np.diff(traj_idx)) + 1
+    for group in np.split(segment_idx, group_starts):
+        traj = dataset.trajectories[dataset.segment_trajectory[group[0]]]
+        yield to_map_trajectory(dataset, traj, group, zoom)
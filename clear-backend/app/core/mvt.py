@@ -0,0 +1,200 @@
+# app/core/mvt.py
+"""
+Minimal Mapbox Vector Tile (spec v2) writer for line features.
+Only what the trajectory tiles need: clipping, quantisation and protobuf encoding.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_EXTENT = 4096
+DEFAULT_BUFFER = 64
+
+_GEOM_LINESTRING = 2
+_CMD_MOVE_TO = 1
+_CMD_LINE_TO = 2
+
+
+# ==========
+# Protobuf Primitives
+# ==========
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _key(field: int, wire_type: int) -> bytes:
+    return _varint((field << 3) | wire_type)
+
+
+def _length_delimited(field: int, payload: bytes) -> bytes:
+    return _key(field, 2) + _varint(len(payload)) + payload
+
+
+def _packed(field: int, values: Sequence[int]) -> bytes:
+    return _length_delimited(field, b"".join(_varint(int(v)) for v in values))
+
+
+def _zigzag(values: np.ndarray) -> np.ndarray:
+    return (values << 1) ^ (values >> 63)
+
+
+# ==========
+# Geometry
+# ==========
+
+def clip_line(x: np.ndarray, y: np.ndarray, lo: float, hi: float) -> List[np.ndarray]:
+    """
+    Clip a polyline to the square [lo, hi]^2 (Liang-Barsky on all edges at once).
+    Returns the visible parts as (n, 2) arrays.
+    """
+    if x.size < 2:
+        return []
+
+    x0, y0, dx, dy = x[:-1], y[:-1], np.diff(x), np.diff(y)
+    t_in = np.zeros(dx.size)
+    t_out = np.ones(dx.size)
+    visible = np.ones(dx.size, dtype=bool)
+    for p, q in ((-dx, x0 - lo), (dx, hi - x0), (-dy, y0 - lo), (dy, hi - y0)):
+        parallel = p == 0
+        visible &= ~(parallel & (q < 0))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = np.where(parallel, 0.0, q / np.where(parallel, 1.0, p))
+        t_in = np.where(~parallel & (p < 0), np.maximum(t_in, r), t_in)
+        t_out = np.where(~parallel & (p > 0), np.minimum(t_out, r), t_out)
+    visible &= t_in <= t_out
+
+    edges = np.flatnonzero(visible)
+    if edges.size == 0:
+        return []
+
+    # An edge continues the previous part if both share an un-clipped vertex
+    continues = np.zeros(edges.size, dtype=bool)
+    continues[1:] = (
+        (edges[1:] == edges[:-1] + 1)
+        & (t_out[edges[:-1]] == 1.0)
+        & (t_in[edges[1:]] == 0.0)
+    )
+    starts = np.flatnonzero(~continues)
+
+    sx = x0[edges] + t_in[edges] * dx[edges]
+    sy = y0[edges] + t_in[edges] * dy[edges]
+    ex = x0[edges] + t_out[edges] * dx[edges]
+    ey = y0[edges] + t_out[edges] * dy[edges]
+
+    parts = []
+    for k, first in enumerate(starts):
+        last = starts[k + 1] if k + 1 < starts.size else edges.size
+        px = np.concatenate(([sx[first]], ex[first:last]))
+        py = np.concatenate(([sy[first]], ey[first:last]))
+        parts.append(np.column_stack((px, py)))
+    return parts
+
+
+def encode_lines(parts: Sequence[np.ndarray]) -> List[int]:
+    """
+    Tile-space line parts -> MVT geometry command stream (quantised to integers).
+    Consecutive duplicate vertices are dropped; parts collapsing to a point are skipped.
+    """
+    commands: List[int] = []
+    cursor = np.zeros(2, dtype=np.int64)
+    for part in parts:
+        q = np.rint(part).astype(np.int64)
+        keep = np.ones(len(q), dtype=bool)
+        keep[1:] = np.any(q[1:] != q[:-1], axis=1)
+        q = q[keep]
+        if len(q) < 2:
+            continue
+
+        deltas = np.diff(np.vstack((cursor, q)), axis=0)
+        encoded = _zigzag(deltas).ravel().tolist()
+        commands.append((1 << 3) | _CMD_MOVE_TO)
+        commands.extend(encoded[:2])
+        commands.append(((len(q) - 1) << 3) | _CMD_LINE_TO)
+        commands.extend(encoded[2:])
+        cursor = q[-1]
+    return commands
+
+
+# ==========
+# Tile Encoding
+# ==========
+
+class LayerBuilder:
+    """Accumulates line features of one layer, interning property keys and values."""
+
+    def __init__(self, name: str, extent: int = DEFAULT_EXTENT):
+        self.name = name
+        self.extent = extent
+        self._keys: Dict[str, int] = {}
+        self._values: Dict[Any, int] = {}
+        self._features: List[bytes] = []
+
+    def _intern(self, table: Dict[Any, int], item: Any) -> int:
+        if item not in table:
+            table[item] = len(table)
+        return table[item]
+
+    def add_line(
+        self,
+        parts: Sequence[np.ndarray],
+        properties: Dict[str, Any],
+        feature_id: Optional[int] = None,
+    ) -> bool:
+        """Add a (multi)line feature; returns False if nothing is left after quantisation."""
+        geometry = encode_lines(parts)
+        if not geometry:
+            return False
+
+        tags: List[int] = []
+        for key, value in properties.items():
+            if value is None:
+                continue
+            tags.append(self._intern(self._keys, key))
+            # (type, value) so that True and 1 do not collapse into one table entry
+            tags.append(self._intern(self._values, (type(value), value)))
+
+        feature = b""
+        if feature_id is not None:
+            feature += _key(1, 0) + _varint(feature_id)
+        feature += _packed(2, tags)
+        feature += _key(3, 0) + _varint(_GEOM_LINESTRING)
+        feature += _packed(4, geometry)
+        self._features.append(feature)
+        return True
+
+    def __len__(self) -> int:
+        return len(self._features)
+
+    def encode(self) -> bytes:
+        layer = _key(15, 0) + _varint(2)
+        layer += _length_delimited(1, self.name.encode("utf-8"))
+        for feature in self._features:
+            layer += _length_delimited(2, feature)
+        for key in self._keys:
+            layer += _length_delimited(3, key.encode("utf-8"))
+        for value_type, value in self._values:
+            if value_type is bool:
+                encoded = _key(7, 0) + _varint(int(value))
+            elif value_type is int and value >= 0:
+                encoded = _key(5, 0) + _varint(value)
+            else:
+                encoded = _length_delimited(1, str(value).encode("utf-8"))
+            layer += _length_delimited(4, encoded)
+        layer += _key(5, 0) + _varint(self.extent)
+        return layer
+
+
+def encode_tile(layers: Sequence[LayerBuilder]) -> bytes:
+    """Serialise non-empty layers into a vector tile."""
+    return b"".join(_length_delimited(3, layer.encode()) for layer in layers if len(layer))
@@ -0,0 +1,255 @@
+# app/core/node_store.py
+"""
+Packed SD-KG node store (nodes.pack): every node document of the knowledge graph in one
+file, written by the update pipeline instead of one data/nodes/{id}.json per node.
+
+Layout:
+    b"CLEARNOD" | uint32 format version | records | index JSON | trailer
+    trailer = uint64 index offset | uint64 index length | b"CLEARNOD"
+Records are node JSON documents appended one after another, each stored raw or
+zlib-compressed, whichever is smaller. The index maps node id -> [offset, length, codec].
+Readers memory-map the file and parse the index once, so reading a node is one dict
+lookup and one slice, with no directory lookups.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"CLEARNOD"
+FORMAT_VERSION = 1
+_PREAMBLE = struct.Struct("<8sI")
+_TRAILER = struct.Struct("<QQ8s")
+
+CODEC_RAW = 0
+CODEC_ZLIB = 1
+# Records shorter than this are stored raw; zlib rarely pays off on them
+_COMPRESS_MIN_BYTES = 256
+
+
+# ==========
+# Writer
+# ==========
+
+class NodePackWriter:
+    """
+    Appends node documents to a new pack; close() writes the index and swaps the file
+    in atomically, so readers never see a partial pack. Use as a context manager.
+    """
+
+    def __init__(self, path: str, compress: bool = True):
+        self.path = Path(path)
+        self.compress = compress
+        # Per-process temp name: several workers may pack the same directory at startup
+        self._tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        self._file = self._tmp_path.open("wb")
+        self._file.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION))
+        self._index: Dict[str, Tuple[int, int, int]] = {}
+
+    def add(self, node_id: str, node: Dict[str, Any]) -> None:
+        """Append one node document; adding an id again replaces the earlier record."""
+        data = json.dumps(node, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        codec = CODEC_RAW
+        if self.compress and len(data) >= _COMPRESS_MIN_BYTES:
+            packed = zlib.compress(data)
+            if len(packed) < len(data):
+                data, codec = packed, CODEC_ZLIB
+        self._index[node_id] = (self._file.tell(), len(data), codec)
+        self._file.write(data)
+
+    def close(self) -> None:
+        index = json.dumps(self._index, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        offset = self._file.tell()
+        self._file.write(index)
+        self._file.write(_TRAILER.pack(offset, len(index), MAGIC))
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def __enter__(self) -> "NodePackWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+            self._tmp_path.unlink(missing_ok=True)
+
+
+def pack_nodes_dir(nodes_dir: str, path: str) -> int:
+    """
+    Pack the per-node JSON files of nodes_dir (the pre-pack layout) into a node pack at
+    path; returns the number of nodes written. Unreadable files are skipped.
+    """
+    count = 0
+    with NodePackWriter(path) as writer:
+        for node_file in sorted(Path(nodes_dir).glob("*.json")):
+            try:
+                with node_file.open("r", encoding="utf-8") as f:
+                    node = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning("Skipping unreadable node file %s: %s", node_file, e)
+                continue
+            writer.add(node_file.stem, node)
+            count += 1
+    return count
+
+
+# ==========
+# Reader
+# ==========
+
+class NodePack:
+    """Read-only view of a pack file; node documents are decoded on demand."""
+
+    def __init__(self, path: Path, version: str):
+        self.path = path
+        self.version = version
+        with path.open("rb") as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._data) < _PREAMBLE.size + _TRAILER.size:
+            raise ValueError(f"{path} is not a node pack")
+        magic, format_version = _PREAMBLE.unpack_from(self._data, 0)
+        offset, length, trailer_magic = _TRAILER.unpack_from(self._data, len(self._data) - _TRAILER.size)
+        if magic != MAGIC or trailer_magic != MAGIC:
+            raise ValueError(f"{path} is not a node pack")
+        if format_version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported node pack format version {format_version} in {path}")
+
+        index = json.loads(self._data[offset:offset + length])
+        self._index: Dict[str, Tuple[int, int, int]] = {k: tuple(v) for k, v in index.items()}
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, node_id: str) -> bool:
+        return node_id in self._index
+
+    def ids(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def get(self, node_id: str) -> Optional[Dict[str, Any]]:
+        """The node document, or None if the pack has no such node."""
+        entry = self._index.get(node_id)
+        if entry is None:
+            return None
+        offset, length, codec = entry
+        data = self._data[offset:offset + length]
+        if codec == CODEC_ZLIB:
+            data = zlib.decompress(data)
+        return json.loads(data)
+
+
+def _file_version(path: Path) -> str:
+    stat = path.stat()
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+# ==========
+# Node Store
+# ==========
+
+class NodeStore:
+    """
+    Process-wide access to the SD-KG node documents by id. The pack is preferred and
+    reopened when the file changes; without one (data written before the pipeline
+    packed its nodes) documents are read from nodes_dir/{id}.json.
+    """
+
+    def __init__(self, pack_path: Optional[str], nodes_dir: Optional[str] = None):
+        self.pack_path = Path(pack_path) if pack_path else None
+        self.nodes_dir = Path(nodes_dir) if nodes_dir else None
+        self._pack: Optional[NodePack] = None
+        self._lock = threading.Lock()
+
+    def pack(self) -> Optional[NodePack]:
+        """The current pack, or None if there is none."""
+        if self.pack_path is None:
+            return None
+        try:
+            version = _file_version(self.pack_path)
+        except FileNotFoundError:
+            return None
+        pack = self._pack
+        if pack is not None and pack.version == version:
+            return pack
+
+        with self._lock:
+            # Another request may have finished the reload while we were waiting
+            if self._pack is None or self._pack.version != version:
+                self._pack = NodePack(self.pack_path, version)
+                logger.info("Opened node pack %s: %d nodes (version %s)", self.pack_path, len(self._pack), version)
+            return self._pack
+
+    def migrate(self) -> int:
+        """
+        Pack nodes_dir into the pack file when there is no pack yet, so data written before
+        the pipeline packed its nodes is served from the pack as well. Returns the number
+        of nodes packed (0 when there was nothing to do).
+        """
+        if self.pack_path is None or self.nodes_dir is None:
+            return 0
+        if self.pack_path.exists() or not self.nodes_dir.is_dir():
+            return 0
+        count = pack_nodes_dir(str(self.nodes_dir), str(self.pack_path))
+        logger.info("Packed %d node files from %s into %s", count, self.nodes_dir, self.pack_path)
+        return count
+
+    def get(self, node_id: str) -> Optional[Dict[str, Any]]:
+        """The node document, or None if the store has no such node."""
+        pack = self.pack()
+        if pack is not None:
+            return pack.get(node_id)
+        if self.nodes_dir is None:
+            return None
+        try:
+            with (self.nodes_dir / f"{node_id}.json").open("r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def iter_nodes(self, prefix: str = "") -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """(id, document) of every node whose id starts with prefix; unreadable ones are skipped."""
+        pack = self.pack()
+        if pack is not None:
+            node_ids = [node_id for node_id in pack.ids() if node_id.startswith(prefix)]
+        elif self.nodes_dir is not None and self.nodes_dir.is_dir():
+            node_ids = [path.stem for path in self.nodes_dir.glob(f"{prefix}*.json")]
+        else:
+            return
+
+        for node_id in node_ids:
+            try:
+                node = pack.get(node_id) if pack is not None else self.get(node_id)
+            except (OSError, ValueError, zlib.error) as e:
+                logger.warning("Skipping unreadable node %s: %s", node_id, e)
+                continue
+            if node is not None:
+                yield node_id, node
+
+
+node_store = NodeStore(settings.SDKG_NODES_PACK_PATH, settings.SDKG_NODES_DIR)
+
+
+if __name__ == "__main__":
+    # Repack a per-node JSON directory by hand:
+    #   python -m app.core.node_store [--nodes-dir DIR] [--pack PATH]
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pack SD-KG node files into a single node pack")
+    parser.add_argument("--nodes-dir", default=settings.SDKG_NODES_DIR, help="directory of {node_id}.json files")
+    parser.add_argument("--pack", default=settings.SDKG_NODES_PACK_PATH, help="node pack to write")
+    args = parser.parse_args()
+    print(f"Packed {pack_nodes_dir(args.nodes_dir, args.pack)} nodes from {args.nodes_dir} into {args.pack}")
@@ -0,0 +1,55 @@
+# app/core/packed_coords.py
+"""
+Compact binary transport for map geometry (application/octet-stream).
+
+Layout, little-endian:
+    b"CLTR" | uint32 format version | uint32 header length | header JSON (space-padded to 4 bytes)
+    int32  offsets[n_segments + 1]      vertex offsets; segment i owns vertices offsets[i]:offsets[i + 1]
+    int32  coords[n_vertices * 2]       lon, lat interleaved, multiplied by header["scale"] and rounded;
+                                        the first vertex of a segment is absolute, the others are
+                                        deltas to the previous vertex of the same segment
+A browser decodes it into typed arrays with one Int32Array view and a running sum per segment.
+"""
+from __future__ import annotations
+
+import struct
+from typing import Any, Dict
+
+import numpy as np
+
+from app.core.responses import dumps
+
+PACKED_COORDS_MEDIA_TYPE = "application/octet-stream"
+MAGIC = b"CLTR"
+FORMAT_VERSION = 1
+# 1e-6 degrees is ~0.1 m, far below AIS accuracy
+COORD_SCALE = 1_000_000
+
+_PREAMBLE = struct.Struct("<4sII")
+
+
+def delta_encode(lon: np.ndarray, lat: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """
+    Quantise lon/lat and delta-encode them within each segment -> (n, 2) int32.
+    """
+    quantised = np.rint(np.column_stack((lon, lat)) * COORD_SCALE).astype(np.int64)
+    deltas = quantised.copy()
+    deltas[1:] -= quantised[:-1]
+    starts = np.asarray(offsets[:-1])[np.diff(offsets) > 0]
+    deltas[starts] = quantised[starts]
+    return deltas.astype(np.int32)
+
+
+def pack_coordinates(header: Dict[str, Any], lon: np.ndarray, lat: np.ndarray, offsets: np.ndarray) -> bytes:
+    """
+    Serialise segment metadata (header) plus their concatenated coordinates.
+    header gets the "scale" entry added; its other content is up to the caller.
+    """
+    header_bytes = dumps({**header, "scale": COORD_SCALE})
+    header_bytes += b" " * (-len(header_bytes) % 4)
+    return b"".join((
+        _PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes)),
+        header_bytes,
+        np.asarray(offsets, dtype="<i4").tobytes(),
+        delta_encode(lon, lat, offsets).astype("<i4").tobytes(),
+    ))
@@ -0,0 +1,54 @@
+# app/core/responses.py
+from __future__ import annotations
+
+from typing import Any, Iterable, Iterator
+
+import orjson
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# NumPy arrays are written directly from their buffers (no per-element Python objects),
+# aware UTC datetimes get the same 'Z' suffix pydantic produces.
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_UTC_Z
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# Lines are grouped into chunks of about this size before being sent
+NDJSON_CHUNK_SIZE = 64 * 1024
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+
+class NumpyJSONResponse(JSONResponse):
+    """
+    JSON response for payloads that embed NumPy arrays (e.g. segment coordinates).
+    Endpoints returning it keep their response_model for the OpenAPI schema, but skip
+    FastAPI's per-field re-validation of data that comes straight from the store.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _ndjson_chunks(items: Iterable[Any]) -> Iterator[bytes]:
+    buffer = bytearray()
+    for item in items:
+        buffer += dumps(item)
+        buffer += b"\n"
+        if len(buffer) >= NDJSON_CHUNK_SIZE:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    Newline-delimited JSON, one item per line, sent with chunked transfer encoding.
+    Items are pulled from the iterable while sending, so memory stays bounded by one
+    chunk and the client can start consuming before the last item has been built.
+    """
+
+    def __init__(self, items: Iterable[Any], **kwargs: Any):
+        kwargs.setdefault("media_type", NDJSON_MEDIA_TYPE)
+        super().__init__(_ndjson_chunks(items), **kwargs)
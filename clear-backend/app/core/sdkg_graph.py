@@ -0,0 +1,574 @@
+# app/core/sdkg_graph.py
+"""
+Resident SD-KG index graph (sdkg_index.json), loaded once and shared by all requests.
+
+Node ids are interned to ints 0..n-1 with a parallel type-code array; links are kept
+as source / target / relation-code arrays in file order. Adjacency is stored as CSR
+(outgoing, grouped by source) and CSC (incoming, grouped by target), once over all
+links and once per relation, so neighbour lookups are array slices. A node summary
+table (title, summary) and ranking columns (support, time) sit alongside, so subgraph
+responses never touch the node files.
+
+The update pipeline also writes a binary snapshot (sdkg_index.npz) next to the JSON;
+it is preferred unless the JSON is newer, like segments.bin for the trajectory store.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.dtypes import StringDType
+
+from app.core.config import settings
+from app.core.node_store import NodeStore, node_store
+
+logger = logging.getLogger(__name__)
+
+NODE_TYPES = ("behavior", "attribute", "function", "segment", "trajectory")
+RELATIONS = ("has_attribute", "part_of", "exhibits_behavior", "uses_function", "implements")
+
+SNAPSHOT_FORMAT_VERSION = 2
+
+
+def _pack_strings(values: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Strings -> (UTF-8 bytes, offsets); string i is data[offsets[i]:offsets[i + 1]]."""
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(b) for b in encoded], dtype=np.int64)
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _unpack_strings(data: np.ndarray, offsets: np.ndarray) -> List[str]:
+    raw = data.tobytes()
+    bounds = offsets.tolist()
+    return [raw[bounds[i]:bounds[i + 1]].decode("utf-8") for i in range(len(bounds) - 1)]
+
+
+def node_index_fields(node: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Per-node fields the resident graph keeps besides id / type / label, from an SD-KG
+    node file dict:
+    - title / summary for subgraph enrichment (title falls back to the label, then id);
+    - support (metadata.support) and time (metadata.start_time as POSIX seconds, UTC)
+      for neighbour ranking, None if absent.
+    The update pipeline writes these into sdkg_index.json.
+    """
+    metadata = node.get("metadata") or {}
+    support = metadata.get("support")
+    start_time = metadata.get("start_time")
+    time = None
+    if start_time:
+        try:
+            parsed = datetime.fromisoformat(str(start_time).replace("Z", "+00:00"))
+        except ValueError:
+            parsed = None
+        if parsed is not None:
+            time = (parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)).timestamp()
+    return {
+        "title": node.get("title") or node.get("label") or node.get("id"),
+        "summary": node.get("summary") or "",
+        "support": float(support) if isinstance(support, (int, float)) else None,
+        "time": time,
+    }
+
+
+def load_node_fields(nodes: NodeStore, node_ids: Sequence[str]) -> List[Optional[Dict[str, Any]]]:
+    """
+    node_index_fields of every node, read from the node store (None where the node is
+    missing or unreadable). Used for index files written before the pipeline stored
+    these fields itself.
+    """
+    fields: List[Optional[Dict[str, Any]]] = []
+    for node_id in node_ids:
+        try:
+            node = nodes.get(node_id)
+        except (OSError, ValueError, zlib.error):
+            node = None
+        fields.append(node_index_fields(node) if node is not None else None)
+    return fields
+
+
+class Adjacency(NamedTuple):
+    """Compressed adjacency: entries of node i are indptr[i]:indptr[i + 1]."""
+    indptr: np.ndarray
+    neighbour: np.ndarray
+    link: np.ndarray
+
+
+def _adjacency(n_nodes: int, key: np.ndarray, other: np.ndarray, links: np.ndarray) -> Adjacency:
+    order = np.argsort(key[links], kind="stable")
+    indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum(np.bincount(key[links], minlength=n_nodes))
+    return Adjacency(indptr, other[links][order], links[order])
+
+
+def _rows(adj: Adjacency, nodes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Entry rows of all the given nodes (node by node) and the number per node."""
+    lo, hi = adj.indptr[nodes], adj.indptr[nodes + 1]
+    counts = hi - lo
+    rows = np.arange(int(counts.sum()), dtype=np.int64) + np.repeat(lo - (np.cumsum(counts) - counts), counts)
+    return rows, counts
+
+
+class SDKGGraph:
+    """
+    One loaded version of the SD-KG index graph. Never mutated after construction.
+    Relation code -1 marks links without a relation.
+    """
+
+    def __init__(
+        self,
+        version: str,
+        node_ids: List[str],
+        node_type: np.ndarray,
+        labels: List[str],
+        link_source: np.ndarray,
+        link_target: np.ndarray,
+        link_relation: np.ndarray,
+        relations: List[str],
+        node_support: Optional[np.ndarray] = None,
+        node_time: Optional[np.ndarray] = None,
+        titles: Optional[List[str]] = None,
+        summaries: Optional[List[str]] = None,
+    ):
+        self.version = version
+        self.node_ids = node_ids
+        self.node_index: Dict[str, int] = {node_id: i for i, node_id in enumerate(node_ids)}
+        self.node_type = np.asarray(node_type, dtype=np.int8)
+        self.labels = labels
+        # Node summary table for subgraph enrichment, parallel to node_ids
+        self.titles = labels if titles is None else titles
+        self.summaries = [""] * len(node_ids) if summaries is None else summaries
+        self.link_source = np.asarray(link_source, dtype=np.int64)
+        self.link_target = np.asarray(link_target, dtype=np.int64)
+        self.link_relation = np.asarray(link_relation, dtype=np.int16)
+        self.relations = relations
+        self.relation_code: Dict[str, int] = {name: i for i, name in enumerate(relations)}
+
+        n = len(node_ids)
+        # Ascending node ids of every type (NODE_TYPES order), and the lower-cased labels as
+        # a variable-width string array so keyword search runs as one np.strings.find per keyword
+        self.nodes_by_type = [np.flatnonzero(self.node_type == code) for code in range(len(NODE_TYPES))]
+        self.labels_lower = np.array([label.lower() for label in labels], dtype=StringDType())
+
+        all_links = np.arange(self.link_source.size, dtype=np.int64)
+        self.out_edges = _adjacency(n, self.link_source, self.link_target, all_links)
+        self.in_edges = _adjacency(n, self.link_target, self.link_source, all_links)
+        self.out_by_relation: Dict[str, Adjacency] = {}
+        self.in_by_relation: Dict[str, Adjacency] = {}
+        for code, name in enumerate(relations):
+            links = np.flatnonzero(self.link_relation == code)
+            self.out_by_relation[name] = _adjacency(n, self.link_source, self.link_target, links)
+            self.in_by_relation[name] = _adjacency(n, self.link_target, self.link_source, links)
+
+        # Neighbour ranking: support, then degree, then recency (descending; unknown last).
+        # node_rank[i] is node i's position in that order, so top-k is a sort on it.
+        self.node_support = np.full(n, np.nan) if node_support is None else np.asarray(node_support, np.float64)
+        self.node_time = np.full(n, np.nan) if node_time is None else np.asarray(node_time, np.float64)
+        self.degree = np.diff(self.out_edges.indptr) + np.diff(self.in_edges.indptr)
+        order = np.lexsort((
+            np.arange(n),
+            -np.nan_to_num(self.node_time, nan=-np.inf),
+            -self.degree,
+            -np.nan_to_num(self.node_support, nan=-np.inf),
+        ))
+        self.node_rank = np.empty(n, dtype=np.int64)
+        self.node_rank[order] = np.arange(n)
+
+    def __len__(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def num_links(self) -> int:
+        return self.link_source.size
+
+    def type_of(self, node: int) -> str:
+        return NODE_TYPES[self.node_type[node]]
+
+    def relation_of(self, link: int) -> Optional[str]:
+        code = self.link_relation[link]
+        return self.relations[code] if code >= 0 else None
+
+    def _adjacencies(self, relations: Optional[Sequence[str]] = None) -> List[Adjacency]:
+        """Outgoing and incoming adjacency over all links, or over the given relations."""
+        if relations is None:
+            return [self.out_edges, self.in_edges]
+        return [
+            by_relation[name]
+            for name in relations if name in self.relation_code
+            for by_relation in (self.out_by_relation, self.in_by_relation)
+        ]
+
+    def neighbours(self, node: int, relations: Optional[Sequence[str]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Neighbours of a node over outgoing and incoming links, optionally only links of
+        the given relations: (neighbour node ids, link ids), outgoing first.
+        """
+        adjacencies = self._adjacencies(relations)
+        parts = [
+            (adj.neighbour[adj.indptr[node]:adj.indptr[node + 1]], adj.link[adj.indptr[node]:adj.indptr[node + 1]])
+            for adj in adjacencies
+        ]
+        if not parts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+
+    def degree_of(self, nodes: np.ndarray, relations: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Number of links (outgoing + incoming, optionally of the given relations) per node."""
+        if relations is None:
+            return self.degree[nodes]
+        return sum(
+            (np.diff(adj.indptr)[nodes] for adj in self._adjacencies(relations)),
+            np.zeros(np.size(nodes), dtype=np.int64),
+        )
+
+    def ranked_neighbours(
+        self, node: int, relations: Optional[Sequence[str]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """neighbours() ordered by the neighbours' rank (then link id)."""
+        neighbour, link = self.neighbours(node, relations)
+        order = np.lexsort((link, self.node_rank[neighbour]))
+        return neighbour[order], link[order]
+
+    def _incident(
+        self, nodes: np.ndarray, relations: Optional[Sequence[str]] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        All (position in `nodes`, link id, neighbour) entries of the given nodes over
+        outgoing and incoming links, ordered by position then link id.
+        """
+        adjacencies = self._adjacencies(relations)
+        position, link, neighbour = [], [], []
+        for adj in adjacencies:
+            rows, counts = _rows(adj, nodes)
+            position.append(np.repeat(np.arange(nodes.size, dtype=np.int64), counts))
+            link.append(adj.link[rows])
+            neighbour.append(adj.neighbour[rows])
+        if not position:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty
+        position, link, neighbour = np.concatenate(position), np.concatenate(link), np.concatenate(neighbour)
+        order = np.lexsort((link, position))
+        return position[order], link[order], neighbour[order]
+
+    def _top_entries(
+        self, position: np.ndarray, link: np.ndarray, neighbour: np.ndarray, k: int
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Keep the k best-ranked entries of every position, in (position, link) order."""
+        by_rank = np.lexsort((link, self.node_rank[neighbour], position))
+        group_start = np.searchsorted(position[by_rank], position[by_rank], side="left")
+        keep = np.sort(by_rank[np.arange(by_rank.size) - group_start < k])
+        return position[keep], link[keep], neighbour[keep]
+
+    def subgraph(
+        self,
+        center: int,
+        depth: int,
+        max_nodes: Optional[int] = None,
+        relations: Optional[Sequence[str]] = None,
+        fanout: Optional[int] = None,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, bool]:
+        """
+        Breadth-first subgraph around `center`, one vectorised step per level.
+
+        Nodes are returned in discovery order with their level (center = 0). Every link
+        met while expanding a node of level L < depth is returned once per node pair,
+        with level L + 1 - including links between already discovered nodes. With
+        max_nodes, discovery stops once that many nodes are reached (links to nodes
+        left out are dropped). With fanout, only the top-`fanout` links of every expanded
+        node (by the neighbours' rank) are followed, so hubs cannot blow the result up.
+        Returns nodes, node levels, links, link levels, truncated.
+        """
+        visited = np.zeros(len(self), dtype=bool)
+        visited[center] = True
+        nodes, node_levels = [np.array([center], dtype=np.int64)], [np.zeros(1, dtype=np.int64)]
+        links, link_levels = [], []
+        seen_pairs = np.zeros(0, dtype=np.int64)
+        n_nodes, truncated = 1, False
+        frontier = nodes[0]
+
+        for level in range(depth):
+            if frontier.size == 0:
+                break
+            position, link, neighbour = self._incident(frontier, relations)
+            if fanout is not None:
+                position, link, neighbour = self._top_entries(position, link, neighbour, fanout)
+            # First occurrence of every node pair not seen on an earlier level
+            lo = np.minimum(self.link_source[link], self.link_target[link])
+            hi = np.maximum(self.link_source[link], self.link_target[link])
+            pair = lo * len(self) + hi
+            _, first = np.unique(pair, return_index=True)
+            first = np.sort(first)
+            first = first[~np.isin(pair[first], seen_pairs)]
+            link, neighbour = link[first], neighbour[first]
+            seen_pairs = np.union1d(seen_pairs, pair[first])
+
+            # Newly discovered nodes, in order of first appearance
+            candidates = neighbour[~visited[neighbour]]
+            _, first_seen = np.unique(candidates, return_index=True)
+            new = candidates[np.sort(first_seen)]
+            if max_nodes is not None and n_nodes + new.size > max_nodes:
+                new = new[:max(max_nodes - n_nodes, 0)]
+                truncated = True
+            visited[new] = True
+            n_nodes += new.size
+
+            keep = visited[neighbour]
+            links.append(link[keep])
+            link_levels.append(np.full(int(keep.sum()), level + 1, dtype=np.int64))
+            nodes.append(new)
+            node_levels.append(np.full(new.size, level + 1, dtype=np.int64))
+            frontier = new
+            if truncated:
+                break
+
+        empty = np.zeros(0, dtype=np.int64)
+        return (
+            np.concatenate(nodes),
+            np.concatenate(node_levels),
+            np.concatenate(links) if links else empty,
+            np.concatenate(link_levels) if links else empty,
+            truncated,
+        )
+
+    def links_among(self, nodes: np.ndarray, relations: Optional[Sequence[str]] = None) -> np.ndarray:
+        """
+        Ascending ids of the links (optionally of the given relations) whose source and
+        target are both in `nodes`. Only the outgoing entries of `nodes` are visited.
+        """
+        if relations is None:
+            adjacencies = [self.out_edges]
+        else:
+            adjacencies = [self.out_by_relation[name] for name in relations if name in self.relation_code]
+        nodes = np.asarray(nodes, dtype=np.int64)
+        parts = []
+        for adj in adjacencies:
+            rows, _ = _rows(adj, nodes)
+            parts.append(adj.link[rows][np.isin(adj.neighbour[rows], nodes)])
+        if not parts:
+            return np.zeros(0, dtype=np.int64)
+        return np.sort(np.concatenate(parts))
+
+    def search_labels(self, keywords: Sequence[str], candidates: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Ids of the nodes (among candidates, in their order; default all, ascending) whose
+        label contains every keyword, case-insensitively. Each keyword is one vectorised
+        substring search over the labels still matching the keywords before it.
+        """
+        ids = np.arange(len(self), dtype=np.int64) if candidates is None else np.asarray(candidates, np.int64)
+        labels = self.labels_lower if candidates is None else self.labels_lower[ids]
+        for keyword in keywords:
+            hit = np.strings.find(labels, keyword.lower()) >= 0
+            ids, labels = ids[hit], labels[hit]
+        return ids
+
+    # ==========
+    # Serialisation
+    # ==========
+
+    @classmethod
+    def from_index(
+        cls,
+        version: str,
+        raw: Dict[str, Any],
+        node_fields: Optional[List[Optional[Dict[str, Any]]]] = None,
+    ) -> "SDKGGraph":
+        """
+        Build from the parsed sdkg_index.json ({"nodes": [...], "links": [...]}).
+        title / summary / support / time come from the index nodes, or from node_fields
+        (one node_index_fields dict or None per node) when given.
+        """
+        if not isinstance(raw, dict) or "nodes" not in raw or "links" not in raw:
+            raise ValueError("SD-KG index JSON must contain 'nodes' and 'links'")
+
+        type_code = {name: i for i, name in enumerate(NODE_TYPES)}
+        node_ids: List[str] = []
+        node_type: List[int] = []
+        labels: List[str] = []
+        support: List[float] = []
+        time: List[float] = []
+        titles: List[str] = []
+        summaries: List[str] = []
+        for k, node in enumerate(raw["nodes"]):
+            if node["type"] not in type_code:
+                raise ValueError(f"Unsupported SD-KG node type: {node['type']}")
+            node_ids.append(node["id"])
+            node_type.append(type_code[node["type"]])
+            labels.append(node["label"])
+            # Fields written into the index by the update pipeline, or read from the node store
+            extra = node if node_fields is None else (node_fields[k] or {})
+            support.append(np.nan if extra.get("support") is None else float(extra["support"]))
+            time.append(np.nan if extra.get("time") is None else float(extra["time"]))
+            titles.append(extra.get("title") or node["label"])
+            summaries.append(extra.get("summary") or "")
+        node_index = {node_id: i for i, node_id in enumerate(node_ids)}
+
+        # Known relations keep fixed codes; others are appended in order of appearance
+        relations = list(RELATIONS)
+        relation_code = {name: i for i, name in enumerate(relations)}
+        source: List[int] = []
+        target: List[int] = []
+        relation: List[int] = []
+        dropped = 0
+        for link in raw["links"]:
+            s, t = node_index.get(link["source"]), node_index.get(link["target"])
+            if s is None or t is None:
+                dropped += 1
+                continue
+            name = link.get("relation")
+            if name is not None and name not in relation_code:
+                relation_code[name] = len(relations)
+                relations.append(name)
+            source.append(s)
+            target.append(t)
+            relation.append(relation_code[name] if name is not None else -1)
+        if dropped:
+            logger.warning("Dropped %d SD-KG links with unknown endpoints", dropped)
+
+        return cls(
+            version, node_ids, np.array(node_type, dtype=np.int8), labels,
+            np.array(source, dtype=np.int64), np.array(target, dtype=np.int64),
+            np.array(relation, dtype=np.int16), relations,
+            np.array(support, dtype=np.float64), np.array(time, dtype=np.float64),
+            titles, summaries,
+        )
+
+    def save_snapshot(self, path: str) -> None:
+        """Write the graph as a .npz snapshot (temp file swapped in atomically)."""
+        strings = {
+            name: _pack_strings(values)
+            for name, values in (
+                ("node_ids", self.node_ids),
+                ("labels", self.labels),
+                ("relations", self.relations),
+                ("titles", self.titles),
+                ("summaries", self.summaries),
+            )
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                format_version=np.array(SNAPSHOT_FORMAT_VERSION),
+                node_type=self.node_type,
+                link_source=self.link_source,
+                link_target=self.link_target,
+                link_relation=self.link_relation,
+                node_support=self.node_support,
+                node_time=self.node_time,
+                **{f"{name}_data": data for name, (data, _) in strings.items()},
+                **{f"{name}_offsets": offsets for name, (_, offsets) in strings.items()},
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load_snapshot(cls, version: str, path: Path) -> "SDKGGraph":
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["format_version"]) != SNAPSHOT_FORMAT_VERSION:
+                raise ValueError(f"Unsupported SD-KG snapshot version: {path}")
+            def strings(name: str) -> List[str]:
+                return _unpack_strings(data[f"{name}_data"], data[f"{name}_offsets"])
+
+            return cls(
+                version,
+                strings("node_ids"),
+                data["node_type"],
+                strings("labels"),
+                data["link_source"],
+                data["link_target"],
+                data["link_relation"],
+                strings("relations"),
+                data["node_support"],
+                data["node_time"],
+                strings("titles"),
+                strings("summaries"),
+            )
+
+
+def _file_version(path: Path) -> str:
+    """Version tag of the index file: changes whenever it is rewritten."""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"SD-KG index not found: {path}")
+    return f"{path.suffix.lstrip('.')}:{stat.st_mtime_ns}-{stat.st_size}"
+
+
+# ==========
+# Resident Graph Store
+# ==========
+
+class SDKGGraphStore:
+    """
+    Process-wide holder of the current SDKGGraph, reloaded when the index file changes
+    (e.g. after the update pipeline has published a new knowledge graph).
+
+    For index files without the per-node fields (title, summary, support, time), the
+    node documents in the node store are read once per load instead.
+    """
+
+    def __init__(self, path: str, snapshot_path: Optional[str] = None, nodes: Optional[NodeStore] = None):
+        self.path = Path(path)
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self.nodes = nodes
+        self._graph: Optional[SDKGGraph] = None
+        self._lock = threading.Lock()
+
+    def _source(self) -> Path:
+        if self.snapshot_path is None or not self.snapshot_path.exists():
+            return self.path
+        try:
+            if self.path.stat().st_mtime_ns > self.snapshot_path.stat().st_mtime_ns:
+                return self.path
+        except FileNotFoundError:
+            pass
+        return self.snapshot_path
+
+    def current(self) -> SDKGGraph:
+        """Return the loaded graph, reloading it first if the index file has changed."""
+        source = self._source()
+        version = _file_version(source)
+        graph = self._graph
+        if graph is not None and graph.version == version:
+            return graph
+
+        with self._lock:
+            if self._graph is None or self._graph.version != version:
+                self._graph = self._load(source, version)
+            return self._graph
+
+    def _load(self, source: Path, version: str) -> SDKGGraph:
+        graph = None
+        if source == self.snapshot_path:
+            try:
+                graph = SDKGGraph.load_snapshot(version, source)
+            except (KeyError, ValueError) as e:
+                # Snapshot of another format: rebuild from the JSON, keeping the version
+                # tag so the same snapshot is not retried on every request
+                logger.warning("Ignoring SD-KG snapshot %s: %s", source, e)
+                source = self.path
+        if graph is None:
+            with source.open("r", encoding="utf-8") as f:
+                raw = json.load(f)
+            node_fields = None
+            has_fields = any("summary" in node for node in raw.get("nodes", []))
+            if not has_fields and self.nodes is not None:
+                node_fields = load_node_fields(self.nodes, [node["id"] for node in raw["nodes"]])
+            graph = SDKGGraph.from_index(version, raw, node_fields)
+        logger.info(
+            "Loaded SD-KG graph: %d nodes / %d links from %s (version %s)",
+            len(graph), graph.num_links, source, version,
+        )
+        return graph
+
+
+sdkg_store = SDKGGraphStore(
+    settings.SDKG_INDEX_JSON_PATH, settings.SDKG_GRAPH_SNAPSHOT_PATH, node_store
+)
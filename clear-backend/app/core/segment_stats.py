@@ -0,0 +1,137 @@
+# app/core/segment_stats.py
+from __future__ import annotations
+
+from typing import Dict
+
+import numpy as np
+
+from app.core.geometry import haversine_m
+
+# Per-segment kinematic statistics, one float64 column each (NaN where undefined):
+# SOG in knots, COG and turns in degrees, time in seconds, distances in metres.
+STAT_COLUMNS = (
+    "duration_s",
+    "sog_mean",
+    "sog_p95",
+    "sog_max",
+    "sog_var",
+    "cog_mean",
+    "total_turn_deg",
+    "turn_rate_deg_s",
+    "path_length_m",
+    "straight_line_ratio",
+)
+
+
+def _grouped_percentile(values: np.ndarray, group: np.ndarray, n_groups: int, q: float) -> np.ndarray:
+    """
+    q-th percentile (0-100, linear interpolation like np.percentile) of the non-NaN
+    values of every group; NaN for groups without values.
+    """
+    valid = ~np.isnan(values)
+    values, group = values[valid], group[valid]
+    order = np.lexsort((values, group))
+    values = values[order]
+    count = np.bincount(group, minlength=n_groups)
+    first = np.cumsum(count) - count
+
+    result = np.full(n_groups, np.nan)
+    has = count > 0
+    position = (count[has] - 1) * (q / 100.0)
+    below = np.floor(position).astype(np.int64)
+    above = np.minimum(below + 1, count[has] - 1)
+    lo, hi = values[first[has] + below], values[first[has] + above]
+    result[has] = lo + (hi - lo) * (position - below)
+    return result
+
+
+def compute_segment_stats(
+    timestamp: np.ndarray,
+    lon: np.ndarray,
+    lat: np.ndarray,
+    sog: np.ndarray,
+    cog: np.ndarray,
+    offsets: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    """
+    STAT_COLUMNS for every segment of CSR point columns (segment i owns rows
+    offsets[i]:offsets[i + 1], in time order), all segments in one vectorised pass.
+
+    - sog_*: over the fixes reporting a SOG; sog_var is the population variance.
+    - cog_mean: circular mean of the reported COGs.
+    - total_turn_deg: sum of absolute COG changes between consecutive reporting fixes
+      (each wrapped to [-180, 180]); turn_rate_deg_s = total_turn_deg / duration_s.
+    - straight_line_ratio: first-to-last displacement / travelled path (1 = straight).
+    """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    n = offsets.size - 1
+    counts = np.diff(offsets)
+    point_segment = np.repeat(np.arange(n, dtype=np.int64), counts)
+    has_points = counts > 0
+    first, last = offsets[:-1][has_points], offsets[1:][has_points] - 1
+
+    def empty() -> np.ndarray:
+        return np.full(n, np.nan)
+
+    def per_segment_sum(values: np.ndarray, group: np.ndarray) -> np.ndarray:
+        # bincount returns int64 for empty input; NaN is assigned into these sums later
+        return np.bincount(group, weights=values, minlength=n).astype(np.float64)
+
+    timestamp = np.asarray(timestamp, dtype=np.float64)
+    duration = empty()
+    duration[has_points] = timestamp[last] - timestamp[first]
+
+    # Speed over ground
+    sog = np.asarray(sog, dtype=np.float64)
+    has_sog = ~np.isnan(sog)
+    sog_count = np.bincount(point_segment[has_sog], minlength=n)
+    sog_sum = per_segment_sum(sog[has_sog], point_segment[has_sog])
+    sog_sq = per_segment_sum(sog[has_sog] ** 2, point_segment[has_sog])
+    sog_max = empty()
+    np.fmax.at(sog_max, point_segment[has_sog], sog[has_sog])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sog_mean = np.where(sog_count > 0, sog_sum / sog_count, np.nan)
+        sog_var = np.maximum(np.where(sog_count > 0, sog_sq / sog_count - sog_mean ** 2, np.nan), 0.0)
+
+    # Course over ground
+    cog = np.asarray(cog, dtype=np.float64)
+    has_cog = ~np.isnan(cog)
+    radians = np.radians(cog[has_cog])
+    sin_sum = per_segment_sum(np.sin(radians), point_segment[has_cog])
+    cos_sum = per_segment_sum(np.cos(radians), point_segment[has_cog])
+    cog_count = np.bincount(point_segment[has_cog], minlength=n)
+    cog_mean = np.where(cog_count > 0, np.degrees(np.arctan2(sin_sum, cos_sum)) % 360.0, np.nan)
+
+    # Turning: consecutive reporting fixes of the same segment
+    cog_rows = np.flatnonzero(has_cog)
+    same = point_segment[cog_rows[1:]] == point_segment[cog_rows[:-1]]
+    turn = (np.diff(cog[cog_rows])[same] + 180.0) % 360.0 - 180.0
+    total_turn = per_segment_sum(np.abs(turn), point_segment[cog_rows[1:]][same])
+    total_turn[cog_count == 0] = np.nan
+    with np.errstate(invalid="ignore", divide="ignore"):
+        turn_rate = np.where(duration > 0, total_turn / duration, np.nan)
+
+    # Path and displacement
+    lon = np.asarray(lon, dtype=np.float64)
+    lat = np.asarray(lat, dtype=np.float64)
+    same = point_segment[1:] == point_segment[:-1]
+    step = haversine_m(lon[:-1][same], lat[:-1][same], lon[1:][same], lat[1:][same])
+    path_length = per_segment_sum(step, point_segment[1:][same])
+    path_length[~has_points] = np.nan
+    displacement = empty()
+    displacement[has_points] = haversine_m(lon[first], lat[first], lon[last], lat[last])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        straight = np.where(path_length > 0, displacement / path_length, np.nan)
+
+    return {
+        "duration_s": duration,
+        "sog_mean": sog_mean,
+        "sog_p95": _grouped_percentile(sog, point_segment, n, 95.0),
+        "sog_max": sog_max,
+        "sog_var": sog_var,
+        "cog_mean": cog_mean,
+        "total_turn_deg": total_turn,
+        "turn_rate_deg_s": turn_rate,
+        "path_length_m": path_length,
+        "straight_line_ratio": straight,
+    }
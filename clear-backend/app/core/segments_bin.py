@@ -0,0 +1,191 @@
+# app/core/segments_bin.py
+"""
+Binary columnar trajectory file (segments.bin), written by the update pipeline next to
+segments.json and memory-mapped by the trajectory store.
+
+Layout:
+    b"CLEARSEG" | uint32 format version | uint32 header length | header JSON | arrays
+The header maps every array name to its dtype, shape and byte offset; arrays start on
+64-byte boundaries so each one can be mapped directly with np.memmap. Strings (segment,
+trajectory and vessel ids, vessel types, descriptions) live in one deduplicated UTF-8
+table and segments refer to them by index (-1 = None).
+"""
+from __future__ import annotations
+
+import json
+import os
+import struct
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.geometry import douglas_peucker_importance, lonlat_to_mercator
+from app.core.segment_stats import STAT_COLUMNS, compute_segment_stats
+from app.core.time_index import to_epoch_seconds
+
+if TYPE_CHECKING:
+    from app.core.trajectory_store import PointColumns, Segment
+
+MAGIC = b"CLEARSEG"
+# 2: segment_start / segment_end are float64 POSIX seconds; ref_* and stat_* are required
+FORMAT_VERSION = 2
+_ALIGN = 64
+_PREAMBLE = struct.Struct("<8sII")
+
+# Point columns (one row per AIS fix) in PointColumns field order
+POINT_COLUMNS = ("timestamp", "lat", "lon", "sog", "cog")
+# Derived per-point arrays precomputed at write time so workers never recompute them
+DERIVED_COLUMNS = ("point_x", "point_y", "lod_importance")
+# Per-segment kinematic statistics, stored as stat_<name>
+STAT_PREFIX = "stat_"
+# Per-segment string references into the string table
+_STRING_REFS = ("id", "trajectory_id", "vessel_id", "vessel_type", "short_description")
+
+
+def _align(position: int) -> int:
+    return -(-position // _ALIGN) * _ALIGN
+
+
+def _data_start(header_len: int) -> int:
+    return _align(_PREAMBLE.size + header_len)
+
+
+class _StringTable:
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+
+    def ref(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        if value not in self.index:
+            self.index[value] = len(self.index)
+        return self.index[value]
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        encoded = [s.encode("utf-8") for s in self.index]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(b) for b in encoded], dtype=np.int64)
+        return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def write_segments_bin(path: str, segments: List[Segment], points: PointColumns) -> None:
+    """
+    Write segments (trajectory-major order, as produced by the trajectory store's parser)
+    and their point columns. The file is written to a temp path and swapped in atomically.
+    """
+    strings = _StringTable()
+    refs = {name: np.array([strings.ref(getattr(s, name)) for s in segments], dtype=np.int32)
+            for name in _STRING_REFS}
+    string_data, string_offsets = strings.arrays()
+
+    point_x, point_y = lonlat_to_mercator(points.lon, points.lat)
+    arrays: Dict[str, np.ndarray] = {
+        "offsets": points.offsets.astype(np.int64),
+        **{name: getattr(points, name) for name in POINT_COLUMNS},
+        "point_x": point_x,
+        "point_y": point_y,
+        "lod_importance": douglas_peucker_importance(point_x, point_y, points.offsets),
+        # POSIX seconds, computed exactly like the JSON load path
+        "segment_start": np.array([to_epoch_seconds(s.start_time) for s in segments], dtype=np.float64),
+        "segment_end": np.array([to_epoch_seconds(s.end_time) for s in segments], dtype=np.float64),
+        "segment_imputed": np.array([s.imputed for s in segments], dtype=np.uint8),
+        **{f"{STAT_PREFIX}{name}": column for name, column in compute_segment_stats(
+            points.timestamp, points.lon, points.lat, points.sog, points.cog, points.offsets
+        ).items()},
+        **{f"ref_{name}": ref for name, ref in refs.items()},
+        "string_data": string_data,
+        "string_offsets": string_offsets,
+    }
+
+    # Lay out the arrays after the header, each on an aligned offset
+    header: Dict[str, Dict] = {"arrays": {}}
+    layout = []
+    position = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        position = _align(position)
+        header["arrays"][name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": position}
+        layout.append((position, array))
+        position += array.nbytes
+
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_start = _data_start(len(header_bytes))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for offset, array in layout:
+            f.seek(data_start + offset)
+            f.write(array.tobytes())
+    os.replace(tmp_path, path)
+
+
+def read_segments_bin(path: Path) -> Tuple[List[Segment], PointColumns, Dict[str, np.ndarray]]:
+    """
+    Map a segments.bin file. Returns Segment metadata, memory-mapped point columns and
+    the memory-mapped derived arrays (DERIVED_COLUMNS and the stat_* columns). Raises
+    ValueError if the file is not a segments file of this format version or lacks one
+    of its arrays. The OS page cache behind the maps is shared between all worker
+    processes serving the same file.
+    """
+    # Runtime import: trajectory_store imports this module
+    from app.core.trajectory_store import PointColumns, Segment
+
+    with path.open("rb") as f:
+        magic, version, header_len = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+        if magic != MAGIC:
+            raise ValueError(f"Not a CLEAR segments file: {path}")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported segments file version {version}: {path}")
+        header = json.loads(f.read(header_len))
+    data_start = _data_start(header_len)
+
+    def array(name: str) -> np.ndarray:
+        spec = header["arrays"].get(name)
+        if spec is None:
+            raise ValueError(f"Segments file lacks array {name!r}: {path}")
+        dtype, shape = np.dtype(spec["dtype"]), tuple(spec["shape"])
+        if int(np.prod(shape)) == 0:
+            # np.memmap refuses zero-length maps
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r", offset=data_start + spec["offset"], shape=shape)
+
+    string_data = bytes(array("string_data"))
+    string_offsets = array("string_offsets").tolist()
+    strings = [
+        string_data[string_offsets[i]:string_offsets[i + 1]].decode("utf-8")
+        for i in range(len(string_offsets) - 1)
+    ]
+
+    def lookup(ref: int) -> Optional[str]:
+        return strings[ref] if ref >= 0 else None
+
+    offsets = array("offsets")
+    counts = np.diff(offsets).tolist()
+    starts = array("segment_start").tolist()
+    ends = array("segment_end").tolist()
+    imputed = array("segment_imputed").tolist()
+    refs = {name: array(f"ref_{name}").tolist() for name in _STRING_REFS}
+
+    # model_construct: the values were validated when the file was written
+    segments = [
+        Segment.model_construct(
+            id=lookup(refs["id"][i]),
+            trajectory_id=lookup(refs["trajectory_id"][i]),
+            vessel_id=lookup(refs["vessel_id"][i]),
+            vessel_type=lookup(refs["vessel_type"][i]),
+            start_time=datetime.fromtimestamp(starts[i], tz=timezone.utc),
+            end_time=datetime.fromtimestamp(ends[i], tz=timezone.utc),
+            short_description=lookup(refs["short_description"][i]),
+            imputed=bool(imputed[i]),
+            num_points=counts[i],
+        )
+        for i in range(len(counts))
+    ]
+    points = PointColumns(offsets=offsets, **{name: array(name) for name in POINT_COLUMNS})
+    derived = {name: array(name) for name in DERIVED_COLUMNS}
+    derived.update({f"{STAT_PREFIX}{name}": array(f"{STAT_PREFIX}{name}") for name in STAT_COLUMNS})
+    return segments, points, derived
@@ -0,0 +1,125 @@
+# app/core/spatial_index.py
+from __future__ import annotations
+
+import math
+from typing import Tuple
+
+import numpy as np
+
+BBox = Tuple[float, float, float, float]
+
+
+def parse_bbox(value: str) -> BBox:
+    """
+    'min_lon,min_lat,max_lon,max_lat' -> BBox; ValueError if malformed, not finite,
+    outside lon [-180, 180] / lat [-90, 90], or inverted.
+    """
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(v) for v in value.split(","))
+    except ValueError:
+        raise ValueError("bbox must be 'min_lon,min_lat,max_lon,max_lat'")
+    # float() accepts nan / inf, which would slip past the comparisons below
+    if not all(math.isfinite(v) for v in (min_lon, min_lat, max_lon, max_lat)) or not (
+        -180.0 <= min_lon and max_lon <= 180.0 and -90.0 <= min_lat and max_lat <= 90.0
+    ):
+        raise ValueError("bbox must be 'min_lon,min_lat,max_lon,max_lat'")
+    if min_lon > max_lon or min_lat > max_lat:
+        raise ValueError("bbox min values must not exceed max values")
+    return min_lon, min_lat, max_lon, max_lat
+
+
+class SegmentGrid:
+    """
+    Uniform lon/lat grid over segment envelopes (a light-weight alternative to an R-tree).
+
+    Every segment is registered in each cell its bounding box touches. The cell -> segments
+    mapping is stored CSR-style (cell_ptr / cell_items) so a query only gathers the cells
+    overlapping the viewport and then runs an exact envelope test on those candidates.
+    """
+
+    def __init__(
+        self,
+        min_lon: np.ndarray,
+        min_lat: np.ndarray,
+        max_lon: np.ndarray,
+        max_lat: np.ndarray,
+        target_per_cell: int = 8,
+        max_cells_per_axis: int = 512,
+    ):
+        self.min_lon = min_lon
+        self.min_lat = min_lat
+        self.max_lon = max_lon
+        self.max_lat = max_lat
+
+        valid = np.flatnonzero(~np.isnan(min_lon))
+        if valid.size == 0:
+            self.nx = self.ny = 0
+            self.cell_ptr = np.zeros(1, dtype=np.int64)
+            self.cell_items = np.zeros(0, dtype=np.int64)
+            return
+
+        self.x0 = float(min_lon[valid].min())
+        self.y0 = float(min_lat[valid].min())
+        width = max(float(max_lon[valid].max()) - self.x0, 1e-9)
+        height = max(float(max_lat[valid].max()) - self.y0, 1e-9)
+
+        # Aim for ~target_per_cell segments per cell, keeping cells roughly square
+        n_cells = max(1, valid.size // target_per_cell)
+        nx = int(np.ceil(np.sqrt(n_cells * width / height)))
+        ny = int(np.ceil(n_cells / nx))
+        self.nx = min(max(nx, 1), max_cells_per_axis)
+        self.ny = min(max(ny, 1), max_cells_per_axis)
+        self.cell_w = width / self.nx
+        self.cell_h = height / self.ny
+
+        ix0, iy0 = self._cell_of(min_lon[valid], min_lat[valid])
+        ix1, iy1 = self._cell_of(max_lon[valid], max_lat[valid])
+
+        # Expand each segment into the (ix, iy) cells covered by its envelope
+        span_x = ix1 - ix0 + 1
+        counts = span_x * (iy1 - iy0 + 1)
+        total = int(counts.sum())
+        first = np.repeat(np.cumsum(counts) - counts, counts)
+        local = np.arange(total, dtype=np.int64) - first
+        cx = np.repeat(ix0, counts) + local % np.repeat(span_x, counts)
+        cy = np.repeat(iy0, counts) + local // np.repeat(span_x, counts)
+        cells = cy * self.nx + cx
+
+        order = np.argsort(cells, kind="stable")
+        self.cell_items = np.repeat(valid, counts)[order]
+        self.cell_ptr = np.searchsorted(
+            cells[order], np.arange(self.nx * self.ny + 1, dtype=np.int64)
+        )
+
+    def _cell_of(self, lon: np.ndarray, lat: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        ix = np.clip(((lon - self.x0) / self.cell_w).astype(np.int64), 0, self.nx - 1)
+        iy = np.clip(((lat - self.y0) / self.cell_h).astype(np.int64), 0, self.ny - 1)
+        return ix, iy
+
+    def query(self, bbox: BBox) -> np.ndarray:
+        """Return the sorted indices of segments whose envelope intersects bbox."""
+        if self.nx == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        min_lon, min_lat, max_lon, max_lat = bbox
+        (ix0, ix1), (iy0, iy1) = self._cell_of(
+            np.array([min_lon, max_lon]), np.array([min_lat, max_lat])
+        )
+        cells = (
+            np.arange(iy0, iy1 + 1, dtype=np.int64)[:, None] * self.nx
+            + np.arange(ix0, ix1 + 1, dtype=np.int64)[None, :]
+        ).ravel()
+
+        starts = self.cell_ptr[cells]
+        lengths = self.cell_ptr[cells + 1] - starts
+        total = int(lengths.sum())
+        offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        candidates = np.unique(self.cell_items[offsets + np.arange(total, dtype=np.int64)])
+
+        hit = (
+            (self.min_lon[candidates] <= max_lon)
+            & (self.max_lon[candidates] >= min_lon)
+            & (self.min_lat[candidates] <= max_lat)
+            & (self.max_lat[candidates] >= min_lat)
+        )
+        return candidates[hit]
@@ -0,0 +1,55 @@
+# app/core/time_index.py
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Optional
+
+import numpy as np
+
+
+def to_epoch_seconds(value: datetime) -> float:
+    """
+    datetime -> POSIX seconds; naive datetimes are taken as UTC like the AIS timestamps.
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class IntervalIndex:
+    """
+    Static index over [start, end] intervals (e.g. segment time spans, POSIX seconds).
+
+    Intervals are sorted by start; alongside, the running maximum of their ends is kept.
+    Both arrays are monotonic, so the range of intervals that can overlap a query window
+    is found with two binary searches:
+    - everything after the last start <= window end begins too late;
+    - everything before the first running-max end >= window start has already ended.
+    Only the intervals in between are checked one by one.
+    """
+
+    def __init__(self, starts: np.ndarray, ends: np.ndarray):
+        self.order = np.argsort(starts, kind="stable")
+        self.sorted_start = np.asarray(starts, dtype=np.float64)[self.order]
+        self.sorted_end = np.asarray(ends, dtype=np.float64)[self.order]
+        self.max_end = (
+            np.maximum.accumulate(self.sorted_end) if self.sorted_end.size else self.sorted_end
+        )
+
+    def __len__(self) -> int:
+        return self.order.size
+
+    def overlapping(self, start: Optional[float] = None, end: Optional[float] = None) -> np.ndarray:
+        """
+        Ascending ids of the intervals with end >= start and start <= end
+        (an open side of the window is unbounded).
+        """
+        lo = 0 if start is None else int(np.searchsorted(self.max_end, start, side="left"))
+        hi = self.order.size if end is None else int(np.searchsorted(self.sorted_start, end, side="right"))
+        if lo >= hi:
+            return np.zeros(0, dtype=np.int64)
+
+        hits = self.order[lo:hi]
+        if start is not None:
+            hits = hits[self.sorted_end[lo:hi] >= start]
+        return np.sort(hits)
@@ -0,0 +1,658 @@
+# app/core/trajectory_store.py
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import warnings
+from datetime import datetime
+from itertools import groupby
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from app.core.config import settings
+from app.core.geometry import douglas_peucker_importance, initial_bearing, lonlat_to_mercator, points_in_polygons
+from app.core.gap_index import GapIndex
+from app.core.node_store import NodeStore, node_store
+from app.core.segment_stats import STAT_COLUMNS, compute_segment_stats
+from app.core.segments_bin import STAT_PREFIX, read_segments_bin
+from app.core.spatial_index import BBox, SegmentGrid
+from app.core.time_index import IntervalIndex, to_epoch_seconds
+from app.core.vessel_table import VesselTable, build_vessel_table
+
+logger = logging.getLogger(__name__)
+
+
+# ==========
+# Internal Data Models
+# ==========
+
+class Segment(BaseModel):
+    """
+    Basic unit in CLEAR: a trajectory segment.
+    Only metadata lives here; the AIS points are rows of the dataset's point columns.
+    """
+    id: str
+    trajectory_id: str
+    vessel_id: Optional[str] = None
+    vessel_type: Optional[str] = None
+    start_time: datetime
+    end_time: datetime
+    short_description: Optional[str] = None
+    imputed: bool = Field(False, description="True if the points were imputed rather than observed")
+    num_points: int = 0
+
+
+class Trajectory(BaseModel):
+    """A trajectory consisting of multiple segments"""
+    id: str
+    vessel_id: Optional[str] = None
+    segments: List[Segment]
+    start_time: datetime
+    end_time: datetime
+    num_points: int
+
+
+class PointColumns(NamedTuple):
+    """
+    Struct-of-arrays storage of all AIS points of a dataset.
+    Segment i owns rows offsets[i]:offsets[i + 1], ordered by time; sog/cog are NaN when missing.
+    """
+    offsets: np.ndarray    # int64, n_segments + 1
+    timestamp: np.ndarray  # int64, POSIX seconds
+    lat: np.ndarray        # float64
+    lon: np.ndarray        # float64
+    sog: np.ndarray        # float64, knots
+    cog: np.ndarray        # float64, degrees
+
+
+# ==========
+# Utility Functions: Read segments from JSON into Segment metadata + point columns
+# ==========
+
+def _load_raw_segments(path: Path) -> List[Dict[str, Any]]:
+    """
+    Read the raw segment list (dict) from a JSON file without conversion.
+    """
+    if not path.exists():
+        raise FileNotFoundError(f"Segments JSON not found: {path}")
+
+    with path.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    if not isinstance(data, list):
+        raise ValueError("Segments JSON must be a list of objects")
+    return data
+
+
+def _parse_timestamps(values: List[str]) -> np.ndarray:
+    """
+    ISO-8601 strings -> int64 POSIX seconds.
+    The 'Z' suffix written by the update pipeline is stripped so NumPy can parse the whole
+    column at once; anything else (e.g. explicit UTC offsets) falls back to fromisoformat.
+    """
+    try:
+        stripped = [v[:-1] if v.endswith("Z") else v for v in values]
+        with warnings.catch_warnings():
+            # NumPy only warns about (deprecated) offset parsing; take the exact path instead
+            warnings.simplefilter("error")
+            return np.array(stripped, dtype="datetime64[ms]").astype(np.int64) // 1000
+    except (ValueError, UserWarning, DeprecationWarning):
+        return np.array(
+            [int(to_epoch_seconds(datetime.fromisoformat(v.replace("Z", "+00:00")))) for v in values],
+            dtype=np.int64,
+        )
+
+
+def _trajectory_major_order(segments: List[Segment]) -> List[int]:
+    """
+    Segment order used by the dataset: trajectories by start time, and within a
+    trajectory its segments by start time.
+    """
+    by_traj: Dict[str, List[int]] = {}
+    for i, seg in enumerate(segments):
+        by_traj.setdefault(seg.trajectory_id, []).append(i)
+
+    groups = [sorted(idx, key=lambda i: segments[i].start_time) for idx in by_traj.values()]
+    groups.sort(key=lambda g: segments[g[0]].start_time)
+    return [i for g in groups for i in g]
+
+
+def parse_segments(raw_segments: List[Dict[str, Any]]) -> Tuple[List[Segment], PointColumns]:
+    """
+    JSON -> Segment metadata (trajectory-major order) + point columns.
+    Point fields go straight into their column; no per-point model is built.
+    """
+    segments: List[Segment] = []
+    for item in raw_segments:
+        # Only take the fields we care about to avoid errors from extra keys in JSON
+        segments.append(
+            Segment(
+                id=item["id"],
+                trajectory_id=item["trajectory_id"],
+                vessel_id=item.get("vessel_id"),
+                vessel_type=item.get("vessel_type"),
+                start_time=item["start_time"],
+                end_time=item["end_time"],
+                short_description=item.get("short_description"),
+                imputed=item.get("imputed", False),
+                num_points=len(item.get("points") or []),
+            )
+        )
+
+    order = _trajectory_major_order(segments)
+    segments = [segments[i] for i in order]
+    points = [p for i in order for p in raw_segments[i].get("points") or []]
+
+    offsets = np.zeros(len(segments) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([s.num_points for s in segments], dtype=np.int64)
+    columns = PointColumns(
+        offsets=offsets,
+        timestamp=_parse_timestamps([p["timestamp"] for p in points]),
+        lat=np.array([p["lat"] for p in points], dtype=np.float64),
+        lon=np.array([p["lon"] for p in points], dtype=np.float64),
+        # None -> NaN
+        sog=np.array([p.get("sog") for p in points], dtype=np.float64),
+        cog=np.array([p.get("cog") for p in points], dtype=np.float64),
+    )
+    return segments, _sort_points_by_time(columns)
+
+
+def _sort_points_by_time(columns: PointColumns) -> PointColumns:
+    """
+    Make every segment's rows time-ordered (the update pipeline already writes them sorted).
+    """
+    owner = np.repeat(np.arange(columns.offsets.size - 1), np.diff(columns.offsets))
+    in_order = (np.diff(columns.timestamp) >= 0) | (np.diff(owner) != 0)
+    if in_order.all():
+        return columns
+
+    order = np.lexsort((columns.timestamp, owner))
+    return columns._replace(
+        **{name: getattr(columns, name)[order] for name in ("timestamp", "lat", "lon", "sog", "cog")}
+    )
+
+
+def _build_trajectories(segments: List[Segment]) -> List[Trajectory]:
+    """
+    Aggregate consecutive Segments (trajectory-major order) -> Trajectory
+    """
+    trajectories: List[Trajectory] = []
+
+    for traj_id, group in groupby(segments, key=lambda s: s.trajectory_id):
+        segs = list(group)
+        trajectories.append(
+            Trajectory(
+                id=traj_id,
+                vessel_id=next((s.vessel_id for s in segs if s.vessel_id), None),
+                segments=segs,
+                start_time=min(s.start_time for s in segs),
+                end_time=max(s.end_time for s in segs),
+                num_points=sum(s.num_points for s in segs),
+            )
+        )
+    return trajectories
+
+
+def segment_reduce(ufunc: np.ufunc, values: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """
+    Per-segment reduction (e.g. np.minimum) of a flat point array; NaN for empty segments.
+    """
+    counts = np.diff(offsets)
+    result = np.full(counts.size, np.nan)
+    non_empty = counts > 0
+    if non_empty.any():
+        result[non_empty] = ufunc.reduceat(values, offsets[:-1][non_empty])
+    return result
+
+
+def segment_searchsorted(
+    values: np.ndarray, lo: np.ndarray, hi: np.ndarray, target: Union[float, np.ndarray]
+) -> np.ndarray:
+    """
+    For every range values[lo[k]:hi[k]] (each sorted ascending), the first index whose
+    value is > target (or target[k]; hi[k] if none). All ranges are bisected together,
+    one NumPy step per halving, so the cost is O(log(longest range)) vectorised passes.
+    """
+    lo = np.asarray(lo, dtype=np.int64).copy()
+    hi = np.asarray(hi, dtype=np.int64).copy()
+    target = np.broadcast_to(target, lo.shape)
+    open_ = lo < hi
+    while open_.any():
+        mid = (lo + hi) // 2
+        right = np.zeros(lo.size, dtype=bool)
+        right[open_] = values[mid[open_]] <= target[open_]
+        lo = np.where(open_ & right, mid + 1, lo)
+        hi = np.where(open_ & ~right, mid, hi)
+        open_ = lo < hi
+    return lo
+
+
+def _lerp_angle(a: np.ndarray, b: np.ndarray, f: np.ndarray, period: float = 360.0) -> np.ndarray:
+    """Interpolate angles along the shorter arc; the result lies in [0, period)."""
+    half = period / 2.0
+    return (a + f * ((b - a + half) % period - half)) % period
+
+
+def _lerp_nan(
+    a: np.ndarray,
+    b: np.ndarray,
+    f: np.ndarray,
+    lerp: Optional[Callable[[np.ndarray, np.ndarray, np.ndarray], np.ndarray]] = None,
+) -> np.ndarray:
+    """Interpolate, falling back to whichever end is known when the other one is NaN."""
+    value = a + f * (b - a) if lerp is None else lerp(a, b, f)
+    return np.where(np.isnan(a), b, np.where(np.isnan(b), a, value))
+
+
+def _file_version(path: Path) -> str:
+    """
+    Version tag of the segments file: changes whenever it is rewritten.
+    """
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Segments file not found: {path}")
+    return f"{path.suffix.lstrip('.')}:{stat.st_mtime_ns}-{stat.st_size}"
+
+
+# ==========
+# Level of Detail
+# ==========
+
+# Zoom levels with a precomputed simplification; a requested zoom is served with the
+# first level at or above it, and from LOD_FULL_DETAIL_ZOOM on raw geometry is returned.
+LOD_ZOOM_LEVELS = (4, 6, 8, 10, 12)
+LOD_FULL_DETAIL_ZOOM = 14
+# Maximum deviation of the simplified line, in screen pixels (256 px tiles)
+LOD_PIXEL_TOLERANCE = 1.0
+
+
+def lod_tolerance(zoom: Optional[float]) -> Optional[float]:
+    """
+    Simplification tolerance (normalised Web Mercator units) for a map zoom; None = full detail.
+    """
+    if zoom is None or zoom >= LOD_FULL_DETAIL_ZOOM:
+        return None
+    level = next((z for z in LOD_ZOOM_LEVELS if z >= zoom), LOD_FULL_DETAIL_ZOOM)
+    if level >= LOD_FULL_DETAIL_ZOOM:
+        return None
+    return LOD_PIXEL_TOLERANCE / (256.0 * 2 ** level)
+
+
+# ==========
+# Resident Trajectory Store
+# ==========
+
+class TrajectoryDataset:
+    """
+    One loaded version of the segments file, with the lookup indexes the API needs.
+    Instances are never mutated after construction, so a request can keep using
+    the dataset it started with even if a reload happens in the meantime.
+    `derived` may carry precomputed point_x / point_y / lod_importance arrays and
+    stat_* columns (e.g. memory-mapped from segments.bin); missing ones are computed here.
+    `vessels` defaults to a table of the vessel types found in the segments.
+    """
+
+    def __init__(
+        self,
+        version: str,
+        segments: List[Segment],
+        points: PointColumns,
+        derived: Optional[Dict[str, np.ndarray]] = None,
+        vessels: Optional[VesselTable] = None,
+    ):
+        derived = derived or {}
+        self.version = version
+        self.trajectories = _build_trajectories(segments)
+        self.trajectory_index: Dict[str, int] = {t.id: i for i, t in enumerate(self.trajectories)}
+
+        # Trajectory-major segment list: sorted segment indices stay grouped by trajectory
+        self.segments = segments
+        self.segments_by_id: Dict[str, Segment] = {seg.id: seg for seg in segments}
+        self.segment_index: Dict[str, int] = {seg.id: i for i, seg in enumerate(segments)}
+        self.trajectory_offsets = np.zeros(len(self.trajectories) + 1, dtype=np.int64)
+        self.trajectory_offsets[1:] = np.cumsum([len(t.segments) for t in self.trajectories], dtype=np.int64)
+        self.segment_trajectory = np.repeat(
+            np.arange(len(self.trajectories), dtype=np.int64), np.diff(self.trajectory_offsets)
+        )
+
+        self.segment_start = np.array([to_epoch_seconds(s.start_time) for s in segments], dtype=np.float64)
+        self.segment_end = np.array([to_epoch_seconds(s.end_time) for s in segments], dtype=np.float64)
+        self.segment_vessel = np.array([s.vessel_id or "" for s in segments], dtype=object)
+        # Segment time spans, searchable by time window
+        self.time_index = IntervalIndex(self.segment_start, self.segment_end)
+
+        # MMSI -> segment indices (ascending)
+        self.vessel_segments: Dict[str, np.ndarray] = {}
+        if segments:
+            vessel_ids, codes = np.unique(self.segment_vessel, return_inverse=True)
+            order = np.argsort(codes, kind="stable")
+            bounds = np.searchsorted(codes[order], np.arange(vessel_ids.size + 1))
+            self.vessel_segments = {
+                vessel: order[bounds[k]:bounds[k + 1]]
+                for k, vessel in enumerate(vessel_ids.tolist()) if vessel
+            }
+
+        # Vessel attributes, plus each segment's dictionary-encoded vessel_type (-1 = unknown)
+        if vessels is None:
+            vessels = build_vessel_table((s.vessel_id, s.vessel_type) for s in segments)
+        self.vessels = vessels
+        self.segment_vessel_type = self.vessels.type_codes_of(self.segment_vessel)
+
+        # Point columns; segment i owns rows segment_offsets[i]:segment_offsets[i + 1]
+        self.segment_offsets = points.offsets
+        self.point_time = points.timestamp
+        self.point_lat = points.lat
+        self.point_lon = points.lon
+        self.point_sog = points.sog
+        self.point_cog = points.cog
+
+        # Reporting gaps inside segments, searchable by duration, time and area
+        self.gap_index = GapIndex(
+            self.point_time, self.point_lon, self.point_lat, self.segment_offsets, settings.GAP_MIN_SECONDS
+        )
+
+        # Kinematic statistics per segment (STAT_COLUMNS), stored by the pipeline or computed here
+        if all(f"{STAT_PREFIX}{name}" in derived for name in STAT_COLUMNS):
+            self.segment_stats = {name: derived[f"{STAT_PREFIX}{name}"] for name in STAT_COLUMNS}
+        else:
+            self.segment_stats = compute_segment_stats(
+                self.point_time, self.point_lon, self.point_lat, self.point_sog, self.point_cog,
+                self.segment_offsets,
+            )
+
+        # Segment envelopes (NaN for segments without points) and the grid built over them
+        self.spatial_index = SegmentGrid(
+            segment_reduce(np.minimum, self.point_lon, self.segment_offsets),
+            segment_reduce(np.minimum, self.point_lat, self.segment_offsets),
+            segment_reduce(np.maximum, self.point_lon, self.segment_offsets),
+            segment_reduce(np.maximum, self.point_lat, self.segment_offsets),
+        )
+
+        # Web Mercator copy of the points (simplification and vector tiles work in it)
+        if "point_x" in derived and "point_y" in derived:
+            self.point_x, self.point_y = derived["point_x"], derived["point_y"]
+        else:
+            self.point_x, self.point_y = lonlat_to_mercator(self.point_lon, self.point_lat)
+
+        # LOD pyramid: one Douglas-Peucker importance per point covers every zoom level,
+        # level z keeps the points with importance > lod_tolerance(z)
+        self.lod_importance = derived.get("lod_importance")
+        if self.lod_importance is None:
+            self.lod_importance = douglas_peucker_importance(self.point_x, self.point_y, self.segment_offsets)
+
+    def segment_points(self, index: int, zoom: Optional[float] = None) -> Union[slice, np.ndarray]:
+        """
+        Rows of one segment in the point columns: a plain slice at full detail,
+        otherwise the row indices kept by the LOD level for the given map zoom.
+        """
+        lo, hi = int(self.segment_offsets[index]), int(self.segment_offsets[index + 1])
+        tolerance = lod_tolerance(zoom)
+        if tolerance is None:
+            return slice(lo, hi)
+        return lo + np.flatnonzero(self.lod_importance[lo:hi] > tolerance)
+
+    def segment_coordinates(self, index: int, zoom: Optional[float] = None) -> np.ndarray:
+        """
+        [[lon, lat], ...] of one segment, simplified for the given map zoom.
+        """
+        points = self.segment_points(index, zoom)
+        return np.column_stack((self.point_lon[points], self.point_lat[points]))
+
+    def query_segments(
+        self,
+        bbox: Optional[BBox] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        vessel_ids: Optional[Sequence[str]] = None,
+        vessel_types: Optional[Sequence[str]] = None,
+        max_time_gap: Optional[float] = None,
+    ) -> np.ndarray:
+        """
+        Indices (into self.segments, ascending) of segments intersecting the bbox,
+        overlapping the [start, end] window, belonging to one of vessel_ids and
+        to a vessel of one of vessel_types. With max_time_gap (seconds), segments
+        spanning a longer time than that are left out, like the map's duration filter.
+        """
+        start_s = to_epoch_seconds(start) if start is not None else None
+        end_s = to_epoch_seconds(end) if end is not None else None
+
+        candidates: Optional[np.ndarray] = None
+        if vessel_ids:
+            candidates = self.vessel_segment_indices(vessel_ids)
+        if bbox is not None:
+            in_bbox = self.spatial_index.query(bbox)
+            candidates = in_bbox if candidates is None else np.intersect1d(candidates, in_bbox, assume_unique=True)
+
+        time_filtered = False
+        if candidates is None:
+            if start_s is None and end_s is None:
+                candidates = np.arange(len(self.segments), dtype=np.int64)
+            else:
+                # Nothing narrower to start from: the time index touches only overlapping segments
+                candidates = self.time_index.overlapping(start_s, end_s)
+                time_filtered = True
+
+        mask = np.ones(candidates.size, dtype=bool)
+        if start_s is not None and not time_filtered:
+            mask &= self.segment_end[candidates] >= start_s
+        if end_s is not None and not time_filtered:
+            mask &= self.segment_start[candidates] <= end_s
+
+        if max_time_gap is not None:
+            mask &= self.segment_end[candidates] - self.segment_start[candidates] <= max_time_gap
+        if vessel_types:
+            mask &= np.isin(self.segment_vessel_type[candidates], self.vessels.codes_for_types(vessel_types))
+        return candidates[mask]
+
+    def segment_rows(self, segment_idx: np.ndarray) -> np.ndarray:
+        """
+        Point-column rows of all given segments, concatenated in segment order.
+        """
+        segment_idx = np.asarray(segment_idx, dtype=np.int64)
+        lo = self.segment_offsets[segment_idx]
+        counts = self.segment_offsets[segment_idx + 1] - lo
+        total = int(counts.sum())
+        if total == 0:
+            return np.zeros(0, dtype=np.int64)
+        # Row k of range j is lo[j] + (k - first[j]), built without a Python loop
+        first = np.cumsum(counts) - counts
+        return np.arange(total, dtype=np.int64) + np.repeat(lo - first, counts)
+
+    def polygon_visits(
+        self,
+        segment_idx: np.ndarray,
+        polygons: List[Sequence[np.ndarray]],
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Runs of consecutive fixes of the given segments that lie inside the polygons
+        (and inside the [start, end] window, POSIX seconds). Returns columns segment,
+        entry / exit (point rows of the first and last fix inside) and num_points.
+        """
+        rows = self.segment_rows(segment_idx)
+        owner = np.repeat(np.asarray(segment_idx, dtype=np.int64), np.diff(self.segment_offsets)[segment_idx])
+
+        # Cheap envelope and time tests first, ray casting only for what is left
+        exteriors = np.vstack([rings[0] for rings in polygons])
+        lon, lat = self.point_lon[rows], self.point_lat[rows]
+        inside = (
+            (lon >= exteriors[:, 0].min()) & (lon <= exteriors[:, 0].max())
+            & (lat >= exteriors[:, 1].min()) & (lat <= exteriors[:, 1].max())
+        )
+        if start is not None:
+            inside &= self.point_time[rows] >= start
+        if end is not None:
+            inside &= self.point_time[rows] <= end
+        candidates = np.flatnonzero(inside)
+        inside[candidates] = points_in_polygons(lon[candidates], lat[candidates], polygons)
+
+        # A run starts where the previous row is outside or belongs to another segment
+        same_segment = np.zeros(rows.size, dtype=bool)
+        same_segment[1:] = owner[1:] == owner[:-1]
+        prev_inside = np.zeros(rows.size, dtype=bool)
+        prev_inside[1:] = inside[:-1]
+        next_inside = np.zeros(rows.size, dtype=bool)
+        next_inside[:-1] = inside[1:] & same_segment[1:]
+        first = np.flatnonzero(inside & ~(prev_inside & same_segment))
+        last = np.flatnonzero(inside & ~next_inside)
+        return {
+            "segment": owner[first],
+            "entry": rows[first],
+            "exit": rows[last],
+            "num_points": last - first + 1,
+        }
+
+    def _interpolate(
+        self, t: np.ndarray, lo: np.ndarray, hi: np.ndarray, b: np.ndarray
+    ) -> Dict[str, np.ndarray]:
+        """
+        Interpolate the point columns at times t, where b is the first row > t of the
+        owning segment rows lo:hi. lat and sog are linear, lon and cog follow the shorter
+        arc; sog/cog stay NaN if unknown on both sides.
+        """
+        # Bracketing rows a <= t < b (a == b at the segment ends and for single points)
+        a = np.clip(b - 1, lo, hi - 1)
+        b = np.minimum(b, hi - 1)
+
+        dt = (self.point_time[b] - self.point_time[a]).astype(np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            f = np.where(dt > 0, (t - self.point_time[a]) / dt, 0.0)
+        f = np.clip(f, 0.0, 1.0)
+
+        lon = _lerp_angle(self.point_lon[a] + 180.0, self.point_lon[b] + 180.0, f) - 180.0
+        return {
+            "lon": lon,
+            "lat": self.point_lat[a] + f * (self.point_lat[b] - self.point_lat[a]),
+            "sog": _lerp_nan(self.point_sog[a], self.point_sog[b], f),
+            "cog": _lerp_nan(self.point_cog[a], self.point_cog[b], f, lerp=_lerp_angle),
+        }
+
+    def positions_at(self, t: float, segment_idx: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Position of every given segment at POSIX time t (segments must have points and
+        be active at t); columns lon/lat/sog/cog aligned with segment_idx.
+        """
+        return self.positions_at_times(segment_idx, np.full(np.size(segment_idx), t, dtype=np.float64))
+
+    def positions_at_times(self, segment_idx: np.ndarray, t: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Position of segment segment_idx[k] at time t[k], for many (segment, time) samples
+        at once; segments may repeat. Columns as in positions_at.
+        """
+        lo = self.segment_offsets[segment_idx]
+        hi = self.segment_offsets[np.asarray(segment_idx) + 1]
+        b = segment_searchsorted(self.point_time, lo, hi, t)
+        return self._interpolate(t, lo, hi, b)
+
+    def resample_segment(self, index: int, step: float) -> Dict[str, np.ndarray]:
+        """
+        One segment on a uniform time grid start, start + step, ... <= end.
+        Returns columns t/lon/lat/sog/cog plus heading, the great-circle bearing from
+        each frame to the next (the last frame repeats the previous heading, frames
+        without movement fall back to cog).
+        """
+        lo, hi = int(self.segment_offsets[index]), int(self.segment_offsets[index + 1])
+        if hi == lo:
+            empty = np.zeros(0, dtype=np.float64)
+            return {name: empty for name in ("t", "lon", "lat", "sog", "cog", "heading")}
+
+        times = self.point_time[lo:hi]
+        t = times[0] + step * np.arange(int((times[-1] - times[0]) // step) + 1, dtype=np.float64)
+        b = lo + np.searchsorted(times, t, side="right")
+        columns = self._interpolate(t, np.full(t.size, lo), np.full(t.size, hi), b)
+
+        heading = np.full(t.size, np.nan)
+        if t.size > 1:
+            heading[:-1] = initial_bearing(
+                columns["lon"][:-1], columns["lat"][:-1], columns["lon"][1:], columns["lat"][1:]
+            )
+            heading[-1] = heading[-2]
+        # No bearing while the vessel stands still: report its course instead
+        heading = np.where(np.isnan(heading), columns["cog"], heading)
+        return {"t": t, **columns, "heading": heading}
+
+    def vessel_segment_indices(self, vessel_ids: Sequence[str]) -> np.ndarray:
+        """
+        Ascending indices of all segments of the given vessels (hash lookups, no scan).
+        """
+        parts = [self.vessel_segments[v] for v in set(vessel_ids) if v in self.vessel_segments]
+        if not parts:
+            return np.zeros(0, dtype=np.int64)
+        return np.sort(np.concatenate(parts))
+
+
+class TrajectoryStore:
+    """
+    Process-wide holder of the current TrajectoryDataset.
+    The segments file is loaded once and only re-read when its mtime/size changes
+    (e.g. after the update pipeline has written new output).
+
+    The binary segments.bin is preferred: its columns are memory-mapped instead of
+    parsed, so startup is fast and all workers share one copy through the page cache.
+    segments.json is used when there is no binary file or the JSON is newer than it.
+
+    Vessel types come from the segments; for older data without them the SDKG segment
+    nodes in the node store are read once per load.
+    """
+
+    def __init__(self, path: str, bin_path: Optional[str] = None, nodes: Optional[NodeStore] = None):
+        self.path = Path(path)
+        self.bin_path = Path(bin_path) if bin_path else None
+        self.nodes = nodes
+        self._dataset: Optional[TrajectoryDataset] = None
+        self._lock = threading.Lock()
+
+    def _source(self) -> Path:
+        if self.bin_path is None or not self.bin_path.exists():
+            return self.path
+        try:
+            if self.path.stat().st_mtime_ns > self.bin_path.stat().st_mtime_ns:
+                return self.path
+        except FileNotFoundError:
+            pass
+        return self.bin_path
+
+    def current(self) -> TrajectoryDataset:
+        """Return the loaded dataset, reloading it first if the file has changed."""
+        source = self._source()
+        version = _file_version(source)
+        dataset = self._dataset
+        if dataset is not None and dataset.version == version:
+            return dataset
+
+        with self._lock:
+            # Another request may have finished the reload while we were waiting
+            if self._dataset is None or self._dataset.version != version:
+                self._dataset = self._load(source, version)
+            return self._dataset
+
+    def _load(self, source: Path, version: str) -> TrajectoryDataset:
+        if source == self.bin_path:
+            try:
+                segments, points, derived = read_segments_bin(source)
+            except ValueError as e:
+                # E.g. a file of an older format version; serve segments.json until the
+                # next pipeline run rewrites it
+                logger.warning("Ignoring %s: %s", source, e)
+                source = self.path
+        if source != self.bin_path:
+            segments, points = parse_segments(_load_raw_segments(source))
+            derived = None
+        vessels = build_vessel_table(((s.vessel_id, s.vessel_type) for s in segments), self.nodes)
+        dataset = TrajectoryDataset(version, segments, points, derived, vessels)
+        logger.info(
+            "Loaded %d trajectories / %d points from %s (version %s)",
+            len(dataset.trajectories), points.timestamp.size, source, version,
+        )
+        return dataset
+
+
+trajectory_store = TrajectoryStore(
+    settings.SEGMENTS_JSON_PATH, settings.SEGMENTS_BIN_PATH, node_store
+)
@@ -0,0 +1,99 @@
+# app/core/vessel_table.py
+from __future__ import annotations
+
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.node_store import NodeStore
+
+logger = logging.getLogger(__name__)
+
+# static_attributes / description prefixes that carry the ship type in SDKG node files
+_TYPE_PREFIXES = ("Vessel Type:", "Ship Type:")
+
+
+class VesselTable:
+    """
+    Per-vessel attributes with dictionary-encoded categories: vessel_type is stored as
+    an int16 code into `categories` (-1 = unknown), one row per MMSI.
+    """
+
+    def __init__(self, types_by_vessel: Dict[str, Optional[str]]):
+        self.vessel_ids: List[str] = list(types_by_vessel)
+        self.row: Dict[str, int] = {v: i for i, v in enumerate(self.vessel_ids)}
+        self.categories: List[str] = sorted({t for t in types_by_vessel.values() if t})
+        self.category_code: Dict[str, int] = {c: i for i, c in enumerate(self.categories)}
+        self.type_codes = np.array(
+            [self.category_code.get(t, -1) for t in types_by_vessel.values()], dtype=np.int16
+        )
+
+    def __len__(self) -> int:
+        return len(self.vessel_ids)
+
+    def vessel_type(self, vessel_id: Optional[str]) -> Optional[str]:
+        row = self.row.get(vessel_id) if vessel_id is not None else None
+        if row is None or self.type_codes[row] < 0:
+            return None
+        return self.categories[self.type_codes[row]]
+
+    def type_codes_of(self, vessel_ids: Iterable[str]) -> np.ndarray:
+        """vessel_type codes for a sequence of MMSIs (-1 where unknown)."""
+        return np.array(
+            [self.type_codes[self.row[v]] if v in self.row else -1 for v in vessel_ids], dtype=np.int16
+        )
+
+    def codes_for_types(self, vessel_types: Sequence[str]) -> np.ndarray:
+        """Codes of the given vessel_type names; unknown names are ignored."""
+        return np.array(
+            [self.category_code[t] for t in vessel_types if t in self.category_code], dtype=np.int16
+        )
+
+
+def _node_vessel_type(node: Dict) -> Optional[str]:
+    metadata = node.get("metadata") or {}
+    if metadata.get("vessel_type"):
+        return str(metadata["vessel_type"])
+    for line in list(node.get("static_attributes") or []) + list(node.get("description") or []):
+        if isinstance(line, str):
+            for prefix in _TYPE_PREFIXES:
+                if line.startswith(prefix):
+                    return line[len(prefix):].strip() or None
+    return None
+
+
+def load_node_vessel_types(nodes: NodeStore) -> Dict[str, str]:
+    """
+    MMSI -> vessel_type from the SDKG segment nodes (TRJ_*).
+    Used for data written before the update pipeline stored vessel_type itself.
+    """
+    types: Dict[str, str] = {}
+    for _, node in nodes.iter_nodes("TRJ_"):
+        vessel_id = (node.get("metadata") or {}).get("vessel_id")
+        vessel_type = _node_vessel_type(node)
+        if vessel_id and vessel_type:
+            types.setdefault(str(vessel_id), vessel_type)
+    return types
+
+
+def build_vessel_table(
+    vessel_types: Iterable[Tuple[Optional[str], Optional[str]]],
+    nodes: Optional[NodeStore] = None,
+) -> VesselTable:
+    """
+    (vessel_id, vessel_type) pairs from the segments -> VesselTable.
+    Vessels the segments carry no type for are looked up in the node store, if given.
+    """
+    types_by_vessel: Dict[str, Optional[str]] = {}
+    for vessel_id, vessel_type in vessel_types:
+        if vessel_id and not types_by_vessel.get(vessel_id):
+            types_by_vessel[vessel_id] = vessel_type or None
+
+    if nodes is not None and any(t is None for t in types_by_vessel.values()):
+        node_types = load_node_vessel_types(nodes)
+        for vessel_id, vessel_type in types_by_vessel.items():
+            if vessel_type is None:
+                types_by_vessel[vessel_id] = node_types.get(vessel_id)
+
+    return VesselTable(types_by_vessel)
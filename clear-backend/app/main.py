@@ -1,14 +1,55 @@
 # app/main.py
+import logging
+import threading
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
+from app.core.node_store import node_store
+from app.core.sdkg_graph import sdkg_store
+from app.core.trajectory_store import trajectory_store
+from app.api.v1.encounter import precompute_encounters
 from app.api.v1.router import api_router
 
+logger = logging.getLogger(__name__)
+
+
+def _precompute_encounters() -> None:
+    try:
+        precompute_encounters()
+    except Exception:
+        logger.exception("Encounter precompute failed")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Data from before the pipeline packed its node files: pack them once
+    try:
+        node_store.migrate()
+    except OSError as e:
+        logger.warning("SD-KG node files not packed at startup: %s", e)
+    # Build the resident trajectory store and SD-KG graph once at startup instead of on the first request
+    try:
+        trajectory_store.current()
+    except FileNotFoundError as e:
+        logger.warning("Trajectory store not loaded at startup: %s", e)
+    else:
+        # Fleet-wide encounter detection takes a while: run it next to serving requests
+        if settings.ENCOUNTER_PRECOMPUTE:
+            threading.Thread(target=_precompute_encounters, name="encounter-precompute", daemon=True).start()
+    try:
+        sdkg_store.current()
+    except FileNotFoundError as e:
+        logger.warning("SD-KG graph not loaded at startup: %s", e)
+    yield
+
 
 def create_app() -> FastAPI:
     app = FastAPI(
         title=settings.PROJECT_NAME,
+        lifespan=lifespan,
     )
 
     # CORS settings: Allow access to your front-end domain name
@@ -31,4 +72,4 @@ def create_app() -> FastAPI:
     return app
 
 
-app = create_app()
\ No newline at end of file
+app = create_app()
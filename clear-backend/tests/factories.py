@@ -0,0 +1,88 @@
+"""Builders for small synthetic trajectory datasets shared by the tests."""
+import itertools
+from datetime import datetime, timezone
+
+from app.core.sdkg_graph import SDKGGraph
+from app.core.trajectory_store import TrajectoryDataset, parse_segments
+
+
+def iso(seconds):
+    """Epoch seconds -> ISO 8601 UTC string as written in segments.json."""
+    return datetime.fromtimestamp(seconds, tz=timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def raw_segment(segment_id, trajectory_id, points, vessel_id=None, vessel_type=None):
+    """
+    segments.json entry from (epoch seconds, lon, lat[, sog, cog]) tuples.
+    """
+    times = [p[0] for p in points] or [0]
+    return {
+        "id": segment_id,
+        "trajectory_id": trajectory_id,
+        "vessel_id": vessel_id,
+        "vessel_type": vessel_type,
+        "start_time": iso(min(times)),
+        "end_time": iso(max(times)),
+        "points": [
+            {
+                "timestamp": iso(p[0]),
+                "lon": p[1],
+                "lat": p[2],
+                "sog": p[3] if len(p) > 3 else None,
+                "cog": p[4] if len(p) > 4 else None,
+            }
+            for p in points
+        ],
+    }
+
+
+# Every dataset and graph gets its own version, so the version-keyed API caches never mix tests
+_versions = itertools.count()
+
+
+def make_dataset(raw_segments):
+    """Raw segments.json entries -> TrajectoryDataset."""
+    return TrajectoryDataset(f"test-{next(_versions)}", *parse_segments(raw_segments))
+
+
+def make_graph(raw_index):
+    """sdkg_index.json content -> SDKGGraph with its own version."""
+    return SDKGGraph.from_index(f"test-{next(_versions)}", raw_index)
+
+
+class StaticStore:
+    """Stands in for a process-wide store: current() always returns the same object."""
+
+    def __init__(self, value):
+        self.value = value
+
+    def current(self):
+        return self.value
+
+
+def random_sdkg_index(rng, n_nodes=60, n_links=240):
+    """
+    sdkg_index.json content with random nodes and links (self-loops, parallel links and
+    links without a relation included) from a numpy Generator.
+    """
+    types = ("behavior", "attribute", "function", "segment", "trajectory")
+    relations = ("has_attribute", "part_of", "exhibits_behavior", "uses_function", "implements", None)
+    nodes = [
+        {
+            "id": f"N{i:03d}",
+            "type": types[rng.integers(len(types))],
+            "label": f"node {i} " + " ".join(rng.choice(["cargo", "tanker", "turn", "port", "Ålesund"], 2)),
+            "summary": f"summary of node {i}",
+            "support": float(rng.integers(0, 5)) if rng.random() < 0.8 else None,
+            "time": float(rng.integers(0, 10**6)) if rng.random() < 0.8 else None,
+        }
+        for i in range(n_nodes)
+    ]
+    links = []
+    for _ in range(n_links):
+        link = {"source": f"N{rng.integers(n_nodes):03d}", "target": f"N{rng.integers(n_nodes):03d}"}
+        relation = relations[rng.integers(len(relations))]
+        if relation is not None:
+            link["relation"] = relation
+        links.append(link)
+    return {"nodes": nodes, "links": links}
@@ -0,0 +1,100 @@
+import math
+from collections import defaultdict
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import trajectory
+from app.core.density import grid_density
+from factories import StaticStore, iso, make_dataset, raw_segment
+
+
+def test_counts_match_histogram2d():
+    rng = np.random.default_rng(14)
+    lon = np.concatenate([rng.uniform(-180, 180, 5000), [-180.0, 180.0, 0.0, 0.25]])
+    lat = np.concatenate([rng.uniform(-90, 90, 5000), [-90.0, 90.0, 0.0, -0.25]])
+    sog = rng.uniform(0, 20, lon.size)
+    resolution = 0.25
+
+    cells = grid_density(lon, lat, sog, resolution)
+    hist, lon_edges, lat_edges = np.histogram2d(
+        lon, lat, bins=(np.arange(-180, 180 + resolution, resolution), np.arange(-90, 90 + resolution, resolution))
+    )
+    col, row = np.nonzero(hist)
+    expected = sorted(zip(lon_edges[col].tolist(), lat_edges[row].tolist(), hist[col, row].astype(int).tolist()))
+    assert sorted(zip(cells["lon"].tolist(), cells["lat"].tolist(), cells["count"].tolist())) == expected
+    assert cells["count"].sum() == lon.size
+
+
+def test_mean_sog_ignores_missing():
+    resolution = 0.5
+    lon = np.array([10.1, 10.2, 10.3, 11.0, 11.1, -0.1])
+    lat = np.array([55.1, 55.2, 55.4, 55.0, 55.3, -0.1])
+    sog = np.array([4.0, np.nan, 8.0, np.nan, np.nan, 3.0])
+
+    sums, counts, points = defaultdict(float), defaultdict(int), defaultdict(int)
+    for x, y, s in zip(lon, lat, sog):
+        key = (math.floor((x + 180) / resolution), math.floor((y + 90) / resolution))
+        points[key] += 1
+        if not math.isnan(s):
+            sums[key] += s
+            counts[key] += 1
+
+    cells = grid_density(lon, lat, sog, resolution)
+    result = {
+        (round((x + 180) / resolution), round((y + 90) / resolution)): (n, m)
+        for x, y, n, m in zip(cells["lon"], cells["lat"], cells["count"], cells["mean_sog"])
+    }
+    assert set(result) == set(points)
+    for key, (n, mean) in result.items():
+        assert n == points[key]
+        if counts[key]:
+            assert mean == pytest.approx(sums[key] / counts[key])
+        else:
+            assert np.isnan(mean)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    dataset = make_dataset([
+        raw_segment("A", "T1", [(0, 10.05, 55.05, 10.0), (100, 10.15, 55.05, 12.0), (200, 10.55, 55.05, 14.0)],
+                    vessel_id="1", vessel_type="Cargo"),
+        raw_segment("B", "T2", [(0, 10.05, 55.05, None), (300, 20.05, 60.05, 2.0)], vessel_id="2",
+                    vessel_type="Tanker"),
+    ])
+    monkeypatch.setattr(trajectory, "trajectory_store", StaticStore(dataset))
+    app = FastAPI()
+    app.include_router(trajectory.router)
+    return TestClient(app)
+
+
+def _cells(client, **params):
+    response = client.get("/trajectories/density", params=params)
+    assert response.status_code == 200, response.text
+    grid = response.json()
+    return {(lon, lat): (n, sog) for lon, lat, n, sog in zip(grid["lon"], grid["lat"], grid["count"], grid["mean_sog"])}
+
+
+def test_endpoint_filters_points(client):
+    assert _cells(client, resolution=0.5) == {
+        (10.0, 55.0): (3, 11.0),
+        (10.5, 55.0): (1, 14.0),
+        (20.0, 60.0): (1, 2.0),
+    }
+    # bbox and time window cut individual points, not just whole segments
+    assert _cells(client, resolution=0.5, bbox="10,55,10.5,55.5") == {(10.0, 55.0): (3, 11.0)}
+    assert _cells(client, resolution=0.5, start=iso(50), end=iso(250)) == {
+        (10.0, 55.0): (1, 12.0),
+        (10.5, 55.0): (1, 14.0),
+    }
+    assert _cells(client, resolution=0.1, vessel_type="Tanker") == {
+        (10.0, 55.0): (1, None),
+        (20.0, 60.0): (1, 2.0),
+    }
+
+
+def test_endpoint_validates(client):
+    assert client.get("/trajectories/density", params={"resolution": 0}).status_code == 422
+    assert client.get("/trajectories/density", params={"bbox": "1,2,3"}).status_code == 400
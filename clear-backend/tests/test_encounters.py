@@ -0,0 +1,137 @@
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import encounter
+from app.core.encounters import KNOT_M_S, _cpa, compute_encounters, find_close_pairs
+from app.core.geometry import EARTH_RADIUS_M, haversine_m
+from factories import StaticStore, iso, make_dataset, raw_segment
+
+# Degrees of longitude per metre on the equator
+DEG_PER_M = np.degrees(1.0 / EARTH_RADIUS_M)
+
+
+def _cpa_of(a, b):
+    """(lon, lat, sog, cog) of vessels a and b -> (cpa, tcpa) as floats."""
+    cpa, tcpa = _cpa(*(np.array([v], dtype=np.float64) for v in (*a, *b)))
+    return float(cpa[0]), float(tcpa[0])
+
+
+def test_cpa_head_on():
+    # 2 km apart on the equator, 10 kn each towards the other
+    cpa, tcpa = _cpa_of((0.0, 0.0, 10.0, 90.0), (2000 * DEG_PER_M, 0.0, 10.0, 270.0))
+    assert tcpa == pytest.approx(2000 / (20 * KNOT_M_S))
+    assert cpa == pytest.approx(0.0, abs=1e-6)
+
+    # Same, passing 100 m apart
+    cpa, tcpa = _cpa_of((0.0, 0.0, 10.0, 90.0), (2000 * DEG_PER_M, 100 * DEG_PER_M, 10.0, 270.0))
+    assert tcpa == pytest.approx(2000 / (20 * KNOT_M_S))
+    assert cpa == pytest.approx(100.0)
+
+
+def test_cpa_not_closing():
+    # Diverging: the closest point is now
+    cpa, tcpa = _cpa_of((0.0, 0.0, 10.0, 270.0), (500 * DEG_PER_M, 0.0, 10.0, 90.0))
+    assert tcpa == 0.0 and cpa == pytest.approx(500.0)
+    # Same course and speed: no relative motion
+    cpa, tcpa = _cpa_of((0.0, 0.0, 12.0, 45.0), (0.0, 300 * DEG_PER_M, 12.0, 45.0))
+    assert tcpa == 0.0 and cpa == pytest.approx(300.0)
+
+
+@pytest.mark.parametrize("b", [
+    (0.01, 0.0, np.nan, 270.0),
+    (0.01, 0.0, 10.0, np.nan),
+    (0.01, 0.0, np.nan, np.nan),
+])
+def test_cpa_unknown_kinematics(b):
+    cpa, tcpa = _cpa_of((0.0, 0.0, 10.0, 90.0), b)
+    assert np.isnan(cpa) and np.isnan(tcpa)
+    cpa, tcpa = _cpa_of(b, (0.0, 0.0, 10.0, 90.0))
+    assert np.isnan(cpa) and np.isnan(tcpa)
+
+
+def test_close_pairs_match_brute_force():
+    rng = np.random.default_rng(16)
+    n = 600
+    bucket = rng.integers(0, 4, n)
+    vessel = rng.integers(0, 40, n)
+    lon = rng.uniform(10.0, 10.2, n)
+    lat = rng.uniform(70.0, 70.1, n)
+    distance = 1500.0
+
+    i, j, d = find_close_pairs(bucket, vessel, lon, lat, distance)
+    found = {(min(a, b), max(a, b)): dist for a, b, dist in zip(i.tolist(), j.tolist(), d.tolist())}
+    assert len(found) == i.size
+
+    a, b = np.triu_indices(n, k=1)
+    dist = haversine_m(lon[a], lat[a], lon[b], lat[b])
+    close = (bucket[a] == bucket[b]) & (vessel[a] != vessel[b]) & (dist <= distance)
+    assert set(found) == set(zip(a[close].tolist(), b[close].tolist()))
+    for pair, expected in zip(zip(a[close].tolist(), b[close].tolist()), dist[close]):
+        assert found[pair] == pytest.approx(expected)
+
+
+def _dataset():
+    east, west = (7.2, 90.0), (7.2, 270.0)
+    return make_dataset([
+        # Vessels 1 and 2 pass each other 0.001 degrees (~111 m) apart at t=300
+        raw_segment("V1", "T1", [(0, 0.0, 0.0, *east), (600, 0.02, 0.0, *east)], vessel_id="1"),
+        raw_segment("V2", "T2", [(0, 0.02, 0.001, *west), (600, 0.0, 0.001, *west)], vessel_id="2"),
+        # Vessel 3 lies next to vessel 1's start without SOG / COG
+        raw_segment("V3", "T3", [(0, 0.0, 0.002), (120, 0.0, 0.002)], vessel_id="3"),
+    ])
+
+
+def test_compute_encounters():
+    dataset = _dataset()
+    result = compute_encounters(dataset, distance=1000.0, step=60.0, workers=1)
+    ids = [s.id for s in dataset.segments]
+    pairs = [(ids[a], ids[b]) for a, b in zip(result["segment_a"], result["segment_b"])]
+    assert pairs == [("V1", "V3"), ("V1", "V2")]
+
+    # V1 / V3: t=0 (222 m) .. t=120 (~497 m), no kinematics for V3
+    assert result["start"][0] == 0 and result["end"][0] == 120 and result["closest"][0] == 0
+    assert result["min_distance"][0] == pytest.approx(float(haversine_m(0.0, 0.0, 0.0, 0.002)))
+    assert np.isnan(result["cpa_distance"][0]) and np.isnan(result["tcpa"][0])
+
+    # V1 / V2: within 1 km from t=180 to t=420, closest on the grid at t=300
+    assert result["start"][1] == 180 and result["end"][1] == 420 and result["closest"][1] == 300
+    assert result["min_distance"][1] == pytest.approx(float(haversine_m(0.01, 0.0, 0.01, 0.001)))
+    assert result["tcpa"][1] == pytest.approx(0.0, abs=1e-6)
+    assert result["cpa_distance"][1] == pytest.approx(result["min_distance"][1], rel=1e-3)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(encounter, "trajectory_store", StaticStore(_dataset()))
+    app = FastAPI()
+    app.include_router(encounter.router)
+    return TestClient(app)
+
+
+def test_endpoint_reports_missing_cpa_as_null(client):
+    response = client.get("/encounters", params={"vessel_id": "3"})
+    assert response.status_code == 200
+    (item,) = response.json()
+    assert (item["vessel_a"], item["vessel_b"]) == ("1", "3")
+    assert item["start_ts"] == iso(0) and item["end_ts"] == iso(120)
+    assert item["cpa_distance_m"] is None and item["tcpa_s"] is None
+
+    assert [e["segment_b"] for e in client.get("/encounters", params={"segment_id": "V2"}).json()] == ["V2"]
+    assert client.get("/encounters", params={"segment_id": "missing"}).status_code == 404
+
+
+def test_precompute_fills_the_default_entry(client, monkeypatch):
+    calls = []
+
+    def compute(dataset, distance, step, workers=None):
+        calls.append((distance, step))
+        return compute_encounters(dataset, distance, step, workers=1)
+
+    monkeypatch.setattr(encounter, "compute_encounters", compute)
+    encounter.precompute_encounters()
+    assert calls == [(encounter.DEFAULT_DISTANCE_M, encounter.DEFAULT_STEP_S)]
+    # The default request is answered from the cache
+    assert len(client.get("/encounters").json()) == 2
+    assert len(calls) == 1
@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import gap
+from app.core.gap_index import GapIndex
+from factories import StaticStore, iso, make_dataset, raw_segment
+
+MIN_GAP = 600.0
+
+
+def _random_columns(rng, n_segments=200):
+    lengths = rng.integers(0, 30, n_segments)
+    offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+    # Mostly regular reports with the odd outage; segments may start before the last one ended
+    n = offsets[-1]
+    steps = np.where(rng.random(n) < 0.1, rng.integers(601, 20000, n), rng.integers(1, 700, n))
+    timestamp = np.concatenate([
+        rng.integers(0, 10**6) + np.cumsum(steps[lo:hi]) for lo, hi in zip(offsets[:-1], offsets[1:])
+    ]).astype(np.float64)
+    lon = rng.uniform(-10, 10, offsets[-1])
+    lat = rng.uniform(50, 60, offsets[-1])
+    return timestamp, lon, lat, offsets
+
+
+def _brute_force_gaps(timestamp, lon, lat, offsets):
+    """(segment, row) of every gap, scanning segment by segment."""
+    gaps = []
+    for seg, (lo, hi) in enumerate(zip(offsets[:-1], offsets[1:])):
+        for row in range(lo, hi - 1):
+            if timestamp[row + 1] - timestamp[row] > MIN_GAP:
+                gaps.append((seg, row))
+    return gaps
+
+
+def test_index_matches_brute_force():
+    rng = np.random.default_rng(17)
+    timestamp, lon, lat, offsets = _random_columns(rng)
+    index = GapIndex(timestamp, lon, lat, offsets, MIN_GAP)
+
+    gaps = _brute_force_gaps(timestamp, lon, lat, offsets)
+    assert len(index) == len(gaps) > 0
+    assert sorted(zip(index.segment.tolist(), index.row.tolist())) == gaps
+    assert np.all(np.diff(index.duration) >= 0)
+    np.testing.assert_array_equal(index.duration, timestamp[index.row + 1] - timestamp[index.row])
+    np.testing.assert_array_equal(index.end_lon, lon[index.row + 1])
+
+    for _ in range(200):
+        min_d, max_d = sorted(rng.uniform(600, 20000, 2))
+        t0, t1 = sorted(rng.uniform(0, 1.2 * 10**6, 2))
+        x0, x1 = sorted(rng.uniform(-10, 10, 2))
+        y0, y1 = sorted(rng.uniform(50, 60, 2))
+        params = {
+            "min_duration": min_d if rng.random() < 0.7 else None,
+            "max_duration": max_d if rng.random() < 0.7 else None,
+            "start": t0 if rng.random() < 0.7 else None,
+            "end": t1 if rng.random() < 0.7 else None,
+            "bbox": (x0, y0, x1, y1) if rng.random() < 0.7 else None,
+        }
+
+        expected = []
+        for k in range(len(index)):
+            row = index.row[k]
+            s, e = timestamp[row], timestamp[row + 1]
+            xs, ys = lon[row:row + 2], lat[row:row + 2]
+            if params["min_duration"] is not None and e - s < params["min_duration"]:
+                continue
+            if params["max_duration"] is not None and e - s > params["max_duration"]:
+                continue
+            if params["start"] is not None and e < params["start"]:
+                continue
+            if params["end"] is not None and s > params["end"]:
+                continue
+            if params["bbox"] is not None and not (
+                xs.min() <= x1 and xs.max() >= x0 and ys.min() <= y1 and ys.max() >= y0
+            ):
+                continue
+            expected.append(k)
+        assert index.query(**params).tolist() == expected, params
+
+
+def test_empty_and_short_segments():
+    index = GapIndex(np.zeros(0), np.zeros(0), np.zeros(0), np.array([0, 0, 0]), MIN_GAP)
+    assert len(index) == 0 and index.query(min_duration=0).size == 0
+    # The jump from one segment's last fix to the next segment's first is not a gap
+    index = GapIndex(np.array([0.0, 5000.0]), np.zeros(2), np.zeros(2), np.array([0, 1, 2]), MIN_GAP)
+    assert len(index) == 0
+
+
+@pytest.fixture
+def client(monkeypatch):
+    dataset = make_dataset([
+        raw_segment("A", "T1", [(0, 0.0, 0.0), (60, 0.0, 0.0), (3660, 1.0, 0.0), (3720, 1.0, 0.0)], vessel_id="1"),
+        raw_segment("B", "T2", [(0, 5.0, 5.0), (1000, 5.0, 5.5), (1060, 5.0, 5.5)], vessel_id="2"),
+    ])
+    monkeypatch.setattr(gap, "trajectory_store", StaticStore(dataset))
+    app = FastAPI()
+    app.include_router(gap.router)
+    return TestClient(app)
+
+
+def test_endpoint(client):
+    gaps = client.get("/gaps").json()
+    assert [(g["segment_id"], g["duration_s"]) for g in gaps] == [("A", 3600.0), ("B", 1000.0)]
+    assert gaps[0]["start_ts"] == iso(60) and gaps[0]["end_ts"] == iso(3660)
+    assert gaps[0]["distance_m"] == pytest.approx(111195, rel=1e-3)
+
+    assert [g["segment_id"] for g in client.get("/gaps", params={"vessel_id": "2"}).json()] == ["B"]
+    assert [g["segment_id"] for g in client.get("/gaps", params={"bbox": "4,4,6,6"}).json()] == ["B"]
+    assert [g["segment_id"] for g in client.get("/gaps", params={"max_duration": 2000}).json()] == ["B"]
+    assert [g["segment_id"] for g in client.get("/gaps", params={"limit": 1}).json()] == ["A"]
+    assert client.get("/gaps", params={"min_duration": 10, "max_duration": 5}).status_code == 400
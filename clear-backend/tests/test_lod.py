@@ -0,0 +1,69 @@
+import numpy as np
+
+from app.core.geometry import douglas_peucker_importance
+from app.core.trajectory_store import LOD_FULL_DETAIL_ZOOM, lod_tolerance
+from factories import make_dataset, raw_segment
+
+
+def _segment_distance(p, a, b):
+    d = b - a
+    length_sq = float(d @ d)
+    t = 0.0 if length_sq == 0 else min(max(float((p - a) @ d) / length_sq, 0.0), 1.0)
+    return float(np.hypot(*(p - (a + t * d))))
+
+
+def _douglas_peucker(points, tolerance):
+    """Textbook recursive Douglas-Peucker; indices of the kept vertices."""
+    def simplify(lo, hi):
+        if hi - lo < 2:
+            return []
+        dist = [_segment_distance(points[i], points[lo], points[hi]) for i in range(lo + 1, hi)]
+        k = int(np.argmax(dist))
+        if dist[k] <= tolerance:
+            return []
+        split = lo + 1 + k
+        return simplify(lo, split) + [split] + simplify(split, hi)
+
+    n = len(points)
+    if n == 0:
+        return []
+    if n == 1:
+        return [0]
+    return [0] + simplify(0, n - 1) + [n - 1]
+
+
+def test_importance_matches_recursive_douglas_peucker():
+    rng = np.random.default_rng(1)
+    lengths = [0, 1, 2, 3, 17, 60, 250]
+    polylines = [np.cumsum(rng.normal(size=(n, 2)), axis=0) for n in lengths]
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    x = np.concatenate([p[:, 0] for p in polylines])
+    y = np.concatenate([p[:, 1] for p in polylines])
+
+    importance = douglas_peucker_importance(x, y, offsets)
+    for k, points in enumerate(polylines):
+        own = importance[offsets[k]:offsets[k + 1]]
+        for tolerance in (0.0, 0.1, 0.5, 1.0, 3.0, 10.0):
+            assert list(np.flatnonzero(own > tolerance)) == _douglas_peucker(points, tolerance)
+
+
+def test_lod_tolerance_levels():
+    assert lod_tolerance(None) is None
+    assert lod_tolerance(LOD_FULL_DETAIL_ZOOM) is None
+    coarse, fine = lod_tolerance(3), lod_tolerance(9)
+    assert coarse > fine > 0
+    # Zooms snap up to the next pyramid level
+    assert lod_tolerance(9) == lod_tolerance(10)
+
+
+def test_segment_points_simplify_with_zoom():
+    t = np.arange(400)
+    wiggle = [(int(s), 10 + s * 1e-3, 55 + 1e-7 * np.sin(s)) for s in t]
+    dataset = make_dataset([raw_segment("S", "T", wiggle)])
+
+    full = dataset.segment_coordinates(0)
+    assert len(full) == 400
+    assert len(dataset.segment_coordinates(0, zoom=LOD_FULL_DETAIL_ZOOM)) == 400
+    coarse = dataset.segment_coordinates(0, zoom=4)
+    # A straight line up to sub-pixel noise: only its end points survive
+    np.testing.assert_array_equal(coarse, full[[0, -1]])
@@ -0,0 +1,178 @@
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import trajectory
+from app.core.geometry import lonlat_to_mercator
+from app.core.mvt import DEFAULT_EXTENT, clip_line
+from factories import StaticStore, make_dataset, raw_segment
+
+
+# ==========
+# Minimal protobuf / MVT decoder
+# ==========
+
+def _read_varint(data, pos):
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, pos
+
+
+def _fields(data):
+    """message bytes -> [(field, value)], value is int (varint) or bytes (length-delimited)."""
+    fields, pos = [], 0
+    while pos < len(data):
+        key, pos = _read_varint(data, pos)
+        field, wire_type = key >> 3, key & 7
+        if wire_type == 0:
+            value, pos = _read_varint(data, pos)
+        elif wire_type == 2:
+            length, pos = _read_varint(data, pos)
+            value, pos = data[pos:pos + length], pos + length
+        else:
+            raise AssertionError(f"unexpected wire type {wire_type}")
+        fields.append((field, value))
+    return fields
+
+
+def _packed(data):
+    values, pos = [], 0
+    while pos < len(data):
+        value, pos = _read_varint(data, pos)
+        values.append(value)
+    return values
+
+
+def _unzigzag(n):
+    return (n >> 1) ^ -(n & 1)
+
+
+def _decode_lines(commands):
+    parts, x, y, i = [], 0, 0, 0
+    while i < len(commands):
+        command, count = commands[i] & 7, commands[i] >> 3
+        i += 1
+        assert command in (1, 2)
+        if command == 1:
+            parts.append([])
+        for _ in range(count):
+            x += _unzigzag(commands[i])
+            y += _unzigzag(commands[i + 1])
+            i += 2
+            parts[-1].append((x, y))
+    return parts
+
+
+def _decode_tile(data):
+    layers = {}
+    for field, layer_bytes in _fields(data):
+        assert field == 3
+        layer = {"features": [], "keys": [], "values": []}
+        for lf, value in _fields(layer_bytes):
+            if lf == 1:
+                layer["name"] = value.decode()
+            elif lf == 2:
+                layer["features"].append(dict(_fields(value)))
+            elif lf == 3:
+                layer["keys"].append(value.decode())
+            elif lf == 4:
+                (vf, v), = _fields(value)
+                layer["values"].append(v.decode() if vf == 1 else bool(v) if vf == 7 else v)
+            elif lf == 5:
+                layer["extent"] = value
+            elif lf == 15:
+                layer["version"] = value
+        features = []
+        for feature in layer["features"]:
+            tags = _packed(feature[2])
+            features.append({
+                "id": feature.get(1),
+                "type": feature[3],
+                "properties": {layer["keys"][k]: layer["values"][v] for k, v in zip(tags[::2], tags[1::2])},
+                "geometry": _decode_lines(_packed(feature[4])),
+            })
+        layers[layer["name"]] = {**layer, "features": features}
+    return layers
+
+
+# ==========
+# Tests
+# ==========
+
+def test_clip_line():
+    # Crossing the square: cut at both borders
+    parts = clip_line(np.array([-10.0, 20.0]), np.array([5.0, 5.0]), 0.0, 10.0)
+    np.testing.assert_allclose(parts[0], [[0, 5], [10, 5]])
+    # Fully inside: unchanged, one part
+    x, y = np.array([1.0, 2.0, 3.0]), np.array([1.0, 4.0, 2.0])
+    (inside,) = clip_line(x, y, 0.0, 10.0)
+    np.testing.assert_allclose(inside, np.column_stack((x, y)))
+    # Fully outside
+    assert clip_line(np.array([20.0, 30.0]), np.array([20.0, 30.0]), 0.0, 10.0) == []
+    # In, out, back in: two parts
+    parts = clip_line(np.array([5.0, 15.0, 5.0]), np.array([2.0, 5.0, 8.0]), 0.0, 10.0)
+    assert len(parts) == 2
+    np.testing.assert_allclose(parts[0][-1], [10.0, 3.5])
+    np.testing.assert_allclose(parts[1][0], [10.0, 6.5])
+
+
+@pytest.fixture
+def client(monkeypatch):
+    dataset = make_dataset([
+        raw_segment("TRJ_1_SEG_0", "TRJ_1", [(0, 10.0, 55.0), (60, 10.5, 55.2), (120, 11.0, 55.1)],
+                    vessel_id="219000001", vessel_type="Cargo"),
+        raw_segment("TRJ_2_SEG_0", "TRJ_2", [(0, -70.0, -30.0), (60, -69.0, -31.0)]),
+    ])
+    monkeypatch.setattr(trajectory, "trajectory_store", StaticStore(dataset))
+    app = FastAPI()
+    app.include_router(trajectory.router)
+    return TestClient(app)
+
+
+def test_world_tile_geometry_and_properties(client):
+    response = client.get("/trajectories/tiles/0/0/0.mvt")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == trajectory.MVT_MEDIA_TYPE
+
+    layer = _decode_tile(response.content)[trajectory.TILE_LAYER_NAME]
+    assert layer["version"] == 2 and layer["extent"] == DEFAULT_EXTENT
+    features = {f["properties"]["segment_id"]: f for f in layer["features"]}
+    assert set(features) == {"TRJ_1_SEG_0", "TRJ_2_SEG_0"}
+
+    feature = features["TRJ_1_SEG_0"]
+    assert feature["type"] == 2
+    assert feature["properties"] == {
+        "segment_id": "TRJ_1_SEG_0",
+        "trajectory_id": "TRJ_1",
+        "vessel_id": "219000001",
+        "vessel_type": "Cargo",
+        "imputed": False,
+    }
+    # z=0: tile space is the normalised mercator plane scaled to the extent (LOD may drop vertices)
+    x, y = lonlat_to_mercator(np.array([10.0, 10.5, 11.0]), np.array([55.0, 55.2, 55.1]))
+    expected = set(zip(np.rint(x * DEFAULT_EXTENT).astype(int).tolist(), np.rint(y * DEFAULT_EXTENT).astype(int).tolist()))
+    (part,) = feature["geometry"]
+    assert set(part) <= expected
+    assert part[0] == min(expected) and part[-1] == max(expected)
+
+
+def test_tile_clips_to_its_quadrant(client):
+    # Tile 1/1/0 is the north-east quadrant: only the Danish segment, shifted into tile space
+    layer = _decode_tile(client.get("/trajectories/tiles/1/1/0.mvt").content)[trajectory.TILE_LAYER_NAME]
+    assert [f["properties"]["segment_id"] for f in layer["features"]] == ["TRJ_1_SEG_0"]
+    (part,) = layer["features"][0]["geometry"]
+    x, y = lonlat_to_mercator(np.array([10.0]), np.array([55.0]))
+    assert part[0] == (round(float((x[0] * 2 - 1) * DEFAULT_EXTENT)), round(float(y[0] * 2 * DEFAULT_EXTENT)))
+
+
+def test_tile_etag_and_range(client):
+    response = client.get("/trajectories/tiles/2/2/1.mvt")
+    etag = response.headers["etag"]
+    assert client.get("/trajectories/tiles/2/2/1.mvt", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/trajectories/tiles/1/2/0.mvt").status_code == 404
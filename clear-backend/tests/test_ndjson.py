@@ -0,0 +1,56 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import trajectory
+from app.core import responses
+from app.core.responses import NDJSON_MEDIA_TYPE
+from factories import StaticStore, make_dataset, raw_segment
+
+
+@pytest.fixture
+def client(monkeypatch):
+    dataset = make_dataset([
+        raw_segment("TRJ_1_SEG_0", "TRJ_1", [(0, 10.0, 55.0), (60, 10.1, 55.1)], vessel_id="1", vessel_type="Cargo"),
+        raw_segment("TRJ_1_SEG_1", "TRJ_1", [(120, 10.2, 55.2), (180, 10.3, 55.3)], vessel_id="1", vessel_type="Cargo"),
+        raw_segment("TRJ_2_SEG_0", "TRJ_2", [(0, -4.0, 48.0), (60, -4.1, 48.1)], vessel_id="2", vessel_type="Tanker"),
+        raw_segment("TRJ_3_SEG_0", "TRJ_3", [(0, 2.0, 51.0), (60, 2.1, 51.1)], vessel_id="3", vessel_type="Cargo"),
+    ])
+    monkeypatch.setattr(trajectory, "trajectory_store", StaticStore(dataset))
+    app = FastAPI()
+    app.include_router(trajectory.router)
+    return TestClient(app)
+
+
+def _lines(response):
+    assert response.status_code == 200
+    assert response.headers["content-type"] == NDJSON_MEDIA_TYPE
+    assert response.content.endswith(b"\n")
+    return [json.loads(line) for line in response.content.splitlines()]
+
+
+def test_stream_sends_one_trajectory_per_line(client):
+    expected = client.get("/trajectories").json()
+    assert [t["id"] for t in expected] == ["TRJ_1", "TRJ_2", "TRJ_3"]
+    assert _lines(client.get("/trajectories", params={"stream": "true"})) == expected
+    assert _lines(client.get("/trajectories", headers={"Accept": NDJSON_MEDIA_TYPE})) == expected
+
+
+def test_stream_applies_filters(client):
+    lines = _lines(client.get("/trajectories", params={"stream": "true", "vessel_type": "Cargo"}))
+    assert [t["id"] for t in lines] == ["TRJ_1", "TRJ_3"]
+    assert [s["id"] for s in lines[0]["segments"]] == ["TRJ_1_SEG_0", "TRJ_1_SEG_1"]
+
+    response = client.get("/trajectories", params={"stream": "true", "vessel_id": "missing"})
+    assert response.status_code == 200 and response.content == b""
+
+
+def test_chunks_split_on_line_boundaries(monkeypatch):
+    monkeypatch.setattr(responses, "NDJSON_CHUNK_SIZE", 32)
+    items = [{"id": i, "name": "x" * (i % 7)} for i in range(50)]
+    chunks = list(responses._ndjson_chunks(iter(items)))
+    assert len(chunks) > 1
+    assert all(chunk.endswith(b"\n") for chunk in chunks)
+    assert [json.loads(line) for line in b"".join(chunks).splitlines()] == items
@@ -0,0 +1,63 @@
+import json
+
+from app.core.node_store import NodeStore, pack_nodes_dir
+
+
+def _write_nodes(nodes_dir, nodes):
+    nodes_dir.mkdir()
+    for node in nodes:
+        (nodes_dir / f"{node['id']}.json").write_text(json.dumps(node, indent=2), encoding="utf-8")
+
+
+NODES = [
+    {"id": "A_001", "type": "attribute", "label": "navigation_status: Under way"},
+    {"id": "TRJ_1_SEG_0", "type": "segment", "label": "Segment 0", "summary": "Ålesund " * 100,
+     "metadata": {"vessel_id": "219000001", "support": 3}},
+    {"id": "T_1", "type": "trajectory", "label": "Trajectory 219000001"},
+]
+
+
+def test_migrate_packs_node_dir(tmp_path):
+    nodes_dir = tmp_path / "nodes"
+    _write_nodes(nodes_dir, NODES)
+    (nodes_dir / "B_broken.json").write_text("{not json", encoding="utf-8")
+    store = NodeStore(str(tmp_path / "nodes.pack"), str(nodes_dir))
+
+    assert store.pack() is None
+    assert store.migrate() == len(NODES)
+    pack = store.pack()
+    assert pack is not None and len(pack) == len(NODES)
+
+    # Served from the pack, not the directory
+    for node in NODES:
+        (nodes_dir / f"{node['id']}.json").unlink()
+    for node in NODES:
+        assert store.get(node["id"]) == node
+    assert store.get("B_broken") is None
+    assert store.get("A_missing") is None
+    assert [node_id for node_id, _ in store.iter_nodes("TRJ_")] == ["TRJ_1_SEG_0"]
+
+    # An existing pack is left alone
+    assert store.migrate() == 0
+
+
+def test_store_reopens_repacked_file(tmp_path):
+    nodes_dir = tmp_path / "nodes"
+    _write_nodes(nodes_dir, NODES[:1])
+    pack_path = tmp_path / "nodes.pack"
+    pack_nodes_dir(str(nodes_dir), str(pack_path))
+    store = NodeStore(str(pack_path))
+    assert store.get("T_1") is None
+
+    _write_nodes(tmp_path / "more", NODES)
+    pack_nodes_dir(str(tmp_path / "more"), str(pack_path))
+    assert store.get("T_1") == NODES[2]
+
+
+def test_directory_fallback_without_pack(tmp_path):
+    nodes_dir = tmp_path / "nodes"
+    _write_nodes(nodes_dir, NODES)
+    store = NodeStore(str(tmp_path / "nodes.pack"), str(nodes_dir))
+    assert store.get("A_001") == NODES[0]
+    assert store.get("A_missing") is None
+    assert store.pack() is None
@@ -0,0 +1,84 @@
+import json
+import struct
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import trajectory
+from app.core.packed_coords import COORD_SCALE, FORMAT_VERSION, MAGIC, PACKED_COORDS_MEDIA_TYPE, delta_encode
+from factories import StaticStore, make_dataset, raw_segment
+
+
+def _unpack(data):
+    """Packed payload -> (header, [(n, 2) float coordinates per segment]), as a browser would decode it."""
+    magic, version, header_len = struct.unpack_from("<4sII", data)
+    assert (magic, version) == (MAGIC, FORMAT_VERSION)
+    assert header_len % 4 == 0
+    header = json.loads(data[12:12 + header_len])
+    body = np.frombuffer(data, dtype="<i4", offset=12 + header_len)
+    n_segments = len(header["segments"])
+    offsets, coords = body[:n_segments + 1], body[n_segments + 1:].reshape(-1, 2)
+    assert offsets[-1] == len(coords)
+    segments = [
+        np.cumsum(coords[lo:hi].astype(np.int64), axis=0) / header["scale"]
+        for lo, hi in zip(offsets[:-1], offsets[1:])
+    ]
+    return header, segments
+
+
+def test_delta_encode_round_trip():
+    rng = np.random.default_rng(4)
+    lengths = np.array([3, 0, 1, 50, 0, 7])
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    lon = rng.uniform(-180, 180, offsets[-1])
+    lat = rng.uniform(-90, 90, offsets[-1])
+
+    deltas = delta_encode(lon, lat, offsets)
+    assert deltas.dtype == np.int32 and deltas.shape == (offsets[-1], 2)
+    for lo, hi in zip(offsets[:-1], offsets[1:]):
+        decoded = np.cumsum(deltas[lo:hi].astype(np.int64), axis=0) / COORD_SCALE
+        np.testing.assert_allclose(decoded, np.column_stack((lon[lo:hi], lat[lo:hi])), atol=0.5 / COORD_SCALE)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    dataset = make_dataset([
+        raw_segment("TRJ_1_SEG_0", "TRJ_1", [(0, 179.999999, -89.5), (60, -179.5, 89.999999), (120, 0.0, 0.0)],
+                    vessel_id="1", vessel_type="Cargo"),
+        raw_segment("TRJ_1_SEG_1", "TRJ_1", [(200, 10.123456, 55.654321)], vessel_id="1", vessel_type="Cargo"),
+        raw_segment("TRJ_2_SEG_0", "TRJ_2", []),
+        raw_segment("TRJ_3_SEG_0", "TRJ_3", [(0, -4.0, 48.0), (60, -4.000001, 48.000001)], vessel_id="3"),
+    ])
+    monkeypatch.setattr(trajectory, "trajectory_store", StaticStore(dataset))
+    app = FastAPI()
+    app.include_router(trajectory.router)
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("request_kwargs", [
+    {"params": {"format": "binary"}},
+    {"headers": {"Accept": PACKED_COORDS_MEDIA_TYPE}},
+])
+def test_packed_matches_json(client, request_kwargs):
+    response = client.get("/trajectories", **request_kwargs)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == PACKED_COORDS_MEDIA_TYPE
+    header, coordinates = _unpack(response.content)
+
+    expected = client.get("/trajectories").json()
+    assert [(t["id"], t["segments"]) for t in header["trajectories"]] == [
+        (t["id"], len(t["segments"])) for t in expected
+    ]
+    expected_segments = [s for t in expected for s in t["segments"]]
+    assert header["segments"] == [
+        {k: v for k, v in s.items() if k != "coordinates"} for s in expected_segments
+    ]
+    for decoded, segment in zip(coordinates, expected_segments):
+        np.testing.assert_allclose(decoded, segment["coordinates"], atol=0.5 / COORD_SCALE)
+
+
+def test_format_json_overrides_accept(client):
+    response = client.get("/trajectories", params={"format": "json"}, headers={"Accept": PACKED_COORDS_MEDIA_TYPE})
+    assert response.headers["content-type"] == "application/json"
@@ -0,0 +1,56 @@
+import numpy as np
+
+from app.core.trajectory_store import parse_segments, segment_reduce, segment_searchsorted
+from factories import make_dataset, raw_segment
+
+
+def test_parse_segments_builds_time_ordered_columns():
+    raw = [
+        # Points out of order and a missing SOG / COG
+        raw_segment("TRJ_2_SEG_0", "TRJ_2", [(200, 3.0, 30.0, 5.0, 90.0), (100, 2.0, 20.0, None, None)]),
+        raw_segment("TRJ_1_SEG_1", "TRJ_1", [(50, 1.5, 15.0, 1.0, 10.0)]),
+        raw_segment("TRJ_1_SEG_0", "TRJ_1", [(0, 1.0, 10.0, 2.0, 20.0), (10, 1.1, 11.0, 3.0, 30.0)]),
+        raw_segment("TRJ_3_SEG_0", "TRJ_3", []),
+    ]
+    segments, points = parse_segments(raw)
+
+    # Trajectory-major: trajectories by start time, their segments by start time
+    assert [s.id for s in segments] == ["TRJ_1_SEG_0", "TRJ_1_SEG_1", "TRJ_3_SEG_0", "TRJ_2_SEG_0"]
+    assert points.offsets.tolist() == [0, 2, 3, 3, 5]
+    assert points.timestamp.tolist() == [0, 10, 50, 100, 200]
+    assert points.lon.tolist() == [1.0, 1.1, 1.5, 2.0, 3.0]
+    assert points.lat.tolist() == [10.0, 11.0, 15.0, 20.0, 30.0]
+    np.testing.assert_array_equal(points.sog, [2.0, 3.0, 1.0, np.nan, 5.0])
+    np.testing.assert_array_equal(points.cog, [20.0, 30.0, 10.0, np.nan, 90.0])
+
+
+def test_dataset_segment_views():
+    dataset = make_dataset([
+        raw_segment("A", "T", [(0, 1.0, 10.0), (10, 2.0, 12.0), (20, 1.5, 11.0)]),
+        raw_segment("B", "T", [(30, 5.0, 50.0)]),
+    ])
+    np.testing.assert_array_equal(dataset.segment_coordinates(0), [[1.0, 10.0], [2.0, 12.0], [1.5, 11.0]])
+    np.testing.assert_array_equal(dataset.segment_coordinates(1), [[5.0, 50.0]])
+
+
+def test_segment_reduce():
+    values = np.array([3.0, 1.0, 2.0, 7.0, 5.0])
+    offsets = np.array([0, 3, 3, 5])
+    np.testing.assert_array_equal(segment_reduce(np.minimum, values, offsets), [1.0, np.nan, 5.0])
+    np.testing.assert_array_equal(segment_reduce(np.maximum, values, offsets), [3.0, np.nan, 7.0])
+    assert segment_reduce(np.minimum, np.zeros(0), np.array([0])).size == 0
+
+
+def test_segment_searchsorted_matches_numpy():
+    rng = np.random.default_rng(2)
+    lengths = rng.integers(0, 40, 300)
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    values = np.concatenate([np.sort(rng.integers(0, 100, n)) for n in lengths]).astype(np.float64)
+    target = rng.integers(-5, 105, lengths.size).astype(np.float64)
+
+    result = segment_searchsorted(values, offsets[:-1], offsets[1:], target)
+    expected = [
+        lo + np.searchsorted(values[lo:hi], t, side="right")
+        for lo, hi, t in zip(offsets[:-1], offsets[1:], target)
+    ]
+    np.testing.assert_array_equal(result, expected)
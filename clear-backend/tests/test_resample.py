@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import trajectory
+from factories import StaticStore, iso, make_dataset, raw_segment
+
+
+@pytest.fixture
+def client(monkeypatch):
+    dataset = make_dataset([
+        # North along the meridian (COG turning through north), then east
+        raw_segment("TRJ_1_SEG_0", "TRJ_1", [
+            (0, 0.0, 0.0, 10.0, 350.0),
+            (60, 0.0, 0.06, 20.0, 10.0),
+            (90, 0.03, 0.06, None, None),
+        ]),
+        raw_segment("TRJ_1_SEG_1", "TRJ_1", []),
+        raw_segment("TRJ_1_SEG_2", "TRJ_1", [(200, 1.0, 1.0, 0.0, 123.0)]),
+        raw_segment("TRJ_2_SEG_0", "TRJ_2", [(0, 5.0, 5.0), (300_000, 6.0, 6.0)]),
+    ])
+    monkeypatch.setattr(trajectory, "trajectory_store", StaticStore(dataset))
+    app = FastAPI()
+    app.include_router(trajectory.router)
+    return TestClient(app)
+
+
+def _resample(client, trajectory_id, step):
+    response = client.get(f"/trajectories/{trajectory_id}/resample", params={"step": step})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_uniform_frames(client):
+    result = _resample(client, "TRJ_1", "30s")
+    assert result["id"] == "TRJ_1" and result["step"] == 30
+    # The empty segment is skipped
+    assert [s["id"] for s in result["segments"]] == ["TRJ_1_SEG_0", "TRJ_1_SEG_2"]
+
+    seg = result["segments"][0]
+    assert seg["start_ts"] == iso(0)
+    np.testing.assert_allclose(seg["coordinates"], [[0, 0], [0, 0.03], [0, 0.06], [0.03, 0.06]], atol=1e-12)
+    assert seg["sog"][:3] == pytest.approx([10, 15, 20])
+    # Neither end of the last frame knows SOG / COG
+    assert seg["sog"][3] is None and seg["cog"][3] is None
+    # 350 -> 10 through north
+    assert seg["cog"][:3] == pytest.approx([350, 0, 10], abs=1e-9)
+    # Bearing to the next frame; the last frame repeats the previous one
+    assert seg["heading"][:2] == pytest.approx([0, 0], abs=1e-9)
+    assert seg["heading"][2] == pytest.approx(90, abs=0.01)
+    assert seg["heading"][3] == seg["heading"][2]
+
+
+def test_single_point_falls_back_to_cog(client):
+    seg = _resample(client, "TRJ_1", "30s")["segments"][1]
+    assert seg["start_ts"] == iso(200)
+    assert seg["coordinates"] == [[1.0, 1.0]]
+    assert seg["heading"] == [123.0]
+
+
+def test_step_units(client):
+    assert len(_resample(client, "TRJ_1", "45")["segments"][0]["coordinates"]) == 3
+    assert len(_resample(client, "TRJ_1", "1m")["segments"][0]["coordinates"]) == 2
+    frames = _resample(client, "TRJ_2", "1h")["segments"][0]["coordinates"]
+    assert len(frames) == 300_000 // 3600 + 1
+    assert frames[1] == pytest.approx([5.0 + 3600 / 300_000, 5.0 + 3600 / 300_000])
+
+
+@pytest.mark.parametrize("trajectory_id, step, status", [
+    ("TRJ_1", "0.5s", 400),
+    ("TRJ_1", "fast", 400),
+    ("TRJ_2", "1s", 400),
+    ("TRJ_missing", "30s", 404),
+])
+def test_errors(client, trajectory_id, step, status):
+    response = client.get(f"/trajectories/{trajectory_id}/resample", params={"step": step})
+    assert response.status_code == status
@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+
+from app.core.sdkg_graph import NODE_TYPES, RELATIONS, SDKGGraph
+from factories import random_sdkg_index
+
+
+@pytest.fixture
+def raw():
+    return random_sdkg_index(np.random.default_rng(19))
+
+
+def _links(raw):
+    """(source, target, relation) index triples in file order."""
+    index = {node["id"]: i for i, node in enumerate(raw["nodes"])}
+    return [(index[link["source"]], index[link["target"]], link.get("relation")) for link in raw["links"]]
+
+
+def test_adjacency_matches_link_list(raw):
+    graph = SDKGGraph.from_index("v", raw)
+    links = _links(raw)
+    assert len(graph) == len(raw["nodes"]) and graph.num_links == len(links)
+    assert [graph.type_of(i) for i in range(len(graph))] == [node["type"] for node in raw["nodes"]]
+    assert [graph.relation_of(k) for k in range(graph.num_links)] == [r for _, _, r in links]
+
+    for node in range(len(graph)):
+        out = [(t, k) for k, (s, t, _) in enumerate(links) if s == node]
+        inc = [(s, k) for k, (s, t, _) in enumerate(links) if t == node]
+        neighbour, link = graph.neighbours(node)
+        # Outgoing first, each side in link order
+        assert list(zip(neighbour.tolist(), link.tolist())) == out + inc
+        assert graph.degree_of(np.array([node]))[0] == len(out) + len(inc)
+
+        for relations in (["part_of"], ["has_attribute", "implements"], ["unknown"], []):
+            # A self-loop is both an outgoing and an incoming entry
+            expected = sorted(
+                [k for k, (s, _, r) in enumerate(links) if s == node and r in relations]
+                + [k for k, (_, t, r) in enumerate(links) if t == node and r in relations]
+            )
+            _, link = graph.neighbours(node, relations)
+            assert sorted(link.tolist()) == expected
+            assert graph.degree_of(np.array([node]), relations)[0] == len(expected)
+
+
+def test_links_among_matches_brute_force(raw):
+    graph = SDKGGraph.from_index("v", raw)
+    links = _links(raw)
+    rng = np.random.default_rng(1)
+    for _ in range(20):
+        nodes = rng.choice(len(graph), 15, replace=False)
+        members = set(nodes.tolist())
+        assert graph.links_among(nodes).tolist() == [
+            k for k, (s, t, _) in enumerate(links) if s in members and t in members
+        ]
+        assert graph.links_among(nodes, ["part_of"]).tolist() == [
+            k for k, (s, t, r) in enumerate(links) if s in members and t in members and r == "part_of"
+        ]
+
+
+def test_nodes_by_type_and_rank(raw):
+    graph = SDKGGraph.from_index("v", raw)
+    for code, name in enumerate(NODE_TYPES):
+        assert graph.nodes_by_type[code].tolist() == [i for i, n in enumerate(raw["nodes"]) if n["type"] == name]
+
+    def key(i):
+        node = raw["nodes"][i]
+        support = node["support"] if node["support"] is not None else -np.inf
+        time = node["time"] if node["time"] is not None else -np.inf
+        return (-support, -int(graph.degree[i]), -time, i)
+
+    assert np.argsort(graph.node_rank).tolist() == sorted(range(len(graph)), key=key)
+
+
+def test_from_index_relations_and_dropped_links():
+    raw = {
+        "nodes": [{"id": "a", "type": "segment", "label": "A"}, {"id": "b", "type": "behavior", "label": "B"}],
+        "links": [
+            {"source": "a", "target": "b", "relation": "exhibits_behavior"},
+            {"source": "a", "target": "missing", "relation": "part_of"},
+            {"source": "b", "target": "a", "relation": "custom"},
+        ],
+    }
+    graph = SDKGGraph.from_index("v", raw)
+    assert graph.num_links == 2
+    assert graph.relations == [*RELATIONS, "custom"]
+    assert [graph.relation_of(k) for k in range(2)] == ["exhibits_behavior", "custom"]
+    # Without per-node fields, titles fall back to the labels
+    assert graph.titles == ["A", "B"] and graph.summaries == ["", ""]
+
+    with pytest.raises(ValueError):
+        SDKGGraph.from_index("v", {"nodes": [{"id": "x", "type": "vessel", "label": "X"}], "links": []})
+    with pytest.raises(ValueError):
+        SDKGGraph.from_index("v", {"nodes": []})
+
+
+def test_snapshot_round_trip(raw, tmp_path):
+    graph = SDKGGraph.from_index("v", raw)
+    path = tmp_path / "sdkg_index.npz"
+    graph.save_snapshot(str(path))
+    loaded = SDKGGraph.load_snapshot("v", path)
+
+    for name in ("node_ids", "labels", "titles", "summaries", "relations"):
+        assert getattr(loaded, name) == getattr(graph, name), name
+    for name in ("node_type", "link_source", "link_target", "link_relation", "node_support", "node_time",
+                 "node_rank"):
+        np.testing.assert_array_equal(getattr(loaded, name), getattr(graph, name), err_msg=name)
+    for a, b in zip(loaded.out_edges, graph.out_edges):
+        np.testing.assert_array_equal(a, b)
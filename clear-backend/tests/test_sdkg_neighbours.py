@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import sdkg
+from factories import StaticStore, make_graph, random_sdkg_index
+
+
+@pytest.fixture
+def raw():
+    # Few nodes, many links: every node is a hub
+    return random_sdkg_index(np.random.default_rng(22), n_nodes=40, n_links=600)
+
+
+@pytest.fixture
+def client(raw, monkeypatch):
+    monkeypatch.setattr(sdkg, "sdkg_store", StaticStore(make_graph(raw)))
+    app = FastAPI()
+    app.include_router(sdkg.router)
+    return TestClient(app)
+
+
+def _ranked_entries(raw, node_id, relations=None):
+    """(neighbour id, link number, direction) of node_id, ranked by brute force."""
+    degree = {node["id"]: 0 for node in raw["nodes"]}
+    for link in raw["links"]:
+        degree[link["source"]] += 1
+        degree[link["target"]] += 1
+    position = {node["id"]: i for i, node in enumerate(raw["nodes"])}
+
+    def rank(node_id):
+        node = raw["nodes"][position[node_id]]
+        support = -np.inf if node["support"] is None else node["support"]
+        time = -np.inf if node["time"] is None else node["time"]
+        return (-support, -degree[node_id], -time, position[node_id])
+
+    entries = []
+    for k, link in enumerate(raw["links"]):
+        if relations is not None and link.get("relation") not in relations:
+            continue
+        if link["source"] == node_id:
+            entries.append((link["target"], k, "out"))
+        if link["target"] == node_id:
+            # A self-loop is also an incoming entry, still reported as outgoing
+            entries.append((link["source"], k, "out" if link["source"] == node_id else "in"))
+    return sorted(entries, key=lambda e: (rank(e[0]), e[1]))
+
+
+def _walk(client, node_id, limit, **params):
+    entries, cursor, pages = [], 0, 0
+    while cursor is not None:
+        body = client.get(
+            f"/sdkg/nodes/{node_id}/neighbours", params={"cursor": cursor, "limit": limit, **params}
+        ).json()
+        assert body["cursor"] == cursor and len(body["neighbours"]) <= limit
+        entries += [(n["id"], n["direction"], n["relation"]) for n in body["neighbours"]]
+        cursor = body["nextCursor"]
+        pages += 1
+    return entries, body["degree"], pages
+
+
+@pytest.mark.parametrize("relations", [None, ["part_of", "implements"]])
+def test_cursor_paging_walks_every_neighbour_once(client, raw, relations):
+    params = {"relation": relations} if relations else {}
+    for node in raw["nodes"][:10]:
+        expected = _ranked_entries(raw, node["id"], relations)
+        entries, degree, pages = _walk(client, node["id"], 7, **params)
+        assert degree == len(expected)
+        assert pages == max(-(-len(expected) // 7), 1)
+        assert entries == [(n, d, raw["links"][k].get("relation")) for n, k, d in expected]
+
+
+def test_subgraph_fanout_keeps_best_ranked_links(client, raw):
+    fanout = 5
+    for node in raw["nodes"][:10]:
+        body = client.get(f"/sdkg/subgraph/{node['id']}", params={"depth": 1, "fanout": fanout}).json()
+        expected = _ranked_entries(raw, node["id"])
+
+        center = next(n for n in body["nodes"] if n["isCenter"])
+        assert center["degree"] == len(expected)
+        assert center["neighboursCursor"] == (fanout if len(expected) > fanout else None)
+
+        # Level-1 nodes are the distinct neighbours among the top-`fanout` entries
+        top = [n for n, _, _ in expected[:fanout]]
+        assert {n["id"] for n in body["nodes"] if n["level"] == 1} == set(top) - {node["id"]}
+        # The first neighbour page continues exactly where the subgraph stopped
+        cursor = center["neighboursCursor"] or 0
+        page = client.get(f"/sdkg/nodes/{node['id']}/neighbours", params={"cursor": cursor, "limit": 3}).json()
+        assert [n["id"] for n in page["neighbours"]] == [n for n, _, _ in expected[cursor:cursor + 3]]
+
+
+def test_without_fanout_cap(client, raw):
+    node_id = raw["nodes"][0]["id"]
+    body = client.get(f"/sdkg/subgraph/{node_id}", params={"depth": 1, "fanout": 100000}).json()
+    neighbours = {n for n, _, _ in _ranked_entries(raw, node_id)} - {node_id}
+    assert {n["id"] for n in body["nodes"] if n["level"] == 1} == neighbours
+    assert all(n["neighboursCursor"] is None for n in body["nodes"])
+
+
+def test_unknown_node(client):
+    assert client.get("/sdkg/nodes/missing/neighbours").status_code == 404
+    assert client.get("/sdkg/subgraph/missing").status_code == 404
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import sdkg
+from app.core.node_store import NodePackWriter, NodeStore
+from app.core.sdkg_graph import SDKGGraphStore
+
+
+def _node(node_id, **fields):
+    return {
+        "id": node_id,
+        "type": "attribute",
+        "label": f"label of {node_id}",
+        # Long enough to be stored zlib-compressed
+        "summary": "attribute summary " * 40,
+        "metadata": {"support": 1},
+        **fields,
+    }
+
+
+def _corrupt(path, offset, length):
+    with open(path, "r+b") as f:
+        f.seek(offset)
+        f.write(b"\xff" * length)
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    ids = ["A_good", "A_zlib", "A_json", "A_invalid"]
+    index_path = tmp_path / "sdkg_index.json"
+    index_path.write_text(json.dumps({
+        "nodes": [{"id": i, "type": "attribute", "label": i} for i in ids],
+        "links": [],
+    }))
+
+    pack_path = tmp_path / "nodes.pack"
+    with NodePackWriter(str(pack_path)) as writer:
+        writer.add("A_good", _node("A_good"))
+        writer.add("A_zlib", _node("A_zlib"))
+        writer.add("A_json", {"id": "A_json"})
+        writer.add("A_invalid", _node("A_invalid", type="vessel"))
+    pack = NodeStore(str(pack_path)).pack()
+    _corrupt(pack_path, *pack._index["A_zlib"][:2])
+    _corrupt(pack_path, pack._index["A_json"][0], 1)
+
+    monkeypatch.setattr(sdkg, "sdkg_store", SDKGGraphStore(str(index_path)))
+    monkeypatch.setattr(sdkg, "node_store", NodeStore(str(pack_path)))
+    app = FastAPI()
+    app.include_router(sdkg.router)
+    return TestClient(app)
+
+
+def test_batch_reports_broken_records_inline(client):
+    ids = ["A_good", "A_zlib", "A_json", "A_invalid", "A_missing", "A_good"]
+    response = client.post("/sdkg/nodes:batch", json={"ids": ids})
+    assert response.status_code == 200
+    items = response.json()["items"]
+
+    assert [item["id"] for item in items] == ids
+    assert items[0]["error"] is None and items[0]["node"]["id"] == "A_good"
+    assert items[5] == items[0]
+    for item in items[1:4]:
+        assert item["node"] is None
+        assert item["error"].startswith("Unreadable node record")
+    assert items[4] == {"id": "A_missing", "node": None, "error": "Node not found"}
+
+
+def test_single_node_lookup(client):
+    assert client.get("/sdkg/nodes/A_good").json()["id"] == "A_good"
+    assert client.get("/sdkg/nodes/A_missing").status_code == 404
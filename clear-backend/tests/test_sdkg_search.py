@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import sdkg
+from app.core.sdkg_graph import NODE_TYPES, SDKGGraph
+from factories import StaticStore, make_graph, random_sdkg_index
+
+
+@pytest.fixture
+def raw():
+    return random_sdkg_index(np.random.default_rng(20), n_nodes=300, n_links=600)
+
+
+def _brute_force(raw, keywords, types=None):
+    return [
+        i for i, node in enumerate(raw["nodes"])
+        if (types is None or node["type"] in types) and all(k.lower() in node["label"].lower() for k in keywords)
+    ]
+
+
+@pytest.mark.parametrize("keywords", [
+    ["cargo"], ["CARGO", "port"], ["ålesund"], ["ÅLESUND", "node 1"], ["node 2", "turn", "tanker"], ["missing"], [],
+])
+def test_search_labels_matches_brute_force(raw, keywords):
+    graph = SDKGGraph.from_index("v", raw)
+    assert graph.search_labels(keywords).tolist() == _brute_force(raw, keywords)
+
+    # Candidates keep their own order
+    candidates = np.random.default_rng(0).permutation(len(graph))[:120]
+    expected = [i for i in candidates.tolist() if i in set(_brute_force(raw, keywords))]
+    assert graph.search_labels(keywords, candidates).tolist() == expected
+    assert graph.search_labels(keywords, np.zeros(0, dtype=np.int64)).size == 0
+
+
+@pytest.fixture
+def client(raw, monkeypatch):
+    monkeypatch.setattr(sdkg, "sdkg_store", StaticStore(make_graph(raw)))
+    app = FastAPI()
+    app.include_router(sdkg.router)
+    return TestClient(app)
+
+
+def _all_pages(client, size, **params):
+    ids, page = [], 0
+    while True:
+        body = client.get("/sdkg/index", params={"page": page, "size": size, **params}).json()
+        assert body["page"] == page and body["size"] == size
+        if not body["nodes"]:
+            return ids, body["totalNodes"]
+        assert len(body["nodes"]) <= size
+        ids += [node["id"] for node in body["nodes"]]
+        page += 1
+
+
+def test_index_search_pages(client, raw):
+    ids = [node["id"] for node in raw["nodes"]]
+
+    found, total = _all_pages(client, 7, q="Cargo port")
+    expected = [ids[i] for i in _brute_force(raw, ["cargo", "port"])]
+    assert found == expected and total == len(expected) > 7
+
+    # Type filter: grouped by type in NODE_TYPES order
+    types = ["trajectory", "behavior"]
+    found, total = _all_pages(client, 5, q="tanker", type=types)
+    expected = [
+        ids[i] for t in NODE_TYPES if t in types for i in _brute_force(raw, ["tanker"], [t])
+    ]
+    assert found == expected and total == len(expected)
+
+    found, total = _all_pages(client, 50)
+    assert found == ids and total == len(ids)
+
+
+def test_index_page_links_stay_within_page(client):
+    body = client.get("/sdkg/index", params={"size": 40, "page": 1, "q": "node"}).json()
+    page_ids = {node["id"] for node in body["nodes"]}
+    assert body["links"]
+    assert all(link["source"] in page_ids and link["target"] in page_ids for link in body["links"])
@@ -0,0 +1,137 @@
+import json
+from collections import deque
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import sdkg
+from app.core.node_store import NodeStore
+from app.core.sdkg_graph import SDKGGraphStore
+from factories import StaticStore, make_graph, random_sdkg_index
+
+
+@pytest.fixture
+def raw():
+    return random_sdkg_index(np.random.default_rng(23), n_nodes=120, n_links=200)
+
+
+def _client(monkeypatch, store):
+    monkeypatch.setattr(sdkg, "sdkg_store", store)
+    app = FastAPI()
+    app.include_router(sdkg.router)
+    return TestClient(app)
+
+
+@pytest.fixture
+def client(raw, monkeypatch):
+    return _client(monkeypatch, StaticStore(make_graph(raw)))
+
+
+def _levels(raw, center):
+    """Hop distance of every node reachable from center, ignoring link direction."""
+    adjacent = {}
+    for link in raw["links"]:
+        adjacent.setdefault(link["source"], set()).add(link["target"])
+        adjacent.setdefault(link["target"], set()).add(link["source"])
+    levels, queue = {center: 0}, deque([center])
+    while queue:
+        node = queue.popleft()
+        for other in adjacent.get(node, ()):
+            if other not in levels:
+                levels[other] = levels[node] + 1
+                queue.append(other)
+    return levels
+
+
+def _subgraph(client, center, **params):
+    response = client.get(f"/sdkg/subgraph/{center}", params={"fanout": 100000, **params})
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.parametrize("depth", [1, 2, 3])
+def test_levels_match_breadth_first_search(client, raw, depth):
+    by_id = {node["id"]: node for node in raw["nodes"]}
+    for center in [node["id"] for node in raw["nodes"][:15]]:
+        body = _subgraph(client, center, depth=depth)
+        expected = {n: level for n, level in _levels(raw, center).items() if level <= depth}
+        assert {n["id"]: n["level"] for n in body["nodes"]} == expected
+        assert body["allNodeIds"] == [n["id"] for n in body["nodes"]]
+        assert body["totalNodes"] == len(expected) and body["truncated"] is False
+        assert [n["id"] for n in body["nodes"] if n["isCenter"]] == [center]
+
+        # One link per node pair, only among returned nodes, at the level it was first met
+        pairs = [frozenset((link["source"], link["target"])) for link in body["links"]]
+        assert len(pairs) == len(set(pairs)) == body["totalLinks"]
+        expected_pairs = {
+            frozenset((link["source"], link["target"])) for link in raw["links"]
+            if link["source"] in expected and link["target"] in expected
+            and min(expected[link["source"]], expected[link["target"]]) < depth
+        }
+        assert set(pairs) == expected_pairs
+        for link in body["links"]:
+            assert link["level"] == min(expected[link["source"]], expected[link["target"]]) + 1
+
+        # Enrichment from the graph's node summary table (title falls back to the label)
+        for node in body["nodes"]:
+            assert node["title"] == by_id[node["id"]]["label"]
+            assert node["summary"] == by_id[node["id"]]["summary"]
+
+
+@pytest.mark.parametrize("max_nodes", [1, 2, 5, 17])
+def test_max_nodes_truncates(client, raw, max_nodes):
+    center = max(raw["nodes"], key=lambda n: len(_levels(raw, n["id"])))["id"]
+    levels = _levels(raw, center)
+    assert len(levels) > 17
+
+    body = _subgraph(client, center, depth=10, max_nodes=max_nodes)
+    assert body["totalNodes"] == max_nodes and body["truncated"] is True
+    returned = [n["id"] for n in body["nodes"]]
+    assert returned[0] == center
+    # Nodes come level by level and sit at their true hop distance
+    node_levels = [n["level"] for n in body["nodes"]]
+    assert node_levels == sorted(node_levels)
+    assert all(levels[n["id"]] == n["level"] for n in body["nodes"])
+    assert all(link["source"] in returned and link["target"] in returned for link in body["links"])
+
+    # Enough room for everything reachable: not truncated
+    body = _subgraph(client, center, depth=10, max_nodes=len(levels))
+    assert body["totalNodes"] == len(levels) and body["truncated"] is False
+
+
+def test_relation_filter(client, raw):
+    center = raw["nodes"][0]["id"]
+    body = _subgraph(client, center, depth=2, relation=["part_of"])
+    assert all(link["relation"] == "part_of" for link in body["links"])
+    part_of = {"nodes": raw["nodes"], "links": [link for link in raw["links"] if link.get("relation") == "part_of"]}
+    assert {n["id"] for n in body["nodes"]} == {n for n, level in _levels(part_of, center).items() if level <= 2}
+
+
+def test_enrichment_from_node_store(raw, tmp_path, monkeypatch):
+    # An index written before the pipeline stored titles / summaries: read from the node files
+    nodes_dir = tmp_path / "nodes"
+    nodes_dir.mkdir()
+    for node in raw["nodes"][:60]:
+        document = {"id": node["id"], "type": node["type"], "label": node["label"],
+                    "title": f"Title of {node['id']}", "summary": f"From file {node['id']}"}
+        (nodes_dir / f"{node['id']}.json").write_text(json.dumps(document), encoding="utf-8")
+    index_path = tmp_path / "sdkg_index.json"
+    index_path.write_text(json.dumps({
+        "nodes": [{k: node[k] for k in ("id", "type", "label")} for node in raw["nodes"]],
+        "links": raw["links"],
+    }), encoding="utf-8")
+
+    store = SDKGGraphStore(str(index_path), None, NodeStore(None, str(nodes_dir)))
+    client = _client(monkeypatch, store)
+    by_id = {node["id"]: node for node in raw["nodes"]}
+    body = _subgraph(client, raw["nodes"][0]["id"], depth=3)
+    assert len(body["nodes"]) > 1
+    for node in body["nodes"]:
+        if (nodes_dir / f"{node['id']}.json").exists():
+            assert node["title"] == f"Title of {node['id']}"
+            assert node["summary"] == f"From file {node['id']}"
+        else:
+            # No node file: label as title, empty summary
+            assert node["title"] == by_id[node["id"]]["label"] and node["summary"] == ""
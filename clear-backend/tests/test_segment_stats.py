@@ -0,0 +1,61 @@
+import numpy as np
+
+from app.core.segment_stats import STAT_COLUMNS, compute_segment_stats
+from app.core.trajectory_store import TrajectoryDataset, parse_segments
+
+
+def _stats(timestamp, lon, lat, sog, cog, offsets):
+    columns = [np.asarray(c, dtype=np.float64) for c in (timestamp, lon, lat, sog, cog)]
+    return compute_segment_stats(*columns, np.asarray(offsets, dtype=np.int64))
+
+
+def _assert_float_columns(stats, n):
+    assert set(stats) == set(STAT_COLUMNS)
+    for name, column in stats.items():
+        assert column.dtype == np.float64, name
+        assert column.shape == (n,), name
+
+
+def test_no_segments():
+    stats = _stats([], [], [], [], [], [0])
+    _assert_float_columns(stats, 0)
+
+
+def test_empty_segment():
+    stats = _stats([], [], [], [], [], [0, 0])
+    _assert_float_columns(stats, 1)
+    assert all(np.isnan(column[0]) for column in stats.values())
+
+
+def test_all_cog_missing():
+    stats = _stats([0, 60, 120], [0, 0.01, 0.02], [0, 0, 0], [10, 11, 12], [np.nan] * 3, [0, 3])
+    _assert_float_columns(stats, 1)
+    assert np.isnan(stats["cog_mean"][0])
+    assert np.isnan(stats["total_turn_deg"][0])
+    assert np.isnan(stats["turn_rate_deg_s"][0])
+    assert stats["sog_mean"][0] == 11
+    assert stats["path_length_m"][0] > 0
+
+
+def test_one_point_per_segment():
+    stats = _stats([0, 10], [1, 2], [1, 2], [5, np.nan], [90, np.nan], [0, 1, 2])
+    _assert_float_columns(stats, 2)
+    assert list(stats["duration_s"]) == [0, 0]
+    assert list(stats["path_length_m"]) == [0, 0]
+    assert stats["total_turn_deg"][0] == 0
+    assert np.isnan(stats["total_turn_deg"][1])
+    assert np.isnan(stats["straight_line_ratio"]).all()
+
+
+def test_dataset_builds_from_degenerate_segments():
+    assert len(TrajectoryDataset("empty", *parse_segments([])).segments) == 0
+
+    raw = [{
+        "id": "TRJ_1_SEG_0",
+        "trajectory_id": "TRJ_1",
+        "start_time": "2024-01-01T00:00:00Z",
+        "end_time": "2024-01-01T00:00:00Z",
+        "points": [{"timestamp": "2024-01-01T00:00:00Z", "lat": 55.0, "lon": 10.0, "sog": None, "cog": None}],
+    }]
+    dataset = TrajectoryDataset("single", *parse_segments(raw))
+    assert np.isnan(dataset.segment_stats["sog_mean"][0])
@@ -0,0 +1,102 @@
+import json
+import os
+import struct
+
+import numpy as np
+import pytest
+
+from app.core import segments_bin
+from app.core.segment_stats import STAT_COLUMNS
+from app.core.segments_bin import read_segments_bin, write_segments_bin
+from app.core.trajectory_store import TrajectoryDataset, TrajectoryStore, parse_segments
+from factories import raw_segment
+
+RAW = [
+    raw_segment("TRJ_1_SEG_0", "TRJ_1", [(0, 10.0, 55.0, 5.0, 90.0), (60, 10.01, 55.0, 5.5, 92.0),
+                                         (120, 10.02, 55.01, None, None)],
+                vessel_id="219000001", vessel_type="Cargo"),
+    raw_segment("TRJ_1_SEG_1", "TRJ_1", [(300, 10.05, 55.02, 6.0, 45.0)], vessel_id="219000001",
+                vessel_type="Cargo"),
+    raw_segment("TRJ_2_SEG_0", "TRJ_2", [(30.5, -4.0, 48.0, 12.0, 270.0), (90.25, -4.1, 48.0, 12.0, 271.0)]),
+    raw_segment("TRJ_3_SEG_0", "TRJ_3", []),
+]
+
+
+def _with_description(raw):
+    raw = [dict(r) for r in raw]
+    raw[0]["short_description"] = "Leaving Ålesund"
+    raw[2]["imputed"] = True
+    return raw
+
+
+def test_round_trip(tmp_path):
+    segments, points = parse_segments(_with_description(RAW))
+    path = tmp_path / "segments.bin"
+    write_segments_bin(str(path), segments, points)
+    read_segments, read_points, derived = read_segments_bin(path)
+
+    assert [s.model_dump() for s in read_segments] == [s.model_dump() for s in segments]
+    for name in ("offsets", "timestamp", "lat", "lon", "sog", "cog"):
+        np.testing.assert_array_equal(getattr(read_points, name), getattr(points, name), err_msg=name)
+
+    # Derived columns are the ones the dataset would compute itself
+    expected = TrajectoryDataset("json", segments, points)
+    loaded = TrajectoryDataset("bin", read_segments, read_points, derived)
+    np.testing.assert_array_equal(loaded.point_x, expected.point_x)
+    np.testing.assert_array_equal(loaded.point_y, expected.point_y)
+    np.testing.assert_array_equal(loaded.lod_importance, expected.lod_importance)
+    for name in STAT_COLUMNS:
+        np.testing.assert_array_equal(loaded.segment_stats[name], expected.segment_stats[name], err_msg=name)
+    np.testing.assert_array_equal(loaded.segment_start, expected.segment_start)
+    np.testing.assert_array_equal(loaded.segment_end, expected.segment_end)
+
+
+def test_round_trip_without_segments(tmp_path):
+    path = tmp_path / "segments.bin"
+    write_segments_bin(str(path), *parse_segments([]))
+    segments, points, _ = read_segments_bin(path)
+    assert segments == [] and points.offsets.tolist() == [0]
+
+
+def _rewrite_header(path, edit):
+    data = path.read_bytes()
+    magic, version, header_len = segments_bin._PREAMBLE.unpack_from(data)
+    header = json.loads(data[segments_bin._PREAMBLE.size:segments_bin._PREAMBLE.size + header_len])
+    version = edit(header) or version
+    # Same length keeps the data start where it was
+    header_bytes = json.dumps(header).encode("utf-8").ljust(header_len)
+    assert len(header_bytes) == header_len
+    path.write_bytes(
+        segments_bin._PREAMBLE.pack(magic, version, header_len) + header_bytes
+        + data[segments_bin._PREAMBLE.size + header_len:]
+    )
+
+
+@pytest.mark.parametrize("name", ["ref_vessel_type", "stat_sog_mean", "lod_importance"])
+def test_missing_array_is_rejected(tmp_path, name):
+    path = tmp_path / "segments.bin"
+    write_segments_bin(str(path), *parse_segments(RAW))
+    _rewrite_header(path, lambda header: header["arrays"].pop(name) and None)
+    with pytest.raises(ValueError, match=name):
+        read_segments_bin(path)
+
+
+def test_store_falls_back_to_json_for_old_format(tmp_path):
+    json_path, bin_path = tmp_path / "segments.json", tmp_path / "segments.bin"
+    json_path.write_text(json.dumps(RAW))
+    write_segments_bin(str(bin_path), *parse_segments(RAW))
+    _rewrite_header(bin_path, lambda header: segments_bin.FORMAT_VERSION - 1)
+    # The binary file is the newer one, so the store picks it first
+    os.utime(json_path, ns=(0, 0))
+
+    with pytest.raises(ValueError, match="version"):
+        read_segments_bin(bin_path)
+    dataset = TrajectoryStore(str(json_path), str(bin_path)).current()
+    assert [s.id for s in dataset.segments] == [s.id for s in parse_segments(RAW)[0]]
+
+
+def test_not_a_segments_file(tmp_path):
+    path = tmp_path / "segments.bin"
+    path.write_bytes(struct.pack("<8sII", b"NOTCLEAR", segments_bin.FORMAT_VERSION, 0))
+    with pytest.raises(ValueError, match="Not a CLEAR segments file"):
+        read_segments_bin(path)
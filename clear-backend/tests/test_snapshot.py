@@ -0,0 +1,72 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import trajectory
+from factories import StaticStore, iso, make_dataset, raw_segment
+
+
+@pytest.fixture
+def client(monkeypatch):
+    dataset = make_dataset([
+        # COG turns through north, then a second segment starts where the first ends
+        raw_segment("V1_SEG_0", "TRJ_1", [(0, 10.0, 50.0, 10.0, 350.0), (100, 11.0, 51.0, 20.0, 10.0)],
+                    vessel_id="1", vessel_type="Cargo"),
+        raw_segment("V1_SEG_1", "TRJ_1", [(100, 11.0, 51.0, 20.0, 10.0), (200, 12.0, 52.0, 20.0, 10.0)],
+                    vessel_id="1", vessel_type="Cargo"),
+        # Crosses the antimeridian; SOG / COG only known at one end
+        raw_segment("V2_SEG_0", "TRJ_2", [(0, 179.5, -10.0, None, None), (100, -179.5, -10.0, 8.0, 90.0)],
+                    vessel_id="2", vessel_type="Tanker"),
+        # Not active at t=50
+        raw_segment("V3_SEG_0", "TRJ_3", [(150, 0.0, 0.0, 1.0, 1.0), (250, 0.1, 0.1, 1.0, 1.0)], vessel_id="3"),
+    ])
+    monkeypatch.setattr(trajectory, "trajectory_store", StaticStore(dataset))
+    app = FastAPI()
+    app.include_router(trajectory.router)
+    return TestClient(app)
+
+
+def _snapshot(client, t, **params):
+    response = client.get("/trajectories/snapshot", params={"t": iso(t), **params})
+    assert response.status_code == 200
+    return {p["vessel_id"]: p for p in response.json()["positions"]}
+
+
+def test_interpolates_between_fixes(client):
+    positions = _snapshot(client, 50)
+    assert set(positions) == {"1", "2"}
+
+    v1 = positions["1"]
+    assert v1["segment_id"] == "V1_SEG_0" and v1["vessel_type"] == "Cargo"
+    assert v1["lon"] == pytest.approx(10.5) and v1["lat"] == pytest.approx(50.5)
+    assert v1["sog"] == pytest.approx(15.0)
+    # 350 -> 10 goes through north, not through 180
+    assert v1["cog"] == pytest.approx(0.0, abs=1e-9)
+
+    v2 = positions["2"]
+    assert abs(v2["lon"]) == pytest.approx(180.0)
+    assert v2["sog"] == pytest.approx(8.0) and v2["cog"] == pytest.approx(90.0)
+
+    # Quarter way across the antimeridian stays east of it
+    assert _snapshot(client, 25)["2"]["lon"] == pytest.approx(179.75)
+    assert _snapshot(client, 75)["2"]["lon"] == pytest.approx(-179.75)
+
+
+def test_one_position_per_vessel_on_segment_boundary(client):
+    positions = _snapshot(client, 100)
+    assert set(positions) == {"1", "2"}
+    assert positions["1"]["lon"] == pytest.approx(11.0) and positions["1"]["cog"] == pytest.approx(10.0)
+
+
+def test_filters(client):
+    assert set(_snapshot(client, 50, vessel_type="Tanker")) == {"2"}
+    assert set(_snapshot(client, 200, vessel_id=["1", "3"])) == {"1", "3"}
+    # The viewport applies to the interpolated position, not just the segment envelope
+    assert set(_snapshot(client, 50, bbox="10,50,10.4,50.4")) == set()
+    assert set(_snapshot(client, 50, bbox="10,50,10.6,50.6")) == {"1"}
+    assert set(_snapshot(client, 1000)) == set()
+
+
+def test_rejects_bad_bbox(client):
+    response = client.get("/trajectories/snapshot", params={"t": iso(50), "bbox": "0,0,nan,1"})
+    assert response.status_code == 400
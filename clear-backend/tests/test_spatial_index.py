@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from app.core.spatial_index import SegmentGrid, parse_bbox
+
+
+def _random_envelopes(rng, n):
+    lon = rng.uniform(-20, 30, n)
+    lat = rng.uniform(40, 70, n)
+    width = rng.exponential(0.5, n)
+    height = rng.exponential(0.3, n)
+    return lon, lat, lon + width, lat + height
+
+
+def _brute_force(envelopes, bbox):
+    min_lon, min_lat, max_lon, max_lat = envelopes
+    q_min_lon, q_min_lat, q_max_lon, q_max_lat = bbox
+    hit = (min_lon <= q_max_lon) & (max_lon >= q_min_lon) & (min_lat <= q_max_lat) & (max_lat >= q_min_lat)
+    return np.flatnonzero(hit)
+
+
+def test_grid_matches_brute_force():
+    rng = np.random.default_rng(0)
+    envelopes = _random_envelopes(rng, 2000)
+    # Segments without points have NaN envelopes and are never returned
+    for column in envelopes:
+        column[::97] = np.nan
+    grid = SegmentGrid(*envelopes)
+
+    queries = [(-180.0, -90.0, 180.0, 90.0), (0.0, 50.0, 0.0, 50.0), (100.0, 0.0, 110.0, 10.0)]
+    for _ in range(200):
+        lon, lat = rng.uniform(-25, 35), rng.uniform(35, 75)
+        queries.append((lon, lat, lon + rng.exponential(2.0), lat + rng.exponential(1.0)))
+
+    for bbox in queries:
+        np.testing.assert_array_equal(grid.query(bbox), _brute_force(envelopes, bbox))
+
+
+def test_grid_without_segments():
+    empty = np.zeros(0)
+    assert SegmentGrid(empty, empty, empty, empty).query((0, 0, 1, 1)).size == 0
+    nan = np.full(3, np.nan)
+    assert SegmentGrid(nan, nan, nan, nan).query((-180, -90, 180, 90)).size == 0
+
+
+def test_parse_bbox():
+    assert parse_bbox("8.1,54.5,12.9,57.8") == (8.1, 54.5, 12.9, 57.8)
+    assert parse_bbox("-180,-90,180,90") == (-180.0, -90.0, 180.0, 90.0)
+
+
+@pytest.mark.parametrize("value", [
+    "1,2,3",
+    "a,b,c,d",
+    "nan,0,1,1",
+    "0,0,inf,1",
+    "-inf,0,1,1",
+    "-181,0,1,1",
+    "0,0,1,91",
+    "2,0,1,1",
+    "0,2,1,1",
+])
+def test_parse_bbox_rejects(value):
+    with pytest.raises(ValueError):
+        parse_bbox(value)
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from app.core.time_index import IntervalIndex, to_epoch_seconds
+from factories import make_dataset, raw_segment
+
+
+def _brute_force(starts, ends, start, end):
+    hit = np.ones(starts.size, dtype=bool)
+    if start is not None:
+        hit &= ends >= start
+    if end is not None:
+        hit &= starts <= end
+    return np.flatnonzero(hit)
+
+
+def test_overlapping_matches_brute_force():
+    rng = np.random.default_rng(11)
+    # Integer times give plenty of shared and touching endpoints; a few long intervals
+    # keep the running maximum of the ends ahead of the sorted ends
+    starts = rng.integers(0, 1000, 400).astype(np.float64)
+    ends = starts + np.where(rng.random(400) < 0.05, rng.integers(0, 800, 400), rng.integers(0, 20, 400))
+    index = IntervalIndex(starts, ends)
+    assert len(index) == 400
+
+    windows = [(None, None), (None, 500.0), (500.0, None), (1e9, None), (None, -1.0)]
+    for _ in range(300):
+        a, b = sorted(rng.integers(-50, 1850, 2).astype(np.float64))
+        windows.append((a, b))
+        windows.append((a, a))
+    for start, end in windows:
+        np.testing.assert_array_equal(
+            index.overlapping(start, end), _brute_force(starts, ends, start, end), err_msg=f"{start}..{end}"
+        )
+
+
+def test_empty_index():
+    index = IntervalIndex(np.zeros(0), np.zeros(0))
+    assert len(index) == 0
+    assert index.overlapping().size == 0
+    assert index.overlapping(0.0, 10.0).size == 0
+
+
+@pytest.mark.parametrize("value", [
+    datetime(2024, 1, 1, 12, 30),
+    datetime(2024, 1, 1, 12, 30, tzinfo=timezone.utc),
+    datetime(2024, 1, 1, 14, 30, tzinfo=timezone(timedelta(hours=2))),
+])
+def test_to_epoch_seconds_treats_naive_as_utc(value):
+    assert to_epoch_seconds(value) == 1704112200.0
+
+
+def test_dataset_time_window():
+    dataset = make_dataset([
+        raw_segment("A", "T1", [(0, 1.0, 1.0), (100, 1.0, 1.0)]),
+        raw_segment("B", "T1", [(200, 1.0, 1.0), (300, 1.0, 1.0)]),
+        raw_segment("C", "T2", [(50, 1.0, 1.0), (250, 1.0, 1.0)]),
+    ])
+    ids = [s.id for s in dataset.segments]
+
+    def selected(start, end):
+        idx = dataset.query_segments(
+            start=datetime.fromtimestamp(start, tz=timezone.utc) if start is not None else None,
+            end=datetime.fromtimestamp(end, tz=timezone.utc) if end is not None else None,
+        )
+        return sorted(ids[i] for i in idx)
+
+    assert selected(110, 190) == ["C"]
+    assert selected(100, 100) == ["A", "C"]
+    assert selected(260, None) == ["B"]
+    assert selected(None, 40) == ["A"]
+    assert selected(301, None) == []